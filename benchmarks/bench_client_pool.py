@@ -0,0 +1,123 @@
+"""
+Benchmark for the throughput of :class:`keycloak.client.KeycloakClient`
+against a local stub server with a growing number of threads, with the
+default connection pool of `requests` and with a pool sized for the
+threads.
+
+Usage:
+
+.. code-block:: bash
+
+    $ python benchmarks/bench_client_pool.py --requests 200
+
+Besides the requests per second the number of connections the server
+accepted is shown: with a pool smaller than the number of threads
+connections are discarded after their request and opened again, which
+against a real Keycloak server also means a new TLS handshake.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import threading
+import time
+
+from keycloak.client import KeycloakClient
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+BODY = json.dumps({'keys': []}).encode('utf-8')
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Send the headers and body in one segment, delayed ACKs would dominate
+    # the measurement otherwise.
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), StubHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+
+
+def bench(server, threads, requests, **kwargs):
+    """
+    :return: Requests per second and number of accepted connections
+    :rtype: tuple[float, int]
+    """
+    url = 'http://127.0.0.1:{}/certs'.format(server.server_address[1])
+    client = KeycloakClient(server_url=url, **kwargs)
+    client.get(url)
+    server.connections = 0
+
+    def run():
+        for _ in range(requests):
+            client.get(url)
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    start = time.time()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.time() - start
+    client.close()
+    return threads * requests / elapsed, server.connections
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--requests', type=int, default=100,
+                        help='Number of requests per thread')
+    parser.add_argument('--threads', type=int, nargs='+',
+                        default=[1, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    server = StubServer()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    print('{:>8} {:>14} {:>12} {:>14} {:>12}'.format(
+        'threads', 'default req/s', 'connections', 'sized req/s',
+        'connections'
+    ))
+    for threads in args.threads:
+        default = bench(server, threads, args.requests)
+        sized = bench(server, threads, args.requests, pool_maxsize=threads,
+                      pool_block=True)
+        print('{:>8} {:>14.0f} {:>12} {:>14.0f} {:>12}'.format(
+            threads, default[0], default[1], sized[0], sized[1]
+        ))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Micro-benchmark for verifying a token with a raw JWK versus a key object
+which is constructed once, as done by :class:`keycloak.jwks.KeycloakJWKS`.
+
+Usage:
+
+.. code-block:: bash
+
+    $ python benchmarks/bench_decode_token.py --number 2000
+"""
+from __future__ import print_function
+
+import argparse
+import timeit
+
+from common import AUDIENCE, generate_private_key, public_jwk, sign
+from keycloak.jwt_backends import BACKENDS, get_backend
+
+
+def bench(backend, algorithm, number):
+    private_key = generate_private_key(algorithm)
+    raw_key = public_jwk(private_key, algorithm)
+    prepared_key = backend.construct_key(raw_key, algorithm)
+    token = sign(private_key, algorithm)
+
+    def decode(key):
+        return lambda: backend.decode(token, key, algorithms=[algorithm],
+                                      audience=AUDIENCE)
+
+    raw = min(timeit.repeat(decode(raw_key), number=number, repeat=3))
+    prepared = min(timeit.repeat(decode(prepared_key), number=number,
+                                 repeat=3))
+    return raw / number, prepared / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--number', type=int, default=1000,
+                        help='Number of verifications per measurement')
+    parser.add_argument('--algorithms', nargs='+',
+                        default=['RS256', 'PS256', 'ES256'])
+    parser.add_argument('--backends', nargs='+', default=sorted(BACKENDS))
+    args = parser.parse_args()
+
+    print('{:<14} {:<8} {:>14} {:>14} {:>10}'.format(
+        'backend', 'alg', 'raw JWK (us)', 'prepared (us)', 'saved'
+    ))
+    for name in args.backends:
+        backend = get_backend(name)
+        for algorithm in args.algorithms:
+            if algorithm not in backend.algorithms:
+                print('{:<14} {:<8} not supported'.format(name, algorithm))
+                continue
+            raw, prepared = bench(backend, algorithm, args.number)
+            print('{:<14} {:<8} {:>14.1f} {:>14.1f} {:>9.1f}%'.format(
+                name, algorithm, raw * 1e6, prepared * 1e6,
+                (raw - prepared) / raw * 100
+            ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""
+Compare the number of token verifications per second of the JWT backends in
+:mod:`keycloak.jwt_backends`, using key objects which are constructed once.
+
+Usage:
+
+.. code-block:: bash
+
+    $ python benchmarks/bench_jwt_backends.py --duration 2
+"""
+from __future__ import print_function
+
+import argparse
+import timeit
+
+from common import AUDIENCE, generate_private_key, public_jwk, sign
+from keycloak.jwt_backends import BACKENDS, get_backend
+
+
+def verifications_per_second(backend, algorithm, duration):
+    private_key = generate_private_key(algorithm)
+    key = backend.construct_key(public_jwk(private_key, algorithm), algorithm)
+    token = sign(private_key, algorithm)
+
+    timer = timeit.Timer(lambda: backend.decode(
+        token, key, algorithms=[algorithm], audience=AUDIENCE
+    ))
+    number, elapsed = timer.autorange()
+    number = max(int(number * duration / elapsed), 1)
+    return number / min(timer.repeat(number=number, repeat=3))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--duration', type=float, default=1.0,
+                        help='Approximate seconds per measurement')
+    parser.add_argument('--algorithms', nargs='+',
+                        default=['RS256', 'PS256', 'ES256'])
+    parser.add_argument('--backends', nargs='+', default=sorted(BACKENDS))
+    args = parser.parse_args()
+
+    print('{:<8} '.format('alg') + ' '.join(
+        '{:>14}'.format(name) for name in args.backends
+    ) + '   (verifications/s)')
+    for algorithm in args.algorithms:
+        row = []
+        for name in args.backends:
+            backend = get_backend(name)
+            if algorithm not in backend.algorithms:
+                row.append('{:>14}'.format('n/a'))
+                continue
+            row.append('{:>14.0f}'.format(
+                verifications_per_second(backend, algorithm, args.duration)
+            ))
+        print('{:<8} '.format(algorithm) + ' '.join(row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Key and token generation shared by the benchmarks.
+"""
+import json
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+from jose import jwk, jwt
+from jose.utils import base64url_encode
+
+AUDIENCE = 'benchmark'
+CLAIMS = {'sub': 'user', 'aud': AUDIENCE}
+
+
+def generate_private_key(algorithm):
+    if algorithm.startswith('ES'):
+        return ec.generate_private_key(ec.SECP256R1(), default_backend())
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048,
+                                    backend=default_backend())
+
+
+def public_jwk(private_key, algorithm):
+    """
+    :rtype: dict
+    """
+    pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    # python-jose can't construct PS keys, the JWK itself is the same.
+    key = jwk.construct(pem, algorithm.replace('PS', 'RS')).to_dict()
+    key['alg'] = algorithm
+    return key
+
+
+def sign(private_key, algorithm, claims=None):
+    """
+    :rtype: str
+    """
+    claims = claims or CLAIMS
+    if not algorithm.startswith('PS'):
+        pem = private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        return jwt.encode(claims, pem, algorithm=algorithm)
+
+    # python-jose doesn't support PS algorithms
+    hash_algorithm = getattr(hashes, 'SHA' + algorithm[2:])()
+    signing_input = b'.'.join([
+        base64url_encode(json.dumps({'alg': algorithm}).encode('utf-8')),
+        base64url_encode(json.dumps(claims).encode('utf-8')),
+    ])
+    signature = private_key.sign(
+        signing_input,
+        padding.PSS(mgf=padding.MGF1(hash_algorithm),
+                    salt_length=hash_algorithm.digest_size),
+        hash_algorithm
+    )
+    return (signing_input + b'.' + base64url_encode(signature)).decode()
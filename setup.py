@@ -17,6 +17,7 @@ TESTS_REQUIRE = [
     'pytest',
     'pytest-cov',
     'mock>=2.0',
+    'cryptography',
 ]
 
 if AIO_COMPATIBLE:
@@ -41,6 +42,9 @@ setup(
             'Sphinx==1.4.4',
             'sphinx-autobuild==0.6.0',
         ],
+        'cryptography': [
+            'cryptography',
+        ],
         'aio': [
             'aiohttp>=3.4.4,<4; python_full_version>="3.5.3"'
         ]
@@ -60,17 +60,20 @@ class KeycloakAdmin(object):
 
     def post(self, url, data, headers=None, **kwargs):
         return self._realm.client.post(
-            url=url, data=data, headers=self._add_auth_header(headers=headers)
+            url=url, data=data, headers=self._add_auth_header(headers=headers),
+            **get_request_options(kwargs)
         )
 
     def put(self, url, data, headers=None, **kwargs):
         return self._realm.client.put(
-            url=url, data=data, headers=self._add_auth_header(headers=headers)
+            url=url, data=data, headers=self._add_auth_header(headers=headers),
+            **get_request_options(kwargs)
         )
 
     def get(self, url, headers=None, **kwargs):
         return self._realm.client.get(
-            url=url, headers=self._add_auth_header(headers=headers)
+            url=url, headers=self._add_auth_header(headers=headers),
+            **get_request_options(kwargs)
         )
 
     def delete(self, url, headers=None, **kwargs):
@@ -88,3 +91,17 @@ class KeycloakAdmin(object):
         headers['Authorization'] = "Bearer {}".format(token)
         headers['Content-Type'] = 'application/json'
         return headers
+
+
+def get_request_options(kwargs):
+    """
+    Only the `timeout` and `deadline` of a request are passed on to the
+    client, when they're given.
+
+    :param dict kwargs: Keyword arguments of a request
+    :rtype: dict
+    """
+    return dict(
+        (name, kwargs[name]) for name in ('timeout', 'deadline')
+        if kwargs.get(name) is not None
+    )
@@ -107,28 +107,34 @@ class User(KeycloakAdminBase):
                           user_id=self._user_id,
                           client=self._client)
 
-    def get(self):
+    def get(self, deadline=None):
         """
         Return registered user with the given user id.
 
         http://www.keycloak.org/docs-api/3.4/rest-api/index.html#_users_resource
+
+        :param keycloak.deadline.Deadline deadline: (optional)
         """
         self._user = self._client.get(
             url=self._client.get_full_url(
                 self.get_path(
                     'single', realm=self._realm_name, user_id=self._user_id
                 )
-            )
+            ),
+            deadline=deadline
         )
         self._user_id = self.user["id"]
         return self._user
 
-    def update(self, **kwargs):
+    def update(self, deadline=None, **kwargs):
         """
         Update existing user.
 
         https://www.keycloak.org/docs-api/2.5/rest-api/index.html#_userrepresentation
 
+        The user is fetched when it wasn't yet, updated and fetched again.
+        All these requests together have to finish before the `deadline`.
+
         :param str first_name: first_name for user
         :param str last_name: last_name for user
         :param str email: Email for user
@@ -137,7 +143,10 @@ class User(KeycloakAdminBase):
         :param string array realm_roles: Realm Roles
         :param Map client_roles: Client Roles
         :param string array groups: Groups for user
+        :param keycloak.deadline.Deadline deadline: (optional)
         """
+        if self._user is None:
+            self.get(deadline=deadline)
         payload = {}
         for k, v in self.user.items():
             payload[k] = v
@@ -151,9 +160,10 @@ class User(KeycloakAdminBase):
                     'single', realm=self._realm_name, user_id=self._user_id
                 )
             ),
-            data=json.dumps(payload, sort_keys=True)
+            data=json.dumps(payload, sort_keys=True),
+            deadline=deadline
         )
-        self.get()
+        self.get(deadline=deadline)
         return result
 
     def delete(self):
@@ -1,11 +1,17 @@
 import asyncio
+import time
 from functools import partial
 from typing import Any
 
 import aiohttp
 
 from keycloak.aio.abc import AsyncInit
-from keycloak.client import KeycloakClient as SyncKeycloakClient
+from keycloak.client import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    KeycloakClient as SyncKeycloakClient,
+)
+from keycloak.deadline import normalize_timeout
 from keycloak.exceptions import KeycloakClientError
 
 __all__ = (
@@ -18,11 +24,19 @@ class KeycloakClient(AsyncInit, SyncKeycloakClient):
     _loop = None
     _session_factory = None
 
+    retry_exceptions = (aiohttp.ClientConnectionError, asyncio.TimeoutError)
+
     def __init__(self, server_url, *, headers, logger=None, loop=None,
                  session_factory=aiohttp.client.ClientSession,
+                 retry_policy=None,
+                 timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+                 circuit_breakers=None, load_balancer=None,
                  **session_params):
 
-        super().__init__(server_url, headers=headers, logger=logger)
+        super().__init__(server_url, headers=headers, logger=logger,
+                         retry_policy=retry_policy, timeout=timeout,
+                         circuit_breakers=circuit_breakers,
+                         load_balancer=load_balancer)
 
         self._lock = asyncio.Lock()
         self._loop = loop or asyncio.get_event_loop()
@@ -41,6 +55,110 @@ class KeycloakClient(AsyncInit, SyncKeycloakClient):
             raise RuntimeError
         return self._session
 
+    async def _request(self, method, url, **kwargs):
+        if not self._is_guarded(method, url):
+            return await self._handle_response(
+                self._send(method, url, **kwargs)
+            )
+        return await self._handle_response(
+            await self._send(method, url, **kwargs)
+        )
+
+    def _send(self, method, url, timeout=None, deadline=None, **kwargs):
+        """
+        :return: The request context or, when the request is retried,
+            guarded by a circuit breaker or load balanced, a coroutine of the
+            response.
+        """
+        if not self._is_guarded(method, url):
+            return getattr(self.session, method)(
+                url, timeout=self._get_timeout(timeout, deadline), **kwargs
+            )
+        return self._send_guarded(method, url, timeout, deadline, kwargs)
+
+    async def _send_guarded(self, method, url, timeout, deadline, kwargs):
+        """
+        :rtype: aiohttp.ClientResponse
+        """
+        send = getattr(self.session, method)
+        breaker = self._get_circuit_breaker(url)
+        retry = self._start_retry(method, deadline)
+        while True:
+            if breaker is not None:
+                breaker.before_request()
+            try:
+                response = await self._send_once(
+                    send, url, timeout=self._get_timeout(timeout, deadline),
+                    **kwargs
+                )
+            except self.retry_exceptions:
+                if breaker is not None:
+                    breaker.record_failure()
+                delay = self._get_error_retry_delay(retry)
+                if delay is None:
+                    raise
+            else:
+                if breaker is not None:
+                    breaker.record_response(response.status)
+                delay = self._get_retry_delay(retry, response.status,
+                                              response.headers)
+                if delay is None:
+                    return response
+                response.release()
+            self._log_retry(method, url, retry, delay)
+            await asyncio.sleep(delay)
+
+    async def _send_once(self, send, url, **kwargs):
+        """
+        :rtype: aiohttp.ClientResponse
+        """
+        node, url = self._select_node(url)
+        if node is None:
+            return await send(url, **kwargs)
+
+        started = time.monotonic()
+        failed = True
+        try:
+            response = await send(url, **kwargs)
+            failed = response.status >= 500
+            return response
+        finally:
+            self._load_balancer.release(node, time.monotonic() - started,
+                                        failed=failed)
+
+    def _probe(self, url, timeout):
+        """
+        Probe a node of the load balancer from the probing thread, in the
+        event loop of the client.
+
+        :rtype: int
+        """
+        return asyncio.run_coroutine_threadsafe(
+            self._probe_async(url, timeout), self._loop
+        ).result(timeout)
+
+    async def _probe_async(self, url, timeout):
+        async with self.session.get(
+                url, timeout=aiohttp.ClientTimeout(total=timeout)
+        ) as response:
+            return response.status
+
+    def _get_timeout(self, timeout, deadline):
+        """
+        :rtype: aiohttp.ClientTimeout
+        """
+        if timeout is None:
+            timeout = self._timeout
+        total = None
+        if deadline is not None:
+            timeout = deadline.get_timeout(timeout)
+            # Unlike the timeouts of the sync client, aiohttp can limit the
+            # request as a whole.
+            total = deadline.remaining
+        connect, read = normalize_timeout(timeout)
+        return aiohttp.ClientTimeout(total=total, sock_connect=connect,
+                                     sock_read=read)
+
     async def _handle_response(self, req_ctx) -> Any:
         """
         :param aiohttp.client._RequestContextManager req_ctx
@@ -73,6 +191,10 @@ class KeycloakClient(AsyncInit, SyncKeycloakClient):
         return self
 
     async def close(self) -> None:
+        if self._load_balancer is not None:
+            # Don't wait for the probing thread, a probe in progress needs
+            # the event loop.
+            self._load_balancer.stop(timeout=0)
         if self._session is not None:
             await self._session.close()
             self._session = None
@@ -0,0 +1,128 @@
+import asyncio
+
+from keycloak.aio.abc import AsyncInit
+from keycloak.aio.snapshot import revalidate
+from keycloak.jwks import (
+    KeycloakJWKS as SyncKeycloakJWKS,
+    NEGATIVE_CACHE_SIZE,
+    monotonic,
+)
+
+__all__ = (
+    'KeycloakJWKS',
+)
+
+
+class KeycloakJWKS(AsyncInit, SyncKeycloakJWKS):
+    _revalidation = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = asyncio.Lock()
+
+    @property
+    def contents(self):
+        if self._jwks is None:
+            raise RuntimeError
+        return self._jwks
+
+    async def get_key(self, kid):
+        """
+        Get the key object for the given `kid`, fetching the key set again
+        when the `kid` is unknown.
+
+        :param str kid:
+        :return: Key object of the backend
+        :raises KeyError: If the key can't be found.
+        """
+        keys = await self._ensure_loaded()
+        if kid in keys:
+            return keys[kid]
+
+        if self._is_missing(kid):
+            raise KeyError(kid)
+
+        async with self._lock:
+            if kid not in self._keys and self._may_refetch():
+                self._load(await self._fetch())
+
+            if kid in self._keys:
+                return self._keys[kid]
+
+            self._missing[kid] = monotonic() + self._negative_ttl
+            if len(self._missing) > NEGATIVE_CACHE_SIZE:
+                self._missing.popitem(last=False)
+
+        raise KeyError(kid)
+
+    async def get_keys(self):
+        """
+        Get all key objects of the set.
+
+        :return: Key objects of the backend
+        :rtype: list
+        """
+        return list((await self._ensure_loaded()).values())
+
+    async def refresh(self):
+        """
+        Fetch the key set regardless of the TTL.
+        """
+        async with self._lock:
+            self._load(await self._fetch())
+
+    async def revalidate(self):
+        """
+        Fetch the key set regardless of the TTL, but keep using the current
+        set within the stale window when that fails.
+
+        :return: `False` when the current set is kept.
+        :rtype: bool
+        """
+        async with self._lock:
+            return await self._reload()
+
+    async def _ensure_loaded(self):
+        if self.expired:
+            if self.stale and self._lock.locked():
+                return self._keys
+            async with self._lock:
+                if self.expired:
+                    await self._reload()
+        return self._keys
+
+    async def _reload(self):
+        try:
+            jwks = await self._fetch()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            if not self._defer_expiry():
+                raise
+            return False
+        self._load(jwks)
+        return True
+
+    async def _fetch(self):
+        snapshot = self._realm.snapshot
+        if snapshot is None:
+            return await self._realm.client.get(self._path)
+
+        if self._jwks is None:
+            jwks = snapshot.get(self._path)
+            if jwks is not None:
+                self._revalidation = revalidate(snapshot, self._path,
+                                                self.refresh)
+                return jwks
+
+        jwks = await self._realm.client.get(self._path)
+        snapshot.set(self._path, jwks)
+        return jwks
+
+    async def __async_init__(self) -> 'KeycloakJWKS':
+        await self._ensure_loaded()
+        return self
+
+    async def close(self):
+        if self._revalidation is not None:
+            self._revalidation.cancel()
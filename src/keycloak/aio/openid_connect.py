@@ -1,5 +1,16 @@
+import asyncio
+from functools import partial
+
+from jose.exceptions import JWTError
+
+from keycloak.aio.jwks import KeycloakJWKS
 from keycloak.aio.mixins import WellKnownMixin
+from keycloak.aio.singleflight import SingleFlight
+from keycloak.aio.token_manager import ClientCredentialsManager, TokenSession
+from keycloak.jwt_backends import prevalidate
 from keycloak.openid_connect import (
+    DecodeResult,
+    GRANT_TYPE_TOKEN_EXCHANGE,
     KeycloakOpenidConnect as SyncKeycloakOpenidConnect,
     PATH_WELL_KNOWN,
 )
@@ -10,5 +21,207 @@ __all__ = (
 
 
 class KeycloakOpenidConnect(WellKnownMixin, SyncKeycloakOpenidConnect):
+    _executor = None
+
+    jwks_class = KeycloakJWKS
+
+    def __init__(self, *args, executor=None, **kwargs):
+        """
+        :param concurrent.futures.Executor executor: (optional) Executor to
+            verify token signatures in, defaults to the executor of the
+            event loop.
+        """
+        if kwargs.get('jwks_shared_path') is not None:
+            raise ValueError('Sharing the JWKS between processes is not '
+                             'supported by keycloak.aio')
+        if kwargs.get('background_refresh'):
+            raise ValueError('The background refresher is not supported by '
+                             'keycloak.aio')
+        super().__init__(*args, **kwargs)
+        self._executor = executor
+        if self._token_exchange_cache is not None:
+            self._token_exchange_flight = SingleFlight()
+        if self._token_request_flight is not None:
+            self._token_request_flight = SingleFlight()
+
     def get_path_well_known(self):
         return PATH_WELL_KNOWN
+
+    async def decode_token(self, token, key=None, algorithms=None, **kwargs):
+        """
+        Asynchronous version of
+        :meth:`keycloak.openid_connect.KeycloakOpenidConnect.decode_token`.
+
+        The JWKS is fetched without blocking and the signature is verified in
+        the executor, so the event loop isn't blocked by the public key
+        operation.
+
+        :rtype: dict
+        """
+        audience = kwargs.pop('audience', None) or self._client_id
+        algorithms = algorithms or ['RS256']
+
+        cache_key = self._get_token_cache_key(token, key, algorithms,
+                                              audience, kwargs)
+        claims = self._get_cached_token(cache_key)
+        if claims is not None:
+            return claims
+
+        header = prevalidate(token, audience=audience, algorithms=algorithms,
+                             **kwargs)
+        if key is None:
+            key = await self._get_signing_key(header)
+
+        claims = await asyncio.get_event_loop().run_in_executor(
+            self._executor,
+            partial(self._backend.decode, token, key, audience=audience,
+                    algorithms=algorithms, **kwargs)
+        )
+        self._set_cached_token(cache_key, claims)
+        return claims
+
+    async def decode_tokens(self, tokens, algorithms=None, **kwargs):
+        """
+        Asynchronous version of
+        :meth:`keycloak.openid_connect.KeycloakOpenidConnect.decode_tokens`.
+
+        The tokens are verified concurrently in the executor, invalid tokens
+        have the error set on their result.
+
+        :param iterable tokens: Signed JWSs to be verified.
+        :param str,list algorithms: (optional) See :meth:`decode_token`
+        :param kwargs: (optional) See :meth:`decode_token`, the `key`
+            argument is not supported.
+        :rtype: list[keycloak.openid_connect.DecodeResult]
+        """
+        return await asyncio.gather(*[
+            self._decode_result(token, algorithms=algorithms, **kwargs)
+            for token in tokens
+        ])
+
+    async def _decode_result(self, token, **kwargs):
+        try:
+            claims = await self.decode_token(token, **kwargs)
+        except JWTError as err:
+            return DecodeResult(token=token, claims=None, error=err)
+        return DecodeResult(token=token, claims=claims, error=None)
+
+    async def introspect(self, token, token_type_hint=None):
+        """
+        Asynchronous version of
+        :meth:`keycloak.openid_connect.KeycloakOpenidConnect.introspect`.
+
+        :rtype: dict
+        """
+        cache_key = self._get_introspection_cache_key(token, token_type_hint)
+        result = self._get_cached_introspection(cache_key)
+        if result is not None:
+            return result
+
+        result = await self._realm.client.post(
+            self.get_url('introspection_endpoint'),
+            data=self._get_introspection_payload(token, token_type_hint)
+        )
+        self._set_cached_introspection(cache_key, result)
+        return result
+
+    async def userinfo(self, token):
+        """
+        Asynchronous version of
+        :meth:`keycloak.openid_connect.KeycloakOpenidConnect.userinfo`.
+
+        :rtype: dict
+        """
+        cache_key = self._get_userinfo_cache_key(token)
+        result = self._get_cached_userinfo(cache_key)
+        if result is not None:
+            return result
+
+        result = await self._realm.client.get(
+            self.well_known['userinfo_endpoint'],
+            headers={"Authorization": "Bearer {}".format(token)}
+        )
+        self._set_cached_userinfo(cache_key, token, result)
+        return result
+
+    async def token_exchange(self, **kwargs):
+        """
+        Asynchronous version of
+        :meth:`keycloak.openid_connect.KeycloakOpenidConnect.token_exchange`.
+
+        :rtype: dict
+        """
+        cache_key = self._get_token_exchange_cache_key(kwargs)
+        if cache_key is None:
+            return await self._token_request(
+                grant_type=GRANT_TYPE_TOKEN_EXCHANGE, **kwargs
+            )
+
+        response = self._token_exchange_cache.get(cache_key)
+        if response is None:
+            response = await self._token_exchange_flight.do(
+                cache_key, self._exchange_token, cache_key, kwargs
+            )
+        return dict(response)
+
+    async def _exchange_token(self, cache_key, kwargs):
+        response = await self._token_request(
+            grant_type=GRANT_TYPE_TOKEN_EXCHANGE, **kwargs
+        )
+        self._set_cached_token_exchange(cache_key, response)
+        return response
+
+    async def _token_request(self, grant_type, **kwargs):
+        payload = self._get_token_payload(grant_type, kwargs)
+        if grant_type not in self._coalesce_grant_types:
+            return await self._post_token_request(payload)
+
+        response = await self._token_request_flight.do(
+            self._get_token_request_key(payload),
+            self._post_token_request, payload
+        )
+        return dict(response)
+
+    def client_credentials_manager(self, **kwargs):
+        """
+        Asynchronous version of
+        :meth:`keycloak.openid_connect.KeycloakOpenidConnect.client_credentials_manager`.
+
+        The manager has to be awaited before use, it's closed together with
+        the realm.
+
+        :rtype: keycloak.aio.token_manager.ClientCredentialsManager
+        """
+        manager = ClientCredentialsManager(openid_connect=self, **kwargs)
+        self._realm.token_managers.add(manager)
+        return manager
+
+    def token_session(self, token_response, **kwargs):
+        """
+        Asynchronous version of
+        :meth:`keycloak.openid_connect.KeycloakOpenidConnect.token_session`.
+
+        The session has to be awaited before use, it's closed together with
+        the realm.
+
+        :rtype: keycloak.aio.token_manager.TokenSession
+        """
+        session = TokenSession(openid_connect=self,
+                               token_response=token_response, **kwargs)
+        self._realm.token_managers.add(session)
+        return session
+
+    async def close(self):
+        if self._jwks is not None:
+            await self._jwks.close()
+        await super().close()
+
+    async def _get_signing_key(self, header):
+        kid = header.get('kid')
+        if kid is None:
+            return await self.jwks.get_keys()
+
+        try:
+            return await self.jwks.get_key(kid)
+        except KeyError:
+            raise JWTError('No key found for kid: {}'.format(kid))
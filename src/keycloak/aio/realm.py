@@ -1,4 +1,5 @@
 import asyncio
+import weakref
 
 from keycloak.aio.abc import AsyncInit
 from keycloak.aio.authz import KeycloakAuthz
@@ -15,12 +16,18 @@ __all__ = (
 class KeycloakRealm(AsyncInit, SyncKeycloakRealm):
     _lock = None
     _loop = None
+    _token_managers = None
 
     def __init__(self, *args, loop=None, **kwargs):
         self.client_class = kwargs.pop('client_class', KeycloakClient)
         super().__init__(*args, **kwargs)
+        if set(self._client_options) - {'retry_policy', 'timeout',
+                                        'circuit_breakers', 'load_balancer'}:
+            raise ValueError('The connection pool options are not supported '
+                             'by keycloak.aio')
         self._lock = asyncio.Lock()
         self._loop = loop or asyncio.get_event_loop()
+        self._token_managers = weakref.WeakSet()
 
     @property
     def client(self):
@@ -33,16 +40,27 @@ class KeycloakRealm(AsyncInit, SyncKeycloakRealm):
             raise RuntimeError
         return self._client
 
-    def open_id_connect(self, client_id, client_secret):
+    @property
+    def token_managers(self):
+        """
+        Token managers of the realm, they're closed together with the realm.
+
+        :rtype: weakref.WeakSet
+        """
+        return self._token_managers
+
+    def open_id_connect(self, client_id, client_secret, **kwargs):
         """
         Get OpenID Connect client
 
         :param str client_id:
         :param str client_secret:
+        :param kwargs: (optional) Extra options for
+            :class:`keycloak.aio.openid_connect.KeycloakOpenidConnect`
         :rtype: keycloak.aio.openid_connect.KeycloakOpenidConnect
         """
         return KeycloakOpenidConnect(realm=self, client_id=client_id,
-                                     client_secret=client_secret)
+                                     client_secret=client_secret, **kwargs)
 
     def authz(self, client_id):
         """
@@ -66,11 +84,14 @@ class KeycloakRealm(AsyncInit, SyncKeycloakRealm):
                 self._client = await self.client_class(
                     server_url=self._server_url,
                     headers=self._headers,
-                    loop=self._loop
+                    loop=self._loop,
+                    **self._client_options
                 )
         return self
 
     async def close(self):
+        for manager in list(self._token_managers):
+            await manager.close()
         if self._client is not None:
             await self._client.close()
             self._client = None
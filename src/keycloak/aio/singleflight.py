@@ -0,0 +1,35 @@
+import asyncio
+
+__all__ = (
+    'SingleFlight',
+)
+
+
+class SingleFlight(object):
+    """
+    Coalesces concurrent calls with the same key: while a coroutine is in
+    flight, other callers with the same key await the same future instead
+    of running the coroutine themselves.
+    """
+
+    def __init__(self):
+        self._futures = {}
+
+    async def do(self, key, func, *args, **kwargs):
+        """
+        :param str key:
+        :param func: Coroutine function
+        :param args: Arguments for `func`
+        :param kwargs: Keyword arguments for `func`
+        :return: The result of `func`
+        """
+        future = self._futures.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func(*args, **kwargs))
+            self._futures[key] = future
+            future.add_done_callback(lambda f: self._futures.pop(key, None))
+        # Cancelling one of the callers mustn't cancel the shared call.
+        return await asyncio.shield(future)
+
+    def __len__(self):
+        return len(self._futures)
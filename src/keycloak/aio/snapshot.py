@@ -0,0 +1,34 @@
+import asyncio
+
+from keycloak.snapshot import logger
+
+__all__ = (
+    'revalidate',
+)
+
+
+def revalidate(snapshot, url, refresh):
+    """
+    Revalidate a document which was taken from the snapshot in a background
+    task.
+
+    :param keycloak.snapshot.RealmSnapshot snapshot:
+    :param str url:
+    :param refresh: Coroutine function which fetches the document again and
+        passes it to :meth:`keycloak.snapshot.RealmSnapshot.set`.
+    :return: The task or `None` when the document is already revalidated.
+    :rtype: asyncio.Task | None
+    """
+    if not snapshot.claim_revalidation(url):
+        return None
+
+    async def run():
+        try:
+            await refresh()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning('Revalidation of %s failed, keep using the '
+                           'snapshot', url, exc_info=True)
+
+    return asyncio.ensure_future(run())
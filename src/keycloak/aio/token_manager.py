@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import time
+
+from keycloak.aio.abc import AsyncInit
+from keycloak.aio.singleflight import SingleFlight
+from keycloak.exceptions import KeycloakClientError, KeycloakSessionExpired
+from keycloak.token_manager import (
+    ClientCredentialsManager as SyncClientCredentialsManager,
+    Token,
+    TokenManager as SyncTokenManager,
+    TokenSession as SyncTokenSession,
+    get_refreshed_token,
+    is_invalid_grant,
+)
+
+__all__ = (
+    'ClientCredentialsManager',
+    'TokenManager',
+    'TokenSession',
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TokenManager(AsyncInit, SyncTokenManager):
+    """
+    Asynchronous version of :class:`keycloak.token_manager.TokenManager`.
+
+    Awaiting the manager obtains the first token and starts a task which
+    refreshes the token before it expires, :meth:`close` cancels the task.
+    All coroutines which need a token while there is no valid token await
+    the same request to the token endpoint.
+    """
+
+    _flight = None
+    _refresher = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._flight = SingleFlight()
+
+    async def __async_init__(self) -> 'TokenManager':
+        await self.get_token_response()
+        if self._refresher is None:
+            self._refresher = asyncio.ensure_future(self._run())
+        return self
+
+    async def close(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            try:
+                await self._refresher
+            except asyncio.CancelledError:
+                pass
+            self._refresher = None
+
+    async def get_token(self):
+        """
+        Get a valid access token.
+
+        :rtype: str
+        """
+        return (await self.get_token_response())['access_token']
+
+    async def get_token_response(self):
+        """
+        Get a valid access token response.
+
+        :rtype: dict
+        """
+        token = self._token
+        if token is None or token.expired(self._leeway):
+            token = await self._flight.do('token', self._update_token)
+        return token.response
+
+    def invalidate(self):
+        self._token = None
+
+    async def _obtain_token(self):
+        """
+        :rtype: keycloak.token_manager.Token
+        """
+        raise NotImplementedError()
+
+    async def _update_token(self):
+        token = await self._obtain_token()
+        self._set_token(token)
+        return token
+
+    async def _run(self):
+        delay = self._get_delay()
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                await self._flight.do('token', self._update_token)
+            except asyncio.CancelledError:
+                raise
+            except KeycloakSessionExpired:
+                logger.info('The session expired, stop refreshing')
+                return
+            except Exception:
+                logger.warning('Refreshing the access token failed, retrying '
+                               'in %s seconds', self._retry_interval,
+                               exc_info=True)
+                delay = self._retry_interval
+            else:
+                delay = self._get_delay()
+
+    def _get_delay(self):
+        token = self._token
+        if token is None:
+            return 0
+        return max(0, token.refresh_at(self._refresh_fraction) - time.time())
+
+
+class ClientCredentialsManager(TokenManager, SyncClientCredentialsManager):
+    """
+    Asynchronous version of
+    :class:`keycloak.token_manager.ClientCredentialsManager`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        if kwargs.get('store') is not None:
+            raise ValueError('Token stores are not supported by '
+                             'keycloak.aio')
+        super().__init__(*args, **kwargs)
+
+    async def _obtain_token(self):
+        return Token(
+            await self._openid_connect.client_credentials(**self._kwargs)
+        )
+
+
+class TokenSession(TokenManager, SyncTokenSession):
+    """
+    Asynchronous version of :class:`keycloak.token_manager.TokenSession`.
+
+    The refresh task stops once the session expired, from then on
+    :meth:`get_token` raises
+    :class:`keycloak.exceptions.KeycloakSessionExpired`.
+    """
+
+    async def _obtain_token(self):
+        token = self._token
+        if token is None or token.refresh_expired(self._leeway):
+            raise KeycloakSessionExpired()
+        try:
+            return await refresh(self._openid_connect, token)
+        except KeycloakClientError as err:
+            if is_invalid_grant(err):
+                raise KeycloakSessionExpired()
+            raise
+
+
+async def refresh(openid_connect, token, **kwargs):
+    """
+    Asynchronous version of :func:`keycloak.token_manager.refresh`.
+
+    :param keycloak.aio.openid_connect.KeycloakOpenidConnect openid_connect:
+    :param keycloak.token_manager.Token token:
+    :param kwargs: (optional) Extra parameters of the grant
+    :rtype: keycloak.token_manager.Token
+    """
+    obtained_at = time.time()
+    response = await openid_connect.refresh_token(
+        refresh_token=token.refresh_token, **kwargs
+    )
+    return get_refreshed_token(token, response, obtained_at)
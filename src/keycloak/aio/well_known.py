@@ -1,6 +1,7 @@
 import asyncio
 
 from keycloak.aio.abc import AsyncInit
+from keycloak.aio.snapshot import revalidate
 from ..well_known import KeycloakWellKnown as SyncKeycloakWellKnown
 
 __all__ = (
@@ -10,6 +11,7 @@ __all__ = (
 
 class KeycloakWellKnown(AsyncInit, SyncKeycloakWellKnown):
     _lock = None
+    _revalidation = None
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -25,11 +27,28 @@ class KeycloakWellKnown(AsyncInit, SyncKeycloakWellKnown):
     def contents(self, content):
         self._contents = content
 
+    async def refresh(self):
+        """
+        Fetch the document from the server.
+        """
+        self._contents = await self._realm.client.get(self._path)
+        if self._realm.snapshot is not None:
+            self._realm.snapshot.set(self._path, self._contents)
+
     async def __async_init__(self) -> 'KeycloakWellKnown':
         async with self._lock:
             if self._contents is None:
-                self._contents = await self._realm.client.get(self._path)
+                snapshot = self._realm.snapshot
+                if snapshot is not None:
+                    self._contents = snapshot.get(self._path)
+                    if self._contents is not None:
+                        self._revalidation = revalidate(
+                            snapshot, self._path, self.refresh
+                        )
+                if self._contents is None:
+                    await self.refresh()
         return self
 
     async def close(self):
-        pass
+        if self._revalidation is not None:
+            self._revalidation.cancel()
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+DEFAULT_MAXSIZE = 1024
+
+
+def make_key(*parts):
+    """
+    Build a cache key from the given parts. Tokens end up in the key, so only
+    a digest of the parts is used to not keep them around in memory.
+
+    :param parts: JSON serializable values
+    :rtype: str
+    """
+    data = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+class LRUCache(object):
+    """
+    Thread-safe, size-bounded cache with per entry expiry. The least recently
+    used entry get evicted when the cache is full.
+    """
+
+    _maxsize = None
+    _entries = None
+    _lock = None
+
+    hits = 0
+    misses = 0
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        """
+        :param int maxsize: Maximum number of entries.
+        """
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def maxsize(self):
+        return self._maxsize
+
+    def get(self, key, default=None):
+        """
+        :param str key:
+        :param default: Value to return when the key is missing or expired.
+        """
+        with self._lock:
+            try:
+                value, expires_at = self._entries.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expires_at <= monotonic():
+                self.misses += 1
+                return default
+
+            # Re-insert to mark the entry as most recently used.
+            self._entries[key] = (value, expires_at)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl):
+        """
+        :param str key:
+        :param value:
+        :param float ttl: Number of seconds the entry is valid.
+        """
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, monotonic() + ttl)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,201 @@
+import logging
+import threading
+
+from keycloak.exceptions import KeycloakCircuitOpen
+
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+try:
+    from urllib.parse import urlparse  # noqa: F401
+except ImportError:
+    from urlparse import urlparse  # noqa: F401
+
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30
+
+STATE_CLOSED = 'closed'
+STATE_OPEN = 'open'
+STATE_HALF_OPEN = 'half-open'
+
+ENDPOINT_TOKEN = 'token'
+ENDPOINT_ADMIN = 'admin'
+ENDPOINT_DISCOVERY = 'discovery'
+ENDPOINT_OTHER = 'other'
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker(object):
+    """
+    Stops sending requests to an endpoint which keeps failing.
+
+    After `failure_threshold` consecutive failures (connection errors,
+    timeouts and 5xx responses) the circuit opens: requests fail fast with
+    :class:`keycloak.exceptions.KeycloakCircuitOpen` for `reset_timeout`
+    seconds. Then a single probe request is let through (half-open), the
+    circuit closes when it succeeds and opens again when it fails. When a
+    probe doesn't report back, another one is let through after
+    `reset_timeout` seconds.
+
+    The breaker is thread-safe and never blocks, so the same breaker can be
+    used by the sync and the asyncio client.
+    """
+
+    _name = None
+    _failure_threshold = None
+    _reset_timeout = None
+    _state = STATE_CLOSED
+    _failures = 0
+    _opened_at = None
+    _probe_at = None
+    _lock = None
+
+    rejected = 0
+
+    def __init__(self, name, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT):
+        """
+        :param str name: Name of the endpoint class
+        :param int failure_threshold: (optional) Number of consecutive
+            failures after which the circuit opens.
+        :param float reset_timeout: (optional) Number of seconds the circuit
+            stays open before a probe request is let through.
+        """
+        self._name = name
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def state(self):
+        return self._state
+
+    @property
+    def failures(self):
+        return self._failures
+
+    def before_request(self):
+        """
+        :raises keycloak.exceptions.KeycloakCircuitOpen: When the request
+            isn't allowed.
+        """
+        with self._lock:
+            if self._state == STATE_CLOSED:
+                return
+
+            now = monotonic()
+            if self._state == STATE_OPEN:
+                if now < self._opened_at + self._reset_timeout:
+                    self._reject()
+                logger.info('Circuit %s is half-open, probing', self._name)
+                self._state = STATE_HALF_OPEN
+            elif now < self._probe_at + self._reset_timeout:
+                # Another probe is in flight.
+                self._reject()
+            self._probe_at = now
+
+    def record_success(self):
+        with self._lock:
+            if self._state != STATE_CLOSED:
+                logger.info('Circuit %s closed', self._name)
+            self._state = STATE_CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == STATE_HALF_OPEN or \
+                    self._failures >= self._failure_threshold:
+                if self._state != STATE_OPEN:
+                    logger.warning('Circuit %s opened after %s failures',
+                                   self._name, self._failures)
+                self._state = STATE_OPEN
+                self._opened_at = monotonic()
+
+    def record_response(self, status):
+        """
+        :param int status: Status of the response
+        """
+        if status >= 500:
+            self.record_failure()
+        else:
+            self.record_success()
+
+    def _reject(self):
+        self.rejected += 1
+        raise KeycloakCircuitOpen(self._name)
+
+
+class CircuitBreakers(object):
+    """
+    One :class:`keycloak.circuit_breaker.CircuitBreaker` per endpoint class
+    (token endpoint, admin API, `.well-known` and JWKS, other endpoints), so
+    a failing admin API doesn't stop token verification.
+
+    .. code-block:: python
+
+        realm = KeycloakRealm(server_url='https://example.com',
+                              realm_name='my_realm',
+                              circuit_breakers=CircuitBreakers())
+    """
+
+    _options = None
+    _breakers = None
+    _lock = None
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout=DEFAULT_RESET_TIMEOUT):
+        """
+        :param int failure_threshold: (optional) See
+            :class:`keycloak.circuit_breaker.CircuitBreaker`
+        :param float reset_timeout: (optional) See
+            :class:`keycloak.circuit_breaker.CircuitBreaker`
+        """
+        self._options = dict(failure_threshold=failure_threshold,
+                             reset_timeout=reset_timeout)
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, endpoint_class):
+        """
+        :param str endpoint_class:
+        :rtype: keycloak.circuit_breaker.CircuitBreaker
+        """
+        with self._lock:
+            breaker = self._breakers.get(endpoint_class)
+            if breaker is None:
+                breaker = self._breakers[endpoint_class] = CircuitBreaker(
+                    name=endpoint_class, **self._options
+                )
+            return breaker
+
+    def get(self, url):
+        """
+        :param str url: URL of a request
+        :return: The breaker of the endpoint class of the URL
+        :rtype: keycloak.circuit_breaker.CircuitBreaker
+        """
+        return self[get_endpoint_class(url)]
+
+
+def get_endpoint_class(url):
+    """
+    :param str url:
+    :rtype: str
+    """
+    path = urlparse(url).path
+    if '/protocol/openid-connect/token' in path:
+        return ENDPOINT_TOKEN
+    if '/.well-known/' in path or \
+            path.endswith('/protocol/openid-connect/certs'):
+        return ENDPOINT_DISCOVERY
+    if '/admin/' in path:
+        return ENDPOINT_ADMIN
+    return ENDPOINT_OTHER
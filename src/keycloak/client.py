@@ -1,29 +1,117 @@
 import logging
+import socket
+import time
 
-from requests.exceptions import HTTPError
+from requests.adapters import DEFAULT_POOLBLOCK, DEFAULT_POOLSIZE, HTTPAdapter
+from requests.exceptions import (
+    ConnectionError as RequestsConnectionError,
+    HTTPError,
+    Timeout,
+)
 
 from keycloak.exceptions import KeycloakClientError
 
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
 try:
     from urllib.parse import urljoin  # noqa: F401
 except ImportError:
     from urlparse import urljoin  # noqa: F401
 
 import requests
+from urllib3.connection import HTTPConnection
+
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+
+
+class KeepAliveHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter which enables TCP keep-alive on its connections, so idle
+    connections in the pool aren't silently dropped by firewalls or NAT
+    gateways.
+    """
+
+    __attrs__ = HTTPAdapter.__attrs__ + ['_keep_alive']
+
+    def __init__(self, keep_alive, **kwargs):
+        """
+        :param int keep_alive: Number of seconds a connection is idle before
+            keep-alive probes are sent.
+        :param kwargs: Options of :class:`requests.adapters.HTTPAdapter`
+        """
+        self._keep_alive = keep_alive
+        super(KeepAliveHTTPAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = self.get_socket_options()
+        super(KeepAliveHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+
+    def get_socket_options(self):
+        options = list(HTTPConnection.default_socket_options)
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        # The idle time and interval can't be configured on every platform.
+        for name in ('TCP_KEEPIDLE', 'TCP_KEEPINTVL'):
+            if hasattr(socket, name):
+                options.append((socket.IPPROTO_TCP, getattr(socket, name),
+                                self._keep_alive))
+        return options
 
 
 class KeycloakClient(object):
     _server_url = None
     _session = None
     _headers = None
+    _pool_connections = None
+    _pool_maxsize = None
+    _pool_block = None
+    _keep_alive = None
+    _retry_policy = None
+    _timeout = None
+    _circuit_breakers = None
+    _load_balancer = None
 
-    def __init__(self, server_url, headers=None, logger=None):
+    retry_exceptions = (RequestsConnectionError, Timeout)
+
+    def __init__(self, server_url, headers=None, logger=None,
+                 pool_connections=DEFAULT_POOLSIZE,
+                 pool_maxsize=DEFAULT_POOLSIZE, pool_block=DEFAULT_POOLBLOCK,
+                 keep_alive=None, retry_policy=None,
+                 timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+                 circuit_breakers=None, load_balancer=None):
         """
          :param str server_url: The base URL where the Keycloak server can be
             found
         :param dict headers: Optional extra headers to send with requests to
             the server
         :param logging.Logger logger: Optional logger for client
+        :param int pool_connections: (optional) Number of hosts to keep a
+            connection pool for.
+        :param int pool_maxsize: (optional) Maximum number of connections to
+            keep per host, should be at least the number of threads doing
+            requests at once.
+        :param bool pool_block: (optional) Wait for a free connection when
+            all connections of the pool are in use, instead of opening a
+            connection which is discarded after the request.
+        :param int keep_alive: (optional) Enable TCP keep-alive and send the
+            first probe after the connection was idle this number of
+            seconds.
+        :param keycloak.retry.RetryPolicy retry_policy: (optional) Retry
+            idempotent requests which failed temporarily.
+        :param timeout: (optional) Default connect and read timeout of the
+            requests in seconds, a single timeout for both or `None` to wait
+            forever.
+        :type timeout: float | tuple[float, float] | None
+        :param keycloak.circuit_breaker.CircuitBreakers circuit_breakers:
+            (optional) Fail fast with
+            :class:`keycloak.exceptions.KeycloakCircuitOpen` while a class of
+            endpoints keeps failing.
+        :param keycloak.load_balancer.LoadBalancer load_balancer: (optional)
+            Send the requests for `server_url` to the nodes of the load
+            balancer instead.
         """
         if logger is None:
             if hasattr(self.__class__, '__qualname__'):
@@ -36,11 +124,42 @@ class KeycloakClient(object):
         self.logger = logger
         self._server_url = server_url
         self._headers = headers or {}
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._pool_block = pool_block
+        self._keep_alive = keep_alive
+        self._retry_policy = retry_policy
+        self._timeout = timeout
+        self._circuit_breakers = circuit_breakers
+        self._load_balancer = load_balancer
+        if load_balancer is not None:
+            load_balancer.set_prober(self._probe)
 
     @property
     def server_url(self):
         return self._server_url
 
+    @property
+    def retry_policy(self):
+        """
+        :rtype: keycloak.retry.RetryPolicy | None
+        """
+        return self._retry_policy
+
+    @property
+    def circuit_breakers(self):
+        """
+        :rtype: keycloak.circuit_breaker.CircuitBreakers | None
+        """
+        return self._circuit_breakers
+
+    @property
+    def load_balancer(self):
+        """
+        :rtype: keycloak.load_balancer.LoadBalancer | None
+        """
+        return self._load_balancer
+
     @property
     def session(self):
         """
@@ -53,30 +172,213 @@ class KeycloakClient(object):
         if self._session is None:
             self._session = requests.Session()
             self._session.headers.update(self._headers)
+            adapter = self.get_adapter()
+            self._session.mount('https://', adapter)
+            self._session.mount('http://', adapter)
         return self._session
 
+    def get_adapter(self):
+        """
+        :rtype: requests.adapters.HTTPAdapter
+        """
+        kwargs = dict(pool_connections=self._pool_connections,
+                      pool_maxsize=self._pool_maxsize,
+                      pool_block=self._pool_block)
+        if self._keep_alive is not None:
+            return KeepAliveHTTPAdapter(keep_alive=self._keep_alive,
+                                        **kwargs)
+        return HTTPAdapter(**kwargs)
+
     def get_full_url(self, path, server_url=None):
         return urljoin(server_url or self._server_url, path)
 
-    def post(self, url, data, headers=None, **kwargs):
-        return self._handle_response(
-            self.session.post(url, headers=headers or {}, params=kwargs,
-                              data=data)
-        )
+    def post(self, url, data, headers=None, timeout=None, deadline=None,
+             **kwargs):
+        """
+        :param str url:
+        :param data:
+        :param dict headers: (optional)
+        :param timeout: (optional) Connect and read timeout of this request
+            instead of the default timeout of the client.
+        :type timeout: float | tuple[float, float]
+        :param keycloak.deadline.Deadline deadline: (optional) Deadline of
+            the operation the request is part of.
+        :param kwargs: Query parameters
+        """
+        return self._request('post', url, timeout=timeout,
+                             deadline=deadline, headers=headers or {},
+                             params=kwargs, data=data)
+
+    def put(self, url, data, headers=None, timeout=None, deadline=None,
+            **kwargs):
+        return self._request('put', url, timeout=timeout, deadline=deadline,
+                             headers=headers or {}, params=kwargs, data=data)
+
+    def get(self, url, headers=None, timeout=None, deadline=None, **kwargs):
+        return self._request('get', url, timeout=timeout, deadline=deadline,
+                             headers=headers or {}, params=kwargs)
 
-    def put(self, url, data, headers=None, **kwargs):
-        return self._handle_response(
-            self.session.put(url, headers=headers or {}, params=kwargs,
-                             data=data)
-        )
+    def delete(self, url, headers, timeout=None, deadline=None, **kwargs):
+        return self._send('delete', url, timeout=timeout, deadline=deadline,
+                          headers=headers, **kwargs)
 
-    def get(self, url, headers=None, **kwargs):
-        return self._handle_response(
-            self.session.get(url, headers=headers or {}, params=kwargs)
-        )
+    def _request(self, method, url, **kwargs):
+        return self._handle_response(self._send(method, url, **kwargs))
+
+    def _send(self, method, url, timeout=None, deadline=None, **kwargs):
+        """
+        Send a request, retried according to the retry policy, guarded by
+        the circuit breaker of its endpoint class and load balanced.
+
+        :param str method: Name of the method of the session
+        :param str url:
+        :param timeout: (optional) See :meth:`post`
+        :param keycloak.deadline.Deadline deadline: (optional)
+        :param kwargs: Arguments for the method of the session
+        :rtype: requests.Response
+        """
+        send = getattr(self.session, method)
+        if not self._is_guarded(method, url):
+            return send(url, timeout=self._get_timeout(timeout, deadline),
+                        **kwargs)
+
+        breaker = self._get_circuit_breaker(url)
+
+        retry = self._start_retry(method, deadline)
+        while True:
+            if breaker is not None:
+                breaker.before_request()
+            try:
+                response = self._send_once(
+                    send, url, timeout=self._get_timeout(timeout, deadline),
+                    **kwargs
+                )
+            except self.retry_exceptions:
+                if breaker is not None:
+                    breaker.record_failure()
+                delay = self._get_error_retry_delay(retry)
+                if delay is None:
+                    raise
+            else:
+                if breaker is not None:
+                    breaker.record_response(response.status_code)
+                delay = self._get_retry_delay(retry, response.status_code,
+                                              response.headers)
+                if delay is None:
+                    return response
+                response.close()
+            self._log_retry(method, url, retry, delay)
+            time.sleep(delay)
+
+    def _send_once(self, send, url, **kwargs):
+        """
+        Send a single attempt of a request, to a node of the load balancer
+        when there is one.
+
+        :rtype: requests.Response
+        """
+        node, url = self._select_node(url)
+        if node is None:
+            return send(url, **kwargs)
+
+        started = monotonic()
+        failed = True
+        try:
+            response = send(url, **kwargs)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self._load_balancer.release(node, monotonic() - started,
+                                        failed=failed)
+
+    def _select_node(self, url):
+        """
+        :return: The selected node, or `None` when the request isn't load
+            balanced, and the URL of the request on it.
+        :rtype: tuple[keycloak.load_balancer.Node | None, str]
+        """
+        server_url = self._server_url.rstrip('/')
+        if self._load_balancer is None or \
+                url != server_url and not url.startswith(server_url + '/'):
+            return None, url
+        node = self._load_balancer.select()
+        return node, node.url + url[len(server_url):]
+
+    def _probe(self, url, timeout):
+        """
+        Probe a node of the load balancer.
+
+        :rtype: int
+        """
+        response = self.session.get(url, timeout=timeout)
+        response.close()
+        return response.status_code
+
+    def _get_timeout(self, timeout, deadline):
+        """
+        :return: Timeout of a request, limited by the deadline.
+        """
+        if timeout is None:
+            timeout = self._timeout
+        if deadline is not None:
+            return deadline.get_timeout(timeout)
+        return timeout
+
+    def _is_guarded(self, method, url):
+        """
+        :return: Whether the request is retried, guarded by a circuit
+            breaker or load balanced.
+        :rtype: bool
+        """
+        return self._is_retried(method) or \
+            self._get_circuit_breaker(url) is not None or \
+            self._load_balancer is not None
+
+    def _is_retried(self, method):
+        return self._retry_policy is not None and \
+            self._retry_policy.applies_to(method)
+
+    def _start_retry(self, method, deadline):
+        """
+        :rtype: keycloak.retry.Retry | None
+        """
+        if not self._is_retried(method):
+            return None
+        return self._retry_policy.start(deadline=deadline)
+
+    def _get_circuit_breaker(self, url):
+        """
+        :rtype: keycloak.circuit_breaker.CircuitBreaker | None
+        """
+        if self._circuit_breakers is None:
+            return None
+        return self._circuit_breakers.get(url)
+
+    def _get_error_retry_delay(self, retry):
+        """
+        :return: Number of seconds to wait before retrying a request which
+            failed with one of the `retry_exceptions` or `None` when it's
+            final.
+        :rtype: float | None
+        """
+        if retry is None:
+            return None
+        return retry.get_delay()
+
+    def _get_retry_delay(self, retry, status, headers):
+        """
+        :return: Number of seconds to wait before retrying the response or
+            `None` when it's final.
+        :rtype: float | None
+        """
+        if retry is None or \
+                not self._retry_policy.is_retryable_status(status):
+            return None
+        return retry.get_delay(retry_after=headers.get('Retry-After'))
 
-    def delete(self, url, headers, **kwargs):
-        return self.session.delete(url, headers=headers, **kwargs)
+    def _log_retry(self, method, url, retry, delay):
+        self.logger.info('Retrying %s %s in %.2f seconds (retry %s)',
+                         method.upper(), url, delay, retry.attempt)
 
     def _handle_response(self, response):
         with response:
@@ -94,6 +396,8 @@ class KeycloakClient(object):
                 return response.content
 
     def close(self):
+        if self._load_balancer is not None:
+            self._load_balancer.stop()
         if self._session is not None:
             self._session.close()
             self._session = None
@@ -0,0 +1,79 @@
+from keycloak.exceptions import KeycloakDeadlineExceeded
+
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+
+class Deadline(object):
+    """
+    Time budget of an operation which may consist of multiple requests, for
+    example :meth:`keycloak.admin.users.User.update`. Every request gets at
+    most the remaining budget as timeout.
+
+    .. code-block:: python
+
+        user.update(email='user@example.com', deadline=Deadline(5))
+    """
+
+    _expires_at = None
+
+    def __init__(self, timeout):
+        """
+        :param float timeout: Number of seconds from now
+        """
+        self._expires_at = monotonic() + timeout
+
+    @property
+    def expires_at(self):
+        """
+        :return: Moment of expiry on the monotonic clock
+        :rtype: float
+        """
+        return self._expires_at
+
+    @property
+    def remaining(self):
+        """
+        :return: Number of seconds left, never negative.
+        :rtype: float
+        """
+        return max(0, self._expires_at - monotonic())
+
+    @property
+    def expired(self):
+        return monotonic() >= self._expires_at
+
+    def get_timeout(self, timeout=None):
+        """
+        Limit the timeout of a request to the remaining budget.
+
+        :param timeout: (optional) Connect and read timeout, a single
+            timeout for both or `None`
+        :type timeout: float | tuple[float, float] | None
+        :return: Connect and read timeout
+        :rtype: tuple[float, float]
+        :raises keycloak.exceptions.KeycloakDeadlineExceeded: When no
+            budget is left.
+        """
+        remaining = self.remaining
+        if remaining <= 0:
+            raise KeycloakDeadlineExceeded()
+        connect, read = normalize_timeout(timeout)
+        return (
+            remaining if connect is None else min(connect, remaining),
+            remaining if read is None else min(read, remaining),
+        )
+
+
+def normalize_timeout(timeout):
+    """
+    :param timeout: Connect and read timeout, a single timeout for both or
+        `None`
+    :type timeout: float | tuple[float, float] | None
+    :rtype: tuple[float | None, float | None]
+    """
+    if isinstance(timeout, tuple):
+        return timeout
+    return timeout, timeout
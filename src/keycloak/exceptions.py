@@ -6,3 +6,33 @@ class KeycloakClientError(Exception):
         """
         self.original_exc = original_exc
         super(KeycloakClientError, self).__init__(*original_exc.args)
+
+
+class KeycloakSessionExpired(Exception):
+    """
+    The refresh token of a session expired or got revoked, the user has to
+    authenticate again.
+    """
+
+
+class KeycloakDeadlineExceeded(Exception):
+    """
+    The deadline of an operation passed before all its requests were done.
+    """
+
+
+class KeycloakCircuitOpen(Exception):
+    """
+    Requests to a class of endpoints are rejected without sending them,
+    because the endpoints kept failing. Cached data can be used instead.
+    """
+
+    def __init__(self, endpoint_class):
+        """
+        :param str endpoint_class: See
+            :func:`keycloak.circuit_breaker.get_endpoint_class`
+        """
+        self.endpoint_class = endpoint_class
+        super(KeycloakCircuitOpen, self).__init__(
+            'Circuit of the {} endpoints is open'.format(endpoint_class)
+        )
@@ -0,0 +1,343 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from jose.exceptions import JWKError
+
+from keycloak.jwt_backends import get_backend
+
+try:
+    from collections import Mapping
+except ImportError:
+    from collections.abc import Mapping
+
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+DEFAULT_TTL = 300
+DEFAULT_REFETCH_INTERVAL = 10
+DEFAULT_NEGATIVE_TTL = 60
+DEFAULT_STALE_TTL = 0
+NEGATIVE_CACHE_SIZE = 1024
+
+logger = logging.getLogger(__name__)
+
+EC_CURVE_ALGORITHMS = {
+    'P-256': 'ES256',
+    'P-384': 'ES384',
+    'P-521': 'ES512',
+}
+
+
+def get_algorithm(key):
+    """
+    Get the signing algorithm of a JWK, falling back to the default algorithm
+    of the key type when the JWK doesn't specify one.
+
+    :param dict key: JWK
+    :rtype: str
+    """
+    if 'alg' in key:
+        return key['alg']
+    if key.get('kty') == 'EC':
+        return EC_CURVE_ALGORITHMS.get(key.get('crv'), 'ES256')
+    return 'RS256'
+
+
+def prepare_keys(jwks, backend=None):
+    """
+    Construct the key objects for the signing keys of a JWK Set. Keys which
+    can't be loaded are skipped.
+
+    :param dict jwks: JWK Set as returned by the `jwks_uri`
+    :param keycloak.jwt_backends.JWTBackend backend: (optional) Backend to
+        construct the keys for.
+    :return: Key objects indexed by `kid`
+    :rtype: dict
+    """
+    backend = get_backend(backend)
+    keys = {}
+    for key in jwks.get('keys', []):
+        if 'kid' not in key or key.get('use', 'sig') != 'sig':
+            continue
+        try:
+            keys[key['kid']] = backend.construct_key(key, get_algorithm(key))
+        except (JWKError, KeyError, TypeError, ValueError) as err:
+            # Malformed or unsupported keys, jose doesn't wrap all errors in
+            # a JWKError.
+            logger.warning('Ignoring key %s: %s', key['kid'], err)
+    return keys
+
+
+class KeycloakJWKS(Mapping):
+    """
+    Thread-safe cache of the JSON Web Key Set published on the `jwks_uri` of
+    a realm. Keys are indexed by their `kid` and the set is only fetched
+    again once the TTL expired.
+
+    When a key is requested for an unknown `kid` (for example right after the
+    realm keys got rotated) the set is fetched again, but at most once per
+    `refetch_interval`. Concurrent lookups share that single fetch and `kid`s
+    which are still unknown afterwards are remembered for `negative_ttl`
+    seconds, so tokens with forged or stale `kid`s cannot flood the server
+    with requests.
+
+    Key objects are constructed once per fetch of the set, so verifying a
+    token doesn't have to parse the JWK again.
+
+    When fetching an expired set fails, the last fetched set keeps being
+    used for at most `stale_ttl` seconds after it expired. Within that
+    window threads don't wait for a fetch which is already in progress, but
+    use the stale set.
+
+    https://tools.ietf.org/html/rfc7517#section-5
+    """
+
+    _realm = None
+    _path = None
+    _ttl = None
+    _jwks = None
+    _keys = None
+    _expires_at = None
+    _fetched_at = None
+    _stale_ttl = None
+    _stale_until = None
+    _refetch_interval = None
+    _negative_ttl = None
+    _missing = None
+    _backend = None
+    _lock = None
+
+    def __init__(self, realm, path, ttl=DEFAULT_TTL,
+                 refetch_interval=DEFAULT_REFETCH_INTERVAL,
+                 negative_ttl=DEFAULT_NEGATIVE_TTL, backend=None,
+                 stale_ttl=DEFAULT_STALE_TTL):
+        """
+        :param keycloak.realm.KeycloakRealm realm:
+        :param str path: URL of the JWKS (`jwks_uri`)
+        :param int ttl: Number of seconds the fetched keys are considered
+            valid.
+        :param int refetch_interval: Minimum number of seconds between two
+            fetches triggered by an unknown `kid`.
+        :param int negative_ttl: Number of seconds an unknown `kid` is
+            remembered as missing.
+        :param keycloak.jwt_backends.JWTBackend backend: (optional) Backend
+            to construct the key objects for.
+        :param int stale_ttl: (optional) Number of seconds an expired set is
+            still used when it can't be fetched again.
+        """
+        self._realm = realm
+        self._path = path
+        self._ttl = ttl
+        self._refetch_interval = refetch_interval
+        self._negative_ttl = negative_ttl
+        self._stale_ttl = stale_ttl
+        self._missing = OrderedDict()
+        self._backend = get_backend(backend)
+        self._lock = threading.Lock()
+
+    @property
+    def contents(self):
+        """
+        :return: JWKs indexed by `kid`
+        :rtype: dict
+        """
+        self._ensure_loaded()
+        return self._jwks
+
+    def close(self):
+        """
+        Release the resources of the cache, there are none for a cache in
+        memory.
+        """
+
+    @property
+    def ttl(self):
+        return self._ttl
+
+    @property
+    def refetch_interval(self):
+        return self._refetch_interval
+
+    @property
+    def age(self):
+        """
+        :return: Number of seconds since the set got fetched, `None` when it
+            wasn't fetched yet.
+        :rtype: float | None
+        """
+        if self._fetched_at is None:
+            return None
+        return monotonic() - self._fetched_at
+
+    @property
+    def expired(self):
+        return self._expires_at is None or self._expires_at <= monotonic()
+
+    @property
+    def stale(self):
+        """
+        :return: Whether the set expired but may still be used.
+        :rtype: bool
+        """
+        return self.expired and self._stale_until is not None and \
+            self._stale_until > monotonic()
+
+    def get_key(self, kid):
+        """
+        Get the key object for the given `kid`, fetching the key set again
+        when the `kid` is unknown.
+
+        :param str kid:
+        :return: Key object of the backend
+        :raises KeyError: If the key can't be found.
+        """
+        keys = self._ensure_loaded()
+        if kid in keys:
+            return keys[kid]
+
+        if self._is_missing(kid):
+            raise KeyError(kid)
+
+        with self._lock:
+            # The set could have been fetched by another thread while waiting
+            # for the lock, in that case don't fetch it again.
+            if kid not in self._keys and self._may_refetch():
+                self._load(self._fetch())
+
+            if kid in self._keys:
+                return self._keys[kid]
+
+            self._missing[kid] = monotonic() + self._negative_ttl
+            if len(self._missing) > NEGATIVE_CACHE_SIZE:
+                self._missing.popitem(last=False)
+
+        raise KeyError(kid)
+
+    def get_keys(self):
+        """
+        Get all key objects of the set.
+
+        :return: Key objects of the backend
+        :rtype: list
+        """
+        return list(self._ensure_loaded().values())
+
+    def _ensure_loaded(self):
+        """
+        :return: Key objects indexed by `kid`
+        :rtype: dict
+        """
+        if self.expired:
+            if self.stale:
+                # Another thread is fetching the set already, don't wait
+                # for it but use the stale set.
+                if not self._lock.acquire(False):
+                    return self._keys
+            else:
+                self._lock.acquire()
+            try:
+                if self.expired:
+                    self._reload()
+            finally:
+                self._lock.release()
+        return self._keys
+
+    def _is_missing(self, kid):
+        expires_at = self._missing.get(kid)
+        return expires_at is not None and expires_at > monotonic()
+
+    def _may_refetch(self):
+        return self._fetched_at is None or \
+            monotonic() - self._fetched_at >= self._refetch_interval
+
+    def refresh(self):
+        """
+        Fetch the key set regardless of the TTL.
+        """
+        with self._lock:
+            self._load(self._fetch())
+
+    def revalidate(self):
+        """
+        Fetch the key set regardless of the TTL, but keep using the current
+        set within the stale window when that fails.
+
+        :return: `False` when the current set is kept.
+        :rtype: bool
+        :raises Exception: If fetching fails and there is no usable set.
+        """
+        with self._lock:
+            return self._reload()
+
+    def _reload(self):
+        try:
+            jwks = self._fetch()
+        except Exception:
+            # Any failure to reach the server, the set is served stale
+            # regardless of the cause.
+            if not self._defer_expiry():
+                raise
+            return False
+        self._load(jwks)
+        return True
+
+    def _defer_expiry(self):
+        """
+        Keep using the current set after a failed fetch, it's fetched again
+        after `refetch_interval` seconds at the earliest.
+
+        :return: `False` when there is no set within the stale window.
+        :rtype: bool
+        """
+        now = monotonic()
+        if self._stale_until is None or self._stale_until <= now:
+            return False
+
+        logger.warning('Fetching %s failed, using the stale key set',
+                       self._path, exc_info=True)
+        self._expires_at = min(
+            max(self._expires_at, now + self._refetch_interval),
+            self._stale_until
+        )
+        return True
+
+    def _fetch(self):
+        snapshot = self._realm.snapshot
+        if snapshot is None:
+            return self._realm.client.get(self._path)
+
+        if self._jwks is None:
+            # Start with the snapshot and fetch the set in the background.
+            jwks = snapshot.get(self._path)
+            if jwks is not None:
+                snapshot.revalidate(self._path, self.refresh)
+                return jwks
+
+        jwks = self._realm.client.get(self._path)
+        snapshot.set(self._path, jwks)
+        return jwks
+
+    def _load(self, jwks):
+        """
+        :param dict jwks: JWK Set as returned by the `jwks_uri`
+        """
+        self._jwks = dict(
+            (key['kid'], key) for key in jwks.get('keys', []) if 'kid' in key
+        )
+        self._keys = prepare_keys(jwks, backend=self._backend)
+        self._fetched_at = monotonic()
+        self._expires_at = self._fetched_at + self._ttl
+        self._stale_until = self._expires_at + self._stale_ttl
+        self._missing.clear()
+
+    def __getitem__(self, kid):
+        return self.contents[kid]
+
+    def __iter__(self):
+        return iter(self.contents)
+
+    def __len__(self):
+        return len(self.contents)
@@ -0,0 +1,539 @@
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from datetime import timedelta
+
+from jose import __version__ as jose_version, jwk, jwt
+from jose.backends.base import Key as JoseKey
+from jose.constants import ALGORITHMS
+from jose.exceptions import (
+    ExpiredSignatureError,
+    JWKError,
+    JWTClaimsError,
+    JWTError,
+)
+from jose.utils import calculate_at_hash
+
+try:
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+    from cryptography.hazmat.primitives.asymmetric.utils import (
+        encode_dss_signature,
+    )
+    from cryptography.x509 import load_pem_x509_certificate
+except ImportError:  # pragma: no cover
+    default_backend = None
+
+try:
+    string_types = basestring  # noqa: F821
+except NameError:
+    string_types = str
+
+# python-jose before 3.2, the last version on Python 2, has no separate sets
+# of the signature algorithms.
+SIGNATURE_ALGORITHMS = frozenset(
+    ALGORITHMS.HMAC | getattr(ALGORITHMS, 'RSA_DS', ALGORITHMS.RSA) |
+    getattr(ALGORITHMS, 'EC_DS', ALGORITHMS.EC)
+)
+
+# python-jose verifies with key objects since 3.2, before it only takes JWKs,
+# PEM encoded keys and secrets.
+JOSE_KEY_OBJECTS = tuple(
+    int(part) for part in jose_version.split('.')[:2]
+) >= (3, 2)
+
+
+def _b64decode(data):
+    if not isinstance(data, bytes):
+        data = data.encode('ascii')
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+def _b64decode_int(data):
+    return int(binascii.hexlify(_b64decode(data)), 16)
+
+
+# Same defaults as `jose.jwt.decode`
+DEFAULT_OPTIONS = {
+    'verify_signature': True,
+    'verify_aud': True,
+    'verify_iat': True,
+    'verify_exp': True,
+    'verify_nbf': True,
+    'verify_iss': True,
+    'verify_sub': True,
+    'verify_jti': True,
+    'verify_at_hash': True,
+    'require_aud': False,
+    'require_iat': False,
+    'require_exp': False,
+    'require_nbf': False,
+    'require_iss': False,
+    'require_sub': False,
+    'require_jti': False,
+    'require_at_hash': False,
+    'leeway': 0,
+}
+
+
+def load_token(token):
+    """
+    Split a compact JWS in its parts without verifying anything.
+
+    :param str token:
+    :return: header, claims, signing input and signature
+    :rtype: (dict, dict, bytes, bytes)
+    :raises jose.exceptions.JWTError: If the token is malformed.
+    """
+    try:
+        if not isinstance(token, bytes):
+            token = token.encode('ascii')
+        signing_input, crypto_segment = token.rsplit(b'.', 1)
+        header_segment, claims_segment = signing_input.split(b'.', 1)
+        header = json.loads(_b64decode(header_segment).decode('utf-8'))
+        claims = json.loads(_b64decode(claims_segment).decode('utf-8'))
+        signature = _b64decode(crypto_segment)
+    except (TypeError, ValueError, UnicodeError):
+        raise JWTError('Error decoding token.')
+
+    if not isinstance(header, dict):
+        raise JWTError('Invalid header string: must be a json object')
+    if not isinstance(claims, dict):
+        raise JWTError('Invalid payload string: must be a json object')
+    return header, claims, signing_input, signature
+
+
+def _int_claim(claims, name, description):
+    try:
+        return int(claims[name])
+    except (TypeError, ValueError):
+        raise JWTClaimsError(
+            '{} claim ({}) must be an integer.'.format(description, name)
+        )
+
+
+def validate_claims(claims, audience=None, issuer=None, subject=None,
+                    algorithm=None, access_token=None, options=None):
+    """
+    Validate the claims of a token with the same rules and errors as
+    :func:`jose.jwt.decode`.
+
+    :param dict claims:
+    :param str audience: (optional)
+    :param str,iterable issuer: (optional)
+    :param str subject: (optional)
+    :param str algorithm: (optional) Algorithm of the token, needed to
+        verify the `at_hash` claim.
+    :param str access_token: (optional)
+    :param dict options: (optional) See :func:`jose.jwt.decode`
+    :raises jose.exceptions.JWTClaimsError: If any claim is invalid.
+    :raises jose.exceptions.ExpiredSignatureError: If the token expired.
+    """
+    options = dict(DEFAULT_OPTIONS, **(options or {}))
+    leeway = options['leeway']
+    if isinstance(leeway, timedelta):
+        leeway = leeway.total_seconds()
+
+    for name, value in list(options.items()):
+        if name.startswith('require_') and value:
+            claim = name[len('require_'):]
+            if claim not in claims:
+                raise JWTError(
+                    'missing required key "{}" among claims'.format(claim)
+                )
+            options['verify_' + claim] = True
+
+    if not isinstance(audience, (string_types, type(None))):
+        raise JWTError('audience must be a string or None')
+
+    now = int(time.time())
+    if options['verify_iat'] and 'iat' in claims:
+        _int_claim(claims, 'iat', 'Issued At')
+    if options['verify_nbf'] and 'nbf' in claims:
+        if _int_claim(claims, 'nbf', 'Not Before') > now + leeway:
+            raise JWTClaimsError('The token is not yet valid (nbf)')
+    if options['verify_exp'] and 'exp' in claims:
+        if _int_claim(claims, 'exp', 'Expiration Time') < now - leeway:
+            raise ExpiredSignatureError('Signature has expired.')
+
+    if options['verify_aud'] and 'aud' in claims:
+        audience_claims = claims['aud']
+        if isinstance(audience_claims, string_types):
+            audience_claims = [audience_claims]
+        if not isinstance(audience_claims, list) or any(
+                not isinstance(aud, string_types) for aud in audience_claims
+        ):
+            raise JWTClaimsError('Invalid claim format in token')
+        if audience not in audience_claims:
+            raise JWTClaimsError('Invalid audience')
+
+    if options['verify_iss'] and issuer is not None:
+        if isinstance(issuer, string_types):
+            issuer = (issuer,)
+        if claims.get('iss') not in issuer:
+            raise JWTClaimsError('Invalid issuer')
+
+    if options['verify_sub'] and 'sub' in claims:
+        if not isinstance(claims['sub'], string_types):
+            raise JWTClaimsError('Subject must be a string.')
+        if subject is not None and claims['sub'] != subject:
+            raise JWTClaimsError('Invalid subject')
+
+    if options['verify_jti'] and 'jti' in claims:
+        if not isinstance(claims['jti'], string_types):
+            raise JWTClaimsError('JWT ID must be a string.')
+
+    if options['verify_at_hash'] and 'at_hash' in claims:
+        if not access_token:
+            raise JWTClaimsError('No access_token provided to compare '
+                                 'against at_hash claim.')
+        try:
+            expected_hash = calculate_at_hash(
+                access_token, getattr(hashlib, 'sha' + algorithm[2:])
+            )
+        except (AttributeError, TypeError, ValueError):
+            raise JWTClaimsError('Unable to calculate at_hash to verify '
+                                 'against token claims.')
+        if claims['at_hash'] != expected_hash:
+            raise JWTClaimsError('at_hash claim does not match '
+                                 'access_token.')
+
+
+def prevalidate(token, algorithms, **kwargs):
+    """
+    Check the header and claims of a token before its signature is verified,
+    so expired, misdirected or malformed tokens are rejected without doing
+    the (expensive) public key operation. The signature still has to be
+    verified afterwards.
+
+    :param str token:
+    :param list algorithms: Valid algorithms
+    :param kwargs: Claim validation options, see :func:`validate_claims`
+    :return: The unverified header
+    :rtype: dict
+    :raises jose.exceptions.JWTError: If the token will fail verification.
+    """
+    header, claims = load_token(token)[:2]
+    options = dict(kwargs.pop('options', None) or {})
+
+    # The kid is used to look up the key, a forged one mustn't break the
+    # look up.
+    kid = header.get('kid')
+    if kid is not None and not isinstance(kid, string_types):
+        raise JWTError('Invalid kid: must be a string')
+
+    if options.get('verify_signature', True):
+        if isinstance(algorithms, string_types):
+            algorithms = [algorithms]
+        if header.get('alg') not in algorithms:
+            raise JWTError('The specified alg value is not allowed')
+
+    # Comparing the hash of the access token isn't worth it up front.
+    options['verify_at_hash'] = False
+    validate_claims(claims, options=options, **kwargs)
+    return header
+
+
+class JWTBackend(object):
+    """
+    Verifies signed JWTs.
+
+    Keys can be constructed up front with :meth:`construct_key` to not parse
+    them on every verification.
+    """
+
+    name = None
+
+    # Signing algorithms supported by the backend
+    algorithms = frozenset()
+
+    def construct_key(self, key, algorithm):
+        """
+        :param dict | str key: JWK, PEM encoded key or HMAC secret
+        :param str algorithm:
+        :return: Key object which can be given to :meth:`decode`
+        :raises jose.exceptions.JWKError: If the key can't be loaded.
+        """
+        raise NotImplementedError()
+
+    def decode(self, token, key, algorithms, **kwargs):
+        """
+        Verify the signature and claims of a token.
+
+        :param str token: A signed JWS to be verified.
+        :param key: Key object, JWK, JWK Set, PEM encoded key or a list of
+            these to attempt to verify the payload with.
+        :param list algorithms: Valid algorithms
+        :param kwargs: Claim validation options, see
+            :func:`jose.jwt.decode`
+        :rtype: dict
+        :raises jose.exceptions.JWTError: If the token isn't valid.
+        """
+        raise NotImplementedError()
+
+
+class JoseBackend(JWTBackend):
+    """
+    Backend based on python-jose.
+
+    python-jose before 3.2 can't verify with key objects, those are turned
+    into JWKs again on every verification.
+    """
+
+    name = 'jose'
+    algorithms = SIGNATURE_ALGORITHMS
+
+    def construct_key(self, key, algorithm):
+        return jwk.construct(key, algorithm)
+
+    def decode(self, token, key, algorithms, **kwargs):
+        if not JOSE_KEY_OBJECTS:
+            key = self._to_jwk(key)
+        return jwt.decode(token, key, algorithms=algorithms, **kwargs)
+
+    @staticmethod
+    def _to_jwk(key):
+        if isinstance(key, JoseKey):
+            return key.to_dict()
+        if isinstance(key, list):
+            return [item.to_dict() if isinstance(item, JoseKey) else item
+                    for item in key]
+        return key
+
+
+class CryptographyKey(object):
+    """
+    Key object of the :class:`CryptographyBackend`.
+    """
+
+    def __init__(self, key, algorithm):
+        """
+        :param key: Public key of `cryptography` or HMAC secret
+        :param str algorithm:
+        """
+        self.key = key
+        self.algorithm = algorithm
+        self._bits = algorithm[2:]
+
+    def verify(self, signing_input, signature):
+        """
+        :param bytes signing_input:
+        :param bytes signature:
+        :rtype: bool
+        """
+        family = self.algorithm[:2]
+        if family == 'HS':
+            digest = hmac.new(self.key, signing_input,
+                              getattr(hashlib, 'sha' + self._bits)).digest()
+            return hmac.compare_digest(digest, signature)
+
+        hash_algorithm = getattr(hashes, 'SHA' + self._bits)()
+        try:
+            if family == 'RS':
+                self.key.verify(signature, signing_input, padding.PKCS1v15(),
+                                hash_algorithm)
+            elif family == 'PS':
+                self.key.verify(
+                    signature, signing_input,
+                    padding.PSS(mgf=padding.MGF1(hash_algorithm),
+                                salt_length=hash_algorithm.digest_size),
+                    hash_algorithm
+                )
+            else:
+                # JWS uses the raw R || S representation, cryptography
+                # expects DER.
+                size = (self.key.curve.key_size + 7) // 8
+                if len(signature) != 2 * size:
+                    return False
+                r = int(binascii.hexlify(signature[:size]), 16)
+                s = int(binascii.hexlify(signature[size:]), 16)
+                self.key.verify(encode_dss_signature(r, s), signing_input,
+                                ec.ECDSA(hash_algorithm))
+        except InvalidSignature:
+            return False
+        return True
+
+
+class CryptographyBackend(JWTBackend):
+    """
+    Backend which verifies signatures with the `cryptography` package
+    directly. The token is only parsed once and the claims are validated
+    with the same options and errors as :class:`JoseBackend`.
+    """
+
+    name = 'cryptography'
+    algorithms = SIGNATURE_ALGORITHMS | {'PS256', 'PS384', 'PS512'}
+
+    CURVES = {
+        'P-256': 'SECP256R1',
+        'P-384': 'SECP384R1',
+        'P-521': 'SECP521R1',
+    }
+
+    # JWK key type of each algorithm family
+    KEY_TYPES = {
+        'HS': 'oct',
+        'RS': 'RSA',
+        'PS': 'RSA',
+        'ES': 'EC',
+    }
+
+    # Public key material which must never be used as an HMAC secret, same
+    # as python-jose.
+    INVALID_HMAC_SECRETS = (
+        b'-----BEGIN',
+        b'ssh-rsa',
+        b'ssh-ed25519',
+        b'ecdsa-sha2-',
+    )
+
+    def __init__(self):
+        if default_backend is None:  # pragma: no cover
+            raise ImportError('Please install "cryptography" for using this '
+                              'backend')
+
+    def construct_key(self, key, algorithm):
+        if isinstance(key, CryptographyKey):
+            if key.algorithm != algorithm:
+                raise JWKError('Key of {} can not be used for {}'.format(
+                    key.algorithm, algorithm
+                ))
+            return key
+        if algorithm not in self.algorithms:
+            raise JWKError('Unsupported algorithm: {}'.format(algorithm))
+
+        if isinstance(key, JoseKey):
+            try:
+                key = key.to_dict()
+            except Exception as err:
+                raise JWKError('Unsupported key: {}'.format(err))
+
+        if isinstance(key, dict):
+            return CryptographyKey(self._load_jwk(key, algorithm), algorithm)
+
+        if not isinstance(key, (bytes, string_types)):
+            raise JWKError('Unsupported key: {!r}'.format(key))
+        if not isinstance(key, bytes):
+            key = key.encode('utf-8')
+        if key.startswith(b'{'):
+            try:
+                jwk_dict = json.loads(key.decode('utf-8'))
+            except ValueError:
+                pass
+            else:
+                return CryptographyKey(self._load_jwk(jwk_dict, algorithm),
+                                       algorithm)
+
+        if algorithm.startswith('HS'):
+            if any(marker in key for marker in self.INVALID_HMAC_SECRETS):
+                raise JWKError('The specified key is an asymmetric key or '
+                               'x509 certificate and should not be used as '
+                               'an HMAC secret.')
+            return CryptographyKey(key, algorithm)
+
+        try:
+            if b'-----BEGIN CERTIFICATE-----' in key:
+                public_key = load_pem_x509_certificate(
+                    key, default_backend()
+                ).public_key()
+            else:
+                public_key = serialization.load_pem_public_key(
+                    key, default_backend()
+                )
+        except ValueError as err:
+            raise JWKError(err)
+
+        key_class = rsa.RSAPublicKey if algorithm[:2] in ('RS', 'PS') \
+            else ec.EllipticCurvePublicKey
+        if not isinstance(public_key, key_class):
+            raise JWKError('Key can not be used for {}'.format(algorithm))
+        return CryptographyKey(public_key, algorithm)
+
+    def _load_jwk(self, key, algorithm):
+        kty = key.get('kty')
+        if kty != self.KEY_TYPES[algorithm[:2]]:
+            raise JWKError('Key of type {} can not be used for {}'.format(
+                kty, algorithm
+            ))
+        try:
+            if kty == 'RSA':
+                return rsa.RSAPublicNumbers(
+                    e=_b64decode_int(key['e']), n=_b64decode_int(key['n'])
+                ).public_key(default_backend())
+            if kty == 'EC':
+                curve = getattr(ec, self.CURVES[key['crv']])()
+                return ec.EllipticCurvePublicNumbers(
+                    x=_b64decode_int(key['x']), y=_b64decode_int(key['y']),
+                    curve=curve
+                ).public_key(default_backend())
+            return _b64decode(key['k'])
+        except (KeyError, TypeError, ValueError) as err:
+            raise JWKError('Invalid {} key: {}'.format(kty, err))
+
+    def decode(self, token, key, algorithms, options=None, **kwargs):
+        options = dict(DEFAULT_OPTIONS, **(options or {}))
+        header, claims, signing_input, signature = load_token(token)
+        algorithm = header.get('alg')
+
+        if options['verify_signature']:
+            self._verify_signature(signing_input, signature, algorithm, key,
+                                   algorithms)
+
+        validate_claims(claims, algorithm=algorithm, options=options,
+                        **kwargs)
+        return claims
+
+    def _verify_signature(self, signing_input, signature, algorithm, key,
+                          algorithms):
+        if isinstance(algorithms, string_types):
+            algorithms = [algorithms]
+        if algorithm not in algorithms:
+            raise JWTError('The specified alg value is not allowed')
+
+        for candidate in self._get_keys(key):
+            try:
+                candidate = self.construct_key(candidate, algorithm)
+            except JWKError:
+                continue
+            if candidate.algorithm == algorithm and \
+                    candidate.verify(signing_input, signature):
+                return
+
+        raise JWTError('Signature verification failed.')
+
+    @staticmethod
+    def _get_keys(key):
+        if isinstance(key, dict) and 'keys' in key:
+            return key['keys']
+        if isinstance(key, (list, tuple)):
+            return key
+        return [key]
+
+
+BACKENDS = {
+    JoseBackend.name: JoseBackend,
+    CryptographyBackend.name: CryptographyBackend,
+}
+
+
+def get_backend(backend=None):
+    """
+    Get a JWT backend. Without a name python-jose is used, the
+    `cryptography` backend has to be chosen explicitly.
+
+    :param str | JWTBackend backend: (optional) Backend or name of a backend
+    :rtype: JWTBackend
+    """
+    if isinstance(backend, JWTBackend):
+        return backend
+    if backend is None:
+        backend = JoseBackend.name
+    try:
+        return BACKENDS[backend]()
+    except KeyError:
+        raise ValueError('Unknown JWT backend: {}'.format(backend))
@@ -0,0 +1,251 @@
+import logging
+import random
+import threading
+
+import requests
+
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+try:
+    from urllib.parse import urljoin  # noqa: F401
+except ImportError:
+    from urlparse import urljoin  # noqa: F401
+
+STRATEGY_LEAST_OUTSTANDING = 'least_outstanding'
+STRATEGY_EWMA = 'ewma'
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_PROBE_INTERVAL = 5
+DEFAULT_PROBE_PATH = 'auth/realms/master'
+DEFAULT_PROBE_TIMEOUT = 2
+DEFAULT_DECAY = 0.3
+
+logger = logging.getLogger(__name__)
+
+
+class Node(object):
+    """
+    A Keycloak node and the statistics of the requests to it.
+    """
+
+    _url = None
+
+    outstanding = 0
+    latency = None
+    failures = 0
+    ejected = False
+
+    def __init__(self, url):
+        """
+        :param str url: Base URL of the node, the counterpart of the
+            `server_url` of the client
+        """
+        self._url = url.rstrip('/')
+
+    @property
+    def url(self):
+        return self._url
+
+    def __repr__(self):
+        return '<Node {}>'.format(self._url)
+
+
+class LoadBalancer(object):
+    """
+    Spreads the requests of :class:`keycloak.client.KeycloakClient` across
+    several Keycloak nodes without a load balancer in front of them.
+
+    Each request goes to the node with the least outstanding requests or,
+    with the `ewma` strategy, with the lowest moving average of the latency
+    weighted by its outstanding requests. Ties are broken randomly.
+
+    After `failure_threshold` consecutive failures (connection errors,
+    timeouts and 5xx responses) a node is ejected. Ejected nodes are probed
+    in a daemon thread every `probe_interval` seconds by requesting the
+    `probe_path`, and put back once it's served. When all nodes are ejected,
+    requests are still sent to them.
+
+    The load balancer is thread-safe and never blocks, so the same instance
+    can be used by the sync and the asyncio client. The nodes are probed
+    through the session of the client which uses the load balancer.
+    """
+
+    _nodes = None
+    _strategy = None
+    _failure_threshold = None
+    _probe_interval = None
+    _probe_path = None
+    _probe_timeout = None
+    _decay = None
+    _prober = None
+    _lock = None
+    _stopped = None
+    _thread = None
+
+    def __init__(self, urls, strategy=STRATEGY_LEAST_OUTSTANDING,
+                 failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+                 probe_interval=DEFAULT_PROBE_INTERVAL,
+                 probe_path=DEFAULT_PROBE_PATH,
+                 probe_timeout=DEFAULT_PROBE_TIMEOUT, decay=DEFAULT_DECAY):
+        """
+        :param urls: Base URLs of the nodes
+        :type urls: list[str]
+        :param str strategy: (optional) `least_outstanding` or `ewma`
+        :param int failure_threshold: (optional) Number of consecutive
+            failures after which a node is ejected.
+        :param float probe_interval: (optional) Number of seconds between
+            probes of ejected nodes.
+        :param str probe_path: (optional) Path relative to the base URL of a
+            node which is requested to probe it, a realm of the server.
+            Server errors and 404 responses fail the probe.
+        :param float probe_timeout: (optional) Timeout of a probe in seconds.
+        :param float decay: (optional) Weight of the latest latency in the
+            moving average.
+        """
+        if not urls:
+            raise ValueError('At least one node is required')
+        if strategy not in (STRATEGY_LEAST_OUTSTANDING, STRATEGY_EWMA):
+            raise ValueError('Unknown strategy {}'.format(strategy))
+
+        self._nodes = [Node(url) for url in urls]
+        self._strategy = strategy
+        self._failure_threshold = failure_threshold
+        self._probe_interval = probe_interval
+        self._probe_path = probe_path
+        self._probe_timeout = probe_timeout
+        self._decay = decay
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    @property
+    def nodes(self):
+        """
+        :rtype: list[keycloak.load_balancer.Node]
+        """
+        return list(self._nodes)
+
+    def select(self):
+        """
+        Select the node for a request, which has to be released with
+        :meth:`release` afterwards.
+
+        :rtype: keycloak.load_balancer.Node
+        """
+        with self._lock:
+            candidates = [node for node in self._nodes if not node.ejected]
+            if not candidates:
+                candidates = self._nodes
+            node = min(random.sample(candidates, len(candidates)),
+                       key=self._get_cost)
+            node.outstanding += 1
+            return node
+
+    def release(self, node, latency, failed=False):
+        """
+        :param keycloak.load_balancer.Node node:
+        :param float latency: Number of seconds the request took
+        :param bool failed: (optional) Whether the request failed
+        """
+        with self._lock:
+            node.outstanding -= 1
+            if not failed:
+                node.failures = 0
+                self._update_latency(node, latency)
+                return
+
+            node.failures += 1
+            if not node.ejected and \
+                    node.failures >= self._failure_threshold:
+                logger.warning('Ejecting %s after %s failures', node.url,
+                               node.failures)
+                node.ejected = True
+                if self._thread is None:
+                    self._start()
+
+    def stop(self, timeout=None):
+        """
+        Stop probing the ejected nodes.
+
+        :param float timeout: (optional) Number of seconds to wait for the
+            thread to finish.
+        """
+        self._stopped.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def set_prober(self, prober):
+        """
+        Probe the ejected nodes through a client, with its session and
+        settings.
+
+        :param callable prober: Called with the URL and timeout of a probe in
+            the probing thread, returns the status of the response.
+        """
+        self._prober = prober
+
+    def probe(self, node):
+        """
+        :param keycloak.load_balancer.Node node:
+        :return: Number of seconds the probe took or `None` when it failed.
+        :rtype: float | None
+        """
+        url = urljoin(node.url + '/', self._probe_path)
+        started = monotonic()
+        try:
+            if self._prober is not None:
+                status = self._prober(url, self._probe_timeout)
+            else:
+                response = requests.get(url, timeout=self._probe_timeout)
+                response.close()
+                status = response.status_code
+        except Exception:
+            logger.debug('Probing %s failed', node.url, exc_info=True)
+            return None
+        # A node which doesn't serve the realm (yet) isn't healthy either.
+        if status >= 500 or status == 404:
+            return None
+        return monotonic() - started
+
+    def _get_cost(self, node):
+        if self._strategy == STRATEGY_EWMA:
+            return (node.latency or 0) * (node.outstanding + 1), \
+                node.outstanding
+        return node.outstanding
+
+    def _update_latency(self, node, latency):
+        if node.latency is None:
+            node.latency = latency
+        else:
+            node.latency += self._decay * (latency - node.latency)
+
+    def _start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='keycloak-prober')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self._probe_interval):
+            with self._lock:
+                ejected = [node for node in self._nodes if node.ejected]
+                if not ejected:
+                    self._thread = None
+                    return
+
+            for node in ejected:
+                latency = self.probe(node)
+                if latency is None:
+                    continue
+                with self._lock:
+                    logger.info('Putting %s back', node.url)
+                    node.ejected = False
+                    node.failures = 0
+                    node.latency = latency
+
+        with self._lock:
+            self._thread = None
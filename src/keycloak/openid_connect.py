@@ -1,14 +1,142 @@
+import itertools
+import time
+from collections import deque, namedtuple
+from functools import partial
+
+from keycloak.cache import LRUCache, make_key
+from keycloak.jwks import (
+    DEFAULT_NEGATIVE_TTL as DEFAULT_JWKS_NEGATIVE_TTL,
+    DEFAULT_REFETCH_INTERVAL as DEFAULT_JWKS_REFETCH_INTERVAL,
+    DEFAULT_STALE_TTL as DEFAULT_JWKS_STALE_TTL,
+    DEFAULT_TTL as DEFAULT_JWKS_TTL,
+    KeycloakJWKS,
+    prepare_keys,
+)
+from keycloak.jwt_backends import (
+    get_backend,
+    load_token,
+    prevalidate,
+    string_types,
+)
 from keycloak.mixins import WellKnownMixin
+from keycloak.refresher import BackgroundRefresher
+from keycloak.shared_jwks import SharedKeycloakJWKS
+from keycloak.singleflight import SingleFlight
+from keycloak.token_manager import ClientCredentialsManager, TokenSession
 
 try:
     from urllib.parse import urlencode  # noqa: F041
 except ImportError:
     from urllib import urlencode  # noqa: F041
 
-from jose import jwt
+try:
+    from concurrent.futures import ProcessPoolExecutor
+except ImportError:
+    ProcessPoolExecutor = None
+
+from jose.exceptions import JWTError
 
 PATH_WELL_KNOWN = "auth/realms/{}/.well-known/openid-configuration"
 
+DEFAULT_DECODE_CHUNKSIZE = 100
+DEFAULT_DECODE_MAX_PENDING = 16
+
+DEFAULT_INTROSPECT_TTL = 60
+DEFAULT_INTROSPECT_NEGATIVE_TTL = 5
+
+DEFAULT_USERINFO_TTL = 60
+
+DEFAULT_TOKEN_EXCHANGE_MARGIN = 30
+
+GRANT_TYPE_TOKEN_EXCHANGE = 'urn:ietf:params:oauth:grant-type:token-exchange'
+
+
+class DecodeResult(namedtuple('DecodeResult', ['token', 'claims', 'error'])):
+    """
+    Outcome of the verification of a single token by
+    :meth:`KeycloakOpenidConnect.decode_tokens`. Either `claims` or `error`
+    is set.
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+# Key objects of worker processes, indexed by digest of the JWK Set.
+_worker_keys = {}
+
+
+def _decode_chunk(tokens, jwks, backend, **kwargs):
+    """
+    Verify a chunk of tokens in a worker process. The key objects are only
+    built once per process for the same JWK Set.
+
+    :param list[str] tokens:
+    :param dict jwks: JWK Set
+    :param str backend: Name of the JWT backend
+    :param kwargs: Arguments for
+        :meth:`keycloak.jwt_backends.JWTBackend.decode`
+    :rtype: list[(dict, Exception)]
+    """
+    backend = get_backend(backend)
+    jwks_key = make_key(jwks, backend.name)
+    keys = _worker_keys.get(jwks_key)
+    if keys is None:
+        _worker_keys.clear()
+        keys = _worker_keys[jwks_key] = prepare_keys(jwks, backend=backend)
+
+    results = []
+    for token in tokens:
+        try:
+            kid = prevalidate(token, **kwargs).get('kid')
+            if kid is None:
+                key = list(keys.values())
+            elif kid in keys:
+                key = keys[kid]
+            else:
+                raise JWTError('No key found for kid: {}'.format(kid))
+            results.append((backend.decode(token, key, **kwargs), None))
+        except JWTError as err:
+            results.append((None, err))
+    return results
+
+
+def _serialize_key(key):
+    """
+    Stable representation of a verification key to build cache keys with.
+    The representation of other objects can contain their memory address,
+    which is reused by another key once the object is gone.
+
+    :param key: JWK, PEM encoded key, HMAC secret or key object with a
+        `to_dict` method, or a list of those
+    :rtype: dict | str | bytes | list
+    :raises ValueError: If the key has no stable representation.
+    """
+    if key is None or isinstance(key, (dict, bytes, string_types)):
+        return key
+    if isinstance(key, (list, tuple)):
+        return [_serialize_key(item) for item in key]
+
+    to_dict = getattr(key, 'to_dict', None)
+    if to_dict is None:
+        raise ValueError('Key {!r} can not be serialized'.format(key))
+    try:
+        return to_dict()
+    except Exception as err:
+        raise ValueError('Key {!r} can not be serialized: {}'.format(key,
+                                                                     err))
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
 
 class KeycloakOpenidConnect(WellKnownMixin):
 
@@ -16,16 +144,128 @@ class KeycloakOpenidConnect(WellKnownMixin):
     _client_id = None
     _client_secret = None
     _realm = None
-
-    def __init__(self, realm, client_id, client_secret):
+    _jwks = None
+    _jwks_ttl = None
+    _jwks_refetch_interval = None
+    _jwks_negative_ttl = None
+    _jwks_shared_path = None
+    _jwks_stale_ttl = None
+    _background_refresh = None
+    _refresher = None
+    _token_exchange_cache = None
+    _token_exchange_margin = None
+    _token_exchange_flight = None
+    _coalesce_grant_types = None
+    _token_request_flight = None
+    _token_cache = None
+    _backend = None
+    _introspection_cache = None
+    _introspection_cache_ttl = None
+    _introspection_negative_ttl = None
+    _userinfo_cache = None
+    _userinfo_cache_ttl = None
+
+    jwks_class = KeycloakJWKS
+
+    def __init__(self, realm, client_id, client_secret,
+                 jwks_ttl=DEFAULT_JWKS_TTL,
+                 jwks_refetch_interval=DEFAULT_JWKS_REFETCH_INTERVAL,
+                 jwks_negative_ttl=DEFAULT_JWKS_NEGATIVE_TTL,
+                 token_cache_size=None, backend=None,
+                 introspection_cache_size=None,
+                 introspection_cache_ttl=DEFAULT_INTROSPECT_TTL,
+                 introspection_negative_ttl=DEFAULT_INTROSPECT_NEGATIVE_TTL,
+                 userinfo_cache_size=None,
+                 userinfo_cache_ttl=DEFAULT_USERINFO_TTL,
+                 jwks_shared_path=None,
+                 jwks_stale_ttl=DEFAULT_JWKS_STALE_TTL,
+                 background_refresh=False,
+                 token_exchange_cache_size=None,
+                 token_exchange_margin=DEFAULT_TOKEN_EXCHANGE_MARGIN,
+                 coalesce_grant_types=()):
         """
         :param keycloak.realm.KeycloakRealm realm:
         :param str client_id:
         :param str client_secret:
+        :param int jwks_ttl: (optional) Number of seconds the keys fetched
+            from the `jwks_uri` are cached.
+        :param int jwks_refetch_interval: (optional) Minimum number of
+            seconds between two JWKS fetches caused by an unknown `kid`.
+        :param int jwks_negative_ttl: (optional) Number of seconds an unknown
+            `kid` is remembered before the JWKS may be fetched for it again.
+        :param int token_cache_size: (optional) When given, the results of
+            :meth:`decode_token` are kept in a LRU cache of this size until
+            the tokens expire. Results for key objects without a `to_dict`
+            method aren't cached.
+        :param str | keycloak.jwt_backends.JWTBackend backend: (optional)
+            Backend to verify tokens with, either `'cryptography'` or
+            `'jose'`. Defaults to `jose`, `cryptography` requires
+            extras_require "cryptography".
+        :param int introspection_cache_size: (optional) When given, the
+            results of :meth:`introspect` are kept in a LRU cache of this
+            size.
+        :param int introspection_cache_ttl: (optional) Maximum number of
+            seconds an active token is cached, it's never cached beyond its
+            expiry.
+        :param int introspection_negative_ttl: (optional) Number of seconds
+            an inactive token is cached.
+        :param int userinfo_cache_size: (optional) When given, the results of
+            :meth:`userinfo` are kept in a LRU cache of this size.
+        :param int userinfo_cache_ttl: (optional) Maximum number of seconds
+            a userinfo response is cached, it's never cached beyond the
+            expiry of the access token.
+        :param str jwks_shared_path: (optional) File to share the JWKS in
+            between the processes of a host, see
+            :class:`keycloak.shared_jwks.SharedKeycloakJWKS`.
+        :param int jwks_stale_ttl: (optional) Number of seconds the expired
+            JWKS is still used when it can't be fetched again.
+        :param bool background_refresh: (optional) Fetch the JWKS and the
+            `.well-known` in a background thread before the JWKS expires,
+            see :class:`keycloak.refresher.BackgroundRefresher`. Stop it
+            with :meth:`close`.
+        :param int token_exchange_cache_size: (optional) When given, the
+            results of :meth:`token_exchange` are kept in a LRU cache of this
+            size and concurrent identical exchanges are coalesced.
+        :param int token_exchange_margin: (optional) Number of seconds before
+            the exchanged token expires it isn't taken from the cache
+            anymore.
+        :param coalesce_grant_types: (optional) Grant types of which
+            concurrent identical requests to the token endpoint share one
+            response, for example `('client_credentials',)`. Grants of users
+            are only shared by requests with the same credentials, but
+            should usually not be listed.
+        :type coalesce_grant_types: tuple[str]
         """
         self._client_id = client_id
         self._client_secret = client_secret
         self._realm = realm
+        self._jwks_ttl = jwks_ttl
+        self._jwks_refetch_interval = jwks_refetch_interval
+        self._jwks_negative_ttl = jwks_negative_ttl
+        self._jwks_shared_path = jwks_shared_path
+        self._jwks_stale_ttl = jwks_stale_ttl
+        self._background_refresh = background_refresh
+        if token_exchange_cache_size:
+            self._token_exchange_cache = LRUCache(
+                maxsize=token_exchange_cache_size
+            )
+            self._token_exchange_flight = SingleFlight()
+        self._token_exchange_margin = token_exchange_margin
+        if token_cache_size:
+            self._token_cache = LRUCache(maxsize=token_cache_size)
+        self._backend = get_backend(backend)
+        if introspection_cache_size:
+            self._introspection_cache = LRUCache(
+                maxsize=introspection_cache_size
+            )
+        self._introspection_cache_ttl = introspection_cache_ttl
+        self._introspection_negative_ttl = introspection_negative_ttl
+        if userinfo_cache_size:
+            self._userinfo_cache = LRUCache(maxsize=userinfo_cache_size)
+        self._userinfo_cache_ttl = userinfo_cache_ttl
+        self._coalesce_grant_types = frozenset(coalesce_grant_types)
+        if self._coalesce_grant_types:
+            self._token_request_flight = SingleFlight()
 
     def get_path_well_known(self):
         return PATH_WELL_KNOWN
@@ -33,7 +273,71 @@ class KeycloakOpenidConnect(WellKnownMixin):
     def get_url(self, name):
         return self.well_known[name]
 
-    def decode_token(self, token, key, algorithms=None, **kwargs):
+    @property
+    def client_id(self):
+        return self._client_id
+
+    @property
+    def jwks(self):
+        """
+        Cached keys of the realm, indexed by `kid`.
+
+        :rtype: keycloak.jwks.KeycloakJWKS
+        """
+        if self._jwks is None:
+            jwks_class = self.jwks_class
+            kwargs = {}
+            if self._jwks_shared_path is not None:
+                jwks_class = SharedKeycloakJWKS
+                kwargs['shared_path'] = self._jwks_shared_path
+            self._jwks = jwks_class(
+                realm=self._realm,
+                path=self.get_url('jwks_uri'),
+                ttl=self._jwks_ttl,
+                refetch_interval=self._jwks_refetch_interval,
+                negative_ttl=self._jwks_negative_ttl,
+                backend=self._backend,
+                stale_ttl=self._jwks_stale_ttl,
+                **kwargs
+            )
+            if self._background_refresh:
+                self._refresher = BackgroundRefresher(
+                    jwks=self._jwks, well_known=self.well_known
+                )
+                self._refresher.start()
+        return self._jwks
+
+    def close(self):
+        """
+        Stop the background refresher and release the resources of the JWKS
+        cache, like the mapping of a shared JWKS.
+        """
+        if self._refresher is not None:
+            self._refresher.stop()
+            self._refresher = None
+        if self._jwks is not None:
+            self._jwks.close()
+
+    @property
+    def token_cache(self):
+        """
+        Cache of verified tokens, `None` when disabled.
+
+        :rtype: keycloak.cache.LRUCache
+        """
+        return self._token_cache
+
+    @property
+    def userinfo_cache(self):
+        """
+        Cache of userinfo responses, `None` when disabled. The `hits` and
+        `misses` counters of the cache can be used for metrics.
+
+        :rtype: keycloak.cache.LRUCache
+        """
+        return self._userinfo_cache
+
+    def decode_token(self, token, key=None, algorithms=None, **kwargs):
         """
         A JSON Web Key (JWK) is a JavaScript Object Notation (JSON) data
         structure that represents a cryptographic key.  This specification
@@ -44,8 +348,14 @@ class KeycloakOpenidConnect(WellKnownMixin):
 
         https://tools.ietf.org/html/rfc7517
 
+        The header and claims of the token are checked before its signature,
+        so expired tokens or tokens for another audience or issuer are
+        rejected without a public key operation.
+
         :param str token: A signed JWS to be verified.
-        :param str key: A key to attempt to verify the payload with.
+        :param str key: (optional) A key to attempt to verify the payload
+            with. When omitted the key matching the `kid` in the token header
+            is taken from the cached JWKS of the realm.
         :param str,list algorithms: (optional) Valid algorithms that should be
             used to verify the JWS. Defaults to `['RS256']`
         :param str audience: (optional) The intended audience of the token. If
@@ -90,11 +400,209 @@ class KeycloakOpenidConnect(WellKnownMixin):
         :raises jose.exceptions.JWTClaimsError: If any claim is invalid in any
             way.
         """
-        return jwt.decode(
-            token, key,
-            audience=kwargs.pop('audience', None) or self._client_id,
-            algorithms=algorithms or ['RS256'], **kwargs
+        audience = kwargs.pop('audience', None) or self._client_id
+        algorithms = algorithms or ['RS256']
+
+        cache_key = self._get_token_cache_key(token, key, algorithms,
+                                              audience, kwargs)
+        claims = self._get_cached_token(cache_key)
+        if claims is not None:
+            return claims
+
+        header = prevalidate(token, audience=audience, algorithms=algorithms,
+                             **kwargs)
+        if key is None:
+            key = self._get_signing_key(header)
+
+        claims = self._backend.decode(token, key, audience=audience,
+                                      algorithms=algorithms, **kwargs)
+        self._set_cached_token(cache_key, claims)
+        return claims
+
+    def _get_token_cache_key(self, token, key, algorithms, audience,
+                             kwargs):
+        if self._token_cache is None:
+            return None
+        try:
+            key = _serialize_key(key)
+        except ValueError:
+            # Without a stable representation a result could be returned
+            # for another key, so don't cache it.
+            return None
+        return make_key(token, key, algorithms, audience, kwargs)
+
+    def _get_cached_token(self, cache_key):
+        if cache_key is None:
+            return None
+        claims = self._token_cache.get(cache_key)
+        return None if claims is None else dict(claims)
+
+    def _set_cached_token(self, cache_key, claims):
+        if cache_key is None or 'exp' not in claims:
+            return
+
+        # The expiry is converted like by the claim validation, which accepts
+        # numeric strings.
+        try:
+            exp = int(claims['exp'])
+        except (TypeError, ValueError):
+            return
+        self._token_cache.set(cache_key, dict(claims), ttl=exp - time.time())
+
+    def decode_tokens(self, tokens, executor=None,
+                      chunksize=DEFAULT_DECODE_CHUNKSIZE,
+                      max_pending=DEFAULT_DECODE_MAX_PENDING,
+                      algorithms=None, **kwargs):
+        """
+        Verify a batch of tokens with the keys of the realm. A
+        :class:`DecodeResult` is yielded per token in the order of `tokens`,
+        invalid tokens don't stop the iteration but have the error set on
+        their result.
+
+        The signature checks can be spread over the workers of a
+        :class:`concurrent.futures.ThreadPoolExecutor` or
+        :class:`concurrent.futures.ProcessPoolExecutor`. Tokens are submitted
+        in chunks and only a limited number of chunks is in flight, so
+        `tokens` can be a stream of any size. Worker processes receive the
+        JWK Set fetched by this client and build the key objects once.
+
+        :param iterable tokens: Signed JWSs to be verified.
+        :param concurrent.futures.Executor executor: (optional) Pool to run
+            the verification in, when omitted the tokens are verified in the
+            current thread.
+        :param int chunksize: (optional) Number of tokens per submitted task.
+        :param int max_pending: (optional) Maximum number of submitted tasks
+            for which the results haven't been yielded yet.
+        :param str,list algorithms: (optional) See :meth:`decode_token`
+        :param kwargs: (optional) See :meth:`decode_token`, the `key`
+            argument is not supported.
+        :rtype: Iterator[DecodeResult]
+        """
+        if executor is None:
+            decode = partial(self._decode_chunk, algorithms=algorithms,
+                             **kwargs)
+        elif ProcessPoolExecutor is not None and \
+                isinstance(executor, ProcessPoolExecutor):
+            kwargs['audience'] = kwargs.pop('audience', None) or \
+                self._client_id
+            decode = partial(executor.submit, _decode_chunk,
+                             jwks={'keys': list(self.jwks.contents.values())},
+                             backend=self._backend.name,
+                             algorithms=algorithms or ['RS256'], **kwargs)
+        else:
+            decode = partial(executor.submit, self._decode_chunk,
+                             algorithms=algorithms, **kwargs)
+
+        pending = deque()
+        for chunk in _chunks(tokens, chunksize):
+            if executor is None:
+                for result in self._decode_results(chunk, decode(chunk)):
+                    yield result
+                continue
+
+            pending.append((chunk, decode(chunk)))
+            if len(pending) >= max_pending:
+                chunk, future = pending.popleft()
+                for result in self._decode_results(chunk, future.result()):
+                    yield result
+
+        while pending:
+            chunk, future = pending.popleft()
+            for result in self._decode_results(chunk, future.result()):
+                yield result
+
+    def _decode_chunk(self, tokens, **kwargs):
+        results = []
+        for token in tokens:
+            try:
+                results.append((self.decode_token(token, **kwargs), None))
+            except JWTError as err:
+                results.append((None, err))
+        return results
+
+    @staticmethod
+    def _decode_results(tokens, results):
+        for token, (claims, error) in zip(tokens, results):
+            yield DecodeResult(token=token, claims=claims, error=error)
+
+    def _get_signing_key(self, header):
+        """
+        Look up the key to verify the token with in the cached JWKS.
+
+        :param dict header: Unverified header of the token
+        :rtype: jose.backends.base.Key | list[jose.backends.base.Key]
+        :raises jose.exceptions.JWTError: If no matching key is known.
+        """
+        kid = header.get('kid')
+        if kid is None:
+            # Let the backend try all keys of the set.
+            return self.jwks.get_keys()
+
+        try:
+            return self.jwks.get_key(kid)
+        except KeyError:
+            raise JWTError('No key found for kid: {}'.format(kid))
+
+    def introspect(self, token, token_type_hint=None):
+        """
+        The introspection endpoint returns the state of a token and its meta
+        information, also for opaque or offline tokens.
+
+        https://tools.ietf.org/html/rfc7662
+
+        When the introspection cache is enabled, active tokens are cached
+        until they expire (with a maximum of `introspection_cache_ttl`) and
+        inactive tokens for `introspection_negative_ttl` seconds.
+
+        :param str token: The token to introspect
+        :param str token_type_hint: (optional) `access_token` or
+            `refresh_token`
+        :rtype: dict
+        """
+        cache_key = self._get_introspection_cache_key(token, token_type_hint)
+        result = self._get_cached_introspection(cache_key)
+        if result is not None:
+            return result
+
+        result = self._realm.client.post(
+            self.get_url('introspection_endpoint'),
+            data=self._get_introspection_payload(token, token_type_hint)
         )
+        self._set_cached_introspection(cache_key, result)
+        return result
+
+    def _get_introspection_payload(self, token, token_type_hint):
+        payload = {
+            'token': token,
+            'client_id': self._client_id,
+            'client_secret': self._client_secret
+        }
+        if token_type_hint is not None:
+            payload['token_type_hint'] = token_type_hint
+        return payload
+
+    def _get_introspection_cache_key(self, token, token_type_hint):
+        if self._introspection_cache is None:
+            return None
+        return make_key(token, token_type_hint)
+
+    def _get_cached_introspection(self, cache_key):
+        if cache_key is None:
+            return None
+        result = self._introspection_cache.get(cache_key)
+        return None if result is None else dict(result)
+
+    def _set_cached_introspection(self, cache_key, result):
+        if cache_key is None or not isinstance(result, dict):
+            return
+
+        if result.get('active'):
+            ttl = self._introspection_cache_ttl
+            if 'exp' in result:
+                ttl = min(ttl, result['exp'] - time.time())
+        else:
+            ttl = self._introspection_negative_ttl
+        self._introspection_cache.set(cache_key, dict(result), ttl=ttl)
 
     def logout(self, refresh_token):
         """
@@ -132,16 +640,50 @@ class KeycloakOpenidConnect(WellKnownMixin):
 
         http://openid.net/specs/openid-connect-core-1_0.html#UserInfo
 
+        When the userinfo cache is enabled, responses are cached per access
+        token until the token expires, with a maximum of
+        `userinfo_cache_ttl` seconds.
+
         :param str token:
         :rtype: dict
         """
+        cache_key = self._get_userinfo_cache_key(token)
+        result = self._get_cached_userinfo(cache_key)
+        if result is not None:
+            return result
+
         url = self.well_known['userinfo_endpoint']
 
-        return self._realm.client.get(url, headers={
-                                          "Authorization": "Bearer {}".format(
-                                              token
-                                          )
-                                      })
+        result = self._realm.client.get(url, headers={
+            "Authorization": "Bearer {}".format(token)
+        })
+        self._set_cached_userinfo(cache_key, token, result)
+        return result
+
+    def _get_userinfo_cache_key(self, token):
+        if self._userinfo_cache is None:
+            return None
+        return make_key(token)
+
+    def _get_cached_userinfo(self, cache_key):
+        if cache_key is None:
+            return None
+        result = self._userinfo_cache.get(cache_key)
+        return None if result is None else dict(result)
+
+    def _set_cached_userinfo(self, cache_key, token, result):
+        if cache_key is None or not isinstance(result, dict):
+            return
+
+        ttl = self._userinfo_cache_ttl
+        try:
+            exp = load_token(token)[1].get('exp')
+        except JWTError:
+            # Opaque token, only the TTL of the cache applies.
+            exp = None
+        if isinstance(exp, (int, float)):
+            ttl = min(ttl, exp - time.time())
+        self._userinfo_cache.set(cache_key, dict(result), ttl=ttl)
 
     def uma_ticket(self, token, **kwargs):
         """
@@ -226,6 +768,32 @@ class KeycloakOpenidConnect(WellKnownMixin):
         """
         return self._token_request(grant_type='client_credentials', **kwargs)
 
+    def client_credentials_manager(self, **kwargs):
+        """
+        Get a manager which keeps the access token of the
+        `client_credentials` grant and refreshes it ahead of expiry.
+
+        :param kwargs: (optional) Options of
+            :class:`keycloak.token_manager.ClientCredentialsManager` and
+            extra parameters of the grant, for example `scope`.
+        :rtype: keycloak.token_manager.ClientCredentialsManager
+        """
+        return ClientCredentialsManager(openid_connect=self, **kwargs)
+
+    def token_session(self, token_response, **kwargs):
+        """
+        Get a session around the access and refresh token of a user which
+        refreshes the access token ahead of expiry.
+
+        :param dict token_response: Access token response, for example of
+            :meth:`authorization_code`.
+        :param kwargs: (optional) Options of
+            :class:`keycloak.token_manager.TokenSession`
+        :rtype: keycloak.token_manager.TokenSession
+        """
+        return TokenSession(openid_connect=self,
+                            token_response=token_response, **kwargs)
+
     def refresh_token(self, refresh_token, **kwargs):
         """
         Refresh an access token
@@ -282,11 +850,45 @@ class KeycloakOpenidConnect(WellKnownMixin):
             client wants to impersonate a different user.
         :rtype: dict
         :return: access_token, refresh_token and expires_in
+
+        When the token exchange cache is enabled, the exchanged token is
+        reused for identical exchanges until `token_exchange_margin` seconds
+        before it expires.
         """
-        return self._token_request(
-            grant_type='urn:ietf:params:oauth:grant-type:token-exchange',
-            **kwargs
-        )
+        cache_key = self._get_token_exchange_cache_key(kwargs)
+        if cache_key is None:
+            return self._token_request(grant_type=GRANT_TYPE_TOKEN_EXCHANGE,
+                                       **kwargs)
+
+        response = self._token_exchange_cache.get(cache_key)
+        if response is None:
+            response = self._token_exchange_flight.do(
+                cache_key, self._exchange_token, cache_key, kwargs
+            )
+        return dict(response)
+
+    def _exchange_token(self, cache_key, kwargs):
+        response = self._token_request(grant_type=GRANT_TYPE_TOKEN_EXCHANGE,
+                                       **kwargs)
+        self._set_cached_token_exchange(cache_key, response)
+        return response
+
+    def _get_token_exchange_cache_key(self, kwargs):
+        """
+        The key covers all parameters of the exchange (subject token,
+        audience, requested token type, requested subject, ...), the subject
+        token only ends up in it as part of the digest.
+        """
+        if self._token_exchange_cache is None:
+            return None
+        return make_key(GRANT_TYPE_TOKEN_EXCHANGE, kwargs)
+
+    def _set_cached_token_exchange(self, cache_key, response):
+        if isinstance(response, dict) and 'expires_in' in response:
+            self._token_exchange_cache.set(
+                cache_key, dict(response),
+                ttl=response['expires_in'] - self._token_exchange_margin
+            )
 
     def _token_request(self, grant_type, **kwargs):
         """
@@ -296,6 +898,18 @@ class KeycloakOpenidConnect(WellKnownMixin):
         :param kwargs: See invoking methods.
         :return:
         """
+        payload = self._get_token_payload(grant_type, kwargs)
+        if grant_type not in self._coalesce_grant_types:
+            return self._post_token_request(payload)
+
+        response = self._token_request_flight.do(
+            self._get_token_request_key(payload),
+            self._post_token_request, payload
+        )
+        # Every caller gets its own copy of the shared response.
+        return dict(response)
+
+    def _get_token_payload(self, grant_type, kwargs):
         payload = {
             'grant_type': grant_type,
             'client_id': self._client_id,
@@ -303,6 +917,17 @@ class KeycloakOpenidConnect(WellKnownMixin):
         }
 
         payload.update(**kwargs)
+        return payload
+
+    def _get_token_request_key(self, payload):
+        """
+        The order of the scopes doesn't change the requested grant.
+        """
+        scope = payload.get('scope')
+        if scope:
+            payload = dict(payload, scope=sorted(set(scope.split())))
+        return make_key(payload)
 
+    def _post_token_request(self, payload):
         return self._realm.client.post(self.get_url('token_endpoint'),
                                        data=payload)
@@ -2,6 +2,7 @@ from keycloak.admin import KeycloakAdmin
 from keycloak.authz import KeycloakAuthz
 from keycloak.client import KeycloakClient
 from keycloak.openid_connect import KeycloakOpenidConnect
+from keycloak.snapshot import DEFAULT_MAX_AGE, RealmSnapshot
 from keycloak.uma import KeycloakUMA
 from keycloak.uma1 import KeycloakUMA1
 
@@ -13,18 +14,63 @@ class KeycloakRealm(object):
 
     _headers = None
     _client = None
-
-    def __init__(self, server_url, realm_name, headers=None):
+    _snapshot = None
+    _client_options = None
+
+    def __init__(self, server_url, realm_name, headers=None,
+                 snapshot_path=None, snapshot_max_age=DEFAULT_MAX_AGE,
+                 pool_connections=None, pool_maxsize=None, pool_block=None,
+                 keep_alive=None, retry_policy=None, timeout=None,
+                 circuit_breakers=None, load_balancer=None):
         """
         :param str server_url: The base URL where the Keycloak server can be
             found
         :param str realm_name: REALM name
         :param dict headers: Optional extra headers to send with requests to
             the server
+        :param str snapshot_path: (optional) File to keep a snapshot of the
+            `.well-known` documents and JWKS of the realm in, which is used
+            on start-up instead of fetching them.
+        :param int snapshot_max_age: (optional) Number of seconds documents
+            in the snapshot may be used.
+        :param int pool_connections: (optional) See
+            :class:`keycloak.client.KeycloakClient`
+        :param int pool_maxsize: (optional) See
+            :class:`keycloak.client.KeycloakClient`
+        :param bool pool_block: (optional) See
+            :class:`keycloak.client.KeycloakClient`
+        :param int keep_alive: (optional) See
+            :class:`keycloak.client.KeycloakClient`
+        :param keycloak.retry.RetryPolicy retry_policy: (optional) See
+            :class:`keycloak.client.KeycloakClient`
+        :param timeout: (optional) See
+            :class:`keycloak.client.KeycloakClient`
+        :type timeout: float | tuple[float, float]
+        :param keycloak.circuit_breaker.CircuitBreakers circuit_breakers:
+            (optional) See :class:`keycloak.client.KeycloakClient`
+        :param keycloak.load_balancer.LoadBalancer load_balancer: (optional)
+            See :class:`keycloak.client.KeycloakClient`
         """
         self._server_url = server_url
         self._realm_name = realm_name
         self._headers = headers
+        self._client_options = dict(
+            (name, value) for name, value in (
+                ('pool_connections', pool_connections),
+                ('pool_maxsize', pool_maxsize),
+                ('pool_block', pool_block),
+                ('keep_alive', keep_alive),
+                ('retry_policy', retry_policy),
+                ('timeout', timeout),
+                ('circuit_breakers', circuit_breakers),
+                ('load_balancer', load_balancer),
+            ) if value is not None
+        )
+        if snapshot_path is not None:
+            self._snapshot = RealmSnapshot(path=snapshot_path,
+                                           server_url=server_url,
+                                           realm_name=realm_name,
+                                           max_age=snapshot_max_age)
 
     @property
     def client(self):
@@ -33,7 +79,8 @@ class KeycloakRealm(object):
         """
         if self._client is None:
             self._client = KeycloakClient(server_url=self._server_url,
-                                          headers=self._headers)
+                                          headers=self._headers,
+                                          **self._client_options)
         return self._client
 
     @property
@@ -44,20 +91,29 @@ class KeycloakRealm(object):
     def server_url(self):
         return self._server_url
 
+    @property
+    def snapshot(self):
+        """
+        :rtype: keycloak.snapshot.RealmSnapshot | None
+        """
+        return self._snapshot
+
     @property
     def admin(self):
         return KeycloakAdmin(realm=self)
 
-    def open_id_connect(self, client_id, client_secret):
+    def open_id_connect(self, client_id, client_secret, **kwargs):
         """
         Get OpenID Connect client
 
         :param str client_id:
         :param str client_secret:
+        :param kwargs: (optional) Extra options for
+            :class:`keycloak.openid_connect.KeycloakOpenidConnect`
         :rtype: keycloak.openid_connect.KeycloakOpenidConnect
         """
         return KeycloakOpenidConnect(realm=self, client_id=client_id,
-                                     client_secret=client_secret)
+                                     client_secret=client_secret, **kwargs)
 
     def authz(self, client_id):
         """
@@ -0,0 +1,102 @@
+import logging
+import threading
+
+DEFAULT_REFRESH_FRACTION = 0.8
+MIN_RETRY_INTERVAL = 1
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRefresher(object):
+    """
+    Daemon thread which fetches the JWKS, and optionally the `.well-known`
+    document, before the JWKS expires. Token verification then never has to
+    wait for a fetch.
+
+    When a fetch fails it's tried again every `refetch_interval` seconds of
+    the JWKS, meanwhile the last fetched documents are used (the JWKS only
+    within its stale window).
+    """
+
+    _jwks = None
+    _well_known = None
+    _refresh_fraction = None
+    _stopped = None
+    _thread = None
+
+    def __init__(self, jwks, well_known=None,
+                 refresh_fraction=DEFAULT_REFRESH_FRACTION):
+        """
+        :param keycloak.jwks.KeycloakJWKS jwks:
+        :param keycloak.well_known.KeycloakWellKnown well_known: (optional)
+        :param float refresh_fraction: (optional) Fraction of the TTL of the
+            JWKS after which it's fetched again.
+        """
+        self._jwks = jwks
+        self._well_known = well_known
+        self._refresh_fraction = refresh_fraction
+        self._stopped = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='keycloak-refresher')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """
+        :param float timeout: (optional) Number of seconds to wait for the
+            thread to finish.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        try:
+            # Only fetches the set when no request did yet.
+            self._jwks.get_keys()
+        except Exception:
+            logger.warning('Loading the JWKS failed', exc_info=True)
+
+        delay = self._get_delay()
+        while not self._stopped.wait(delay):
+            delay = self.refresh()
+
+    def refresh(self):
+        """
+        Fetch the documents once.
+
+        :return: Number of seconds until the next refresh.
+        :rtype: float
+        """
+        if self._well_known is not None:
+            try:
+                self._well_known.refresh()
+            except Exception:
+                logger.warning('Refreshing the .well-known failed',
+                               exc_info=True)
+
+        try:
+            fetched = self._jwks.revalidate()
+        except Exception:
+            logger.warning('Refreshing the JWKS failed', exc_info=True)
+            fetched = False
+
+        if not fetched:
+            return max(self._jwks.refetch_interval, MIN_RETRY_INTERVAL)
+        return self._get_delay()
+
+    def _get_delay(self):
+        age = self._jwks.age
+        if age is None:
+            return 0
+        return max(0, self._jwks.ttl * self._refresh_fraction - age)
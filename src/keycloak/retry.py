@@ -0,0 +1,194 @@
+import random
+import threading
+import time
+from email.utils import mktime_tz, parsedate_tz
+
+try:
+    from time import monotonic
+except ImportError:
+    from time import time as monotonic
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.2
+DEFAULT_MAX_BACKOFF = 5
+DEFAULT_MAX_TOTAL = 10
+DEFAULT_STATUS_CODES = (502, 503, 504)
+IDEMPOTENT_METHODS = frozenset(['get', 'head', 'options', 'put', 'delete'])
+
+
+class RetryPolicy(object):
+    """
+    Policy of :class:`keycloak.client.KeycloakClient` for retrying
+    idempotent requests, which includes fetching the `.well-known` and
+    JWKS, when the connection fails or the server responds with a status
+    which indicates a temporary failure, for example during a rolling
+    restart.
+
+    The delay before a retry grows exponentially with full jitter, or is
+    taken from the `Retry-After` header. No retry is done when it would
+    exceed the total time budget of the request.
+
+    The `retries` and `exhausted` counters can be used for metrics.
+    """
+
+    _max_retries = None
+    _backoff_factor = None
+    _max_backoff = None
+    _max_total = None
+    _status_codes = None
+    _methods = None
+    _respect_retry_after = None
+    _lock = None
+
+    retries = 0
+    exhausted = 0
+
+    def __init__(self, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_factor=DEFAULT_BACKOFF_FACTOR,
+                 max_backoff=DEFAULT_MAX_BACKOFF, max_total=DEFAULT_MAX_TOTAL,
+                 status_codes=DEFAULT_STATUS_CODES,
+                 methods=IDEMPOTENT_METHODS, respect_retry_after=True):
+        """
+        :param int max_retries: (optional) Maximum number of retries of a
+            request.
+        :param float backoff_factor: (optional) The delay before the n-th
+            retry is chosen randomly up to `backoff_factor * 2 ** (n - 1)`
+            seconds.
+        :param float max_backoff: (optional) Maximum number of seconds to
+            wait before a retry.
+        :param float max_total: (optional) Maximum number of seconds from
+            the first attempt until the last retry is started.
+        :param status_codes: (optional) Response statuses to retry.
+        :type status_codes: tuple[int]
+        :param methods: (optional) HTTP methods (lower case) to retry.
+        :type methods: frozenset[str]
+        :param bool respect_retry_after: (optional) Wait as long as the
+            `Retry-After` header of the response asks for.
+        """
+        self._max_retries = max_retries
+        self._backoff_factor = backoff_factor
+        self._max_backoff = max_backoff
+        self._max_total = max_total
+        self._status_codes = frozenset(status_codes)
+        self._methods = frozenset(method.lower() for method in methods)
+        self._respect_retry_after = respect_retry_after
+        self._lock = threading.Lock()
+
+    @property
+    def max_retries(self):
+        return self._max_retries
+
+    @property
+    def max_total(self):
+        return self._max_total
+
+    @property
+    def respect_retry_after(self):
+        return self._respect_retry_after
+
+    def applies_to(self, method):
+        """
+        :param str method:
+        :rtype: bool
+        """
+        return method.lower() in self._methods
+
+    def is_retryable_status(self, status):
+        """
+        :param int status:
+        :rtype: bool
+        """
+        return status in self._status_codes
+
+    def start(self, deadline=None):
+        """
+        Start retrying a single request.
+
+        :param keycloak.deadline.Deadline deadline: (optional) Deadline of
+            the operation, no retry is started after it.
+        :rtype: keycloak.retry.Retry
+        """
+        return Retry(policy=self, deadline=deadline)
+
+    def get_backoff(self, attempt):
+        """
+        :param int attempt: Number of retries done so far
+        :return: Number of seconds to wait before the next retry.
+        :rtype: float
+        """
+        return random.uniform(0, min(self._max_backoff,
+                                     self._backoff_factor * 2 ** attempt))
+
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def record_exhausted(self):
+        with self._lock:
+            self.exhausted += 1
+
+
+class Retry(object):
+    """
+    Keeps track of the retries of a single request.
+    """
+
+    _policy = None
+    _attempt = 0
+    _deadline = None
+
+    def __init__(self, policy, deadline=None):
+        """
+        :param keycloak.retry.RetryPolicy policy:
+        :param keycloak.deadline.Deadline deadline: (optional)
+        """
+        self._policy = policy
+        self._deadline = monotonic() + policy.max_total
+        if deadline is not None:
+            self._deadline = min(self._deadline, deadline.expires_at)
+
+    @property
+    def attempt(self):
+        return self._attempt
+
+    def get_delay(self, retry_after=None):
+        """
+        :param str retry_after: (optional) `Retry-After` header of the
+            response
+        :return: Number of seconds to wait before retrying or `None` when
+            the request shouldn't be retried anymore.
+        :rtype: float | None
+        """
+        policy = self._policy
+        delay = None
+        if retry_after is not None and policy.respect_retry_after:
+            delay = parse_retry_after(retry_after)
+        if delay is None:
+            delay = policy.get_backoff(self._attempt)
+
+        if self._attempt >= policy.max_retries or \
+                monotonic() + delay > self._deadline:
+            policy.record_exhausted()
+            return None
+
+        self._attempt += 1
+        policy.record_retry()
+        return delay
+
+
+def parse_retry_after(value):
+    """
+    :param str value: `Retry-After` header, either a number of seconds or a
+        HTTP date
+    :return: Number of seconds, `None` when the header is invalid.
+    :rtype: float | None
+    """
+    try:
+        return max(0, float(value))
+    except (TypeError, ValueError):
+        pass
+
+    parsed = parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(0, mktime_tz(parsed) - time.time())
@@ -0,0 +1,211 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from collections import namedtuple
+from contextlib import contextmanager
+
+from keycloak.jwks import KeycloakJWKS
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_CAPACITY = 64 * 1024
+
+MAGIC = b'KCJW'
+# magic, sequence number, fetched at, length and CRC32 of the JWKS
+HEADER = struct.Struct('<4sQdII')
+SEQUENCE = struct.Struct('<Q')
+SEQUENCE_OFFSET = 4
+READ_RETRIES = 100
+
+logger = logging.getLogger(__name__)
+
+SharedEntry = namedtuple('SharedEntry', ['sequence', 'fetched_at', 'jwks'])
+
+
+class SharedKeycloakJWKS(KeycloakJWKS):
+    """
+    JWKS cache which shares the fetched key set between the processes of a
+    host, for example the workers of a pre-fork server, through a memory
+    mapped file.
+
+    Only one process fetches the key set at a time (guarded by a lock on the
+    file) and publishes it in the file, the other processes pick it up
+    without requesting the server. Readers don't take any lock: the file is
+    guarded by a sequence number which is odd while the set gets written and
+    a checksum, so readers retry or ignore a set that changed while they
+    read it.
+
+    Key objects can't be shared between processes, they are constructed
+    once per process for every new version of the set.
+    """
+
+    _shared_path = None
+    _capacity = None
+    _fd = None
+    _mmap = None
+    _pid = None
+    _sequence = None
+    _age = 0
+
+    def __init__(self, realm, path, shared_path,
+                 capacity=DEFAULT_CAPACITY, **kwargs):
+        """
+        :param keycloak.realm.KeycloakRealm realm:
+        :param str path: URL of the JWKS (`jwks_uri`)
+        :param str shared_path: File to share the JWKS in, it's created when
+            it doesn't exist.
+        :param int capacity: (optional) Maximum size of the serialized JWKS
+            in bytes, bigger sets aren't shared.
+        :param kwargs: (optional) Options of
+            :class:`keycloak.jwks.KeycloakJWKS`
+        """
+        if fcntl is None:
+            raise RuntimeError('Sharing the JWKS requires fcntl')
+        super(SharedKeycloakJWKS, self).__init__(realm=realm, path=path,
+                                                 **kwargs)
+        self._shared_path = shared_path
+        self._capacity = capacity
+
+    def _fetch(self):
+        """
+        Take the set from the shared file when another process published a
+        set which is still valid, otherwise fetch it from the server and
+        publish it.
+        """
+        entry = self._read_valid()
+        if entry is not None:
+            return self._use(entry)
+
+        with self._locked():
+            # Another process may have fetched the set while waiting for the
+            # lock.
+            entry = self._read_valid()
+            if entry is not None:
+                return self._use(entry)
+
+            jwks = super(SharedKeycloakJWKS, self)._fetch()
+            self._age = 0
+            self._write(jwks)
+            return jwks
+
+    def _load(self, jwks):
+        super(SharedKeycloakJWKS, self)._load(jwks)
+        # A set fetched by another process expires at the same moment as in
+        # that process.
+        self._fetched_at -= self._age
+        self._expires_at -= self._age
+        self._stale_until -= self._age
+
+    def _use(self, entry):
+        self._sequence = entry.sequence
+        self._age = max(0, time.time() - entry.fetched_at)
+        return entry.jwks
+
+    def _read_valid(self):
+        """
+        :return: The shared set when it's another version than the loaded
+            set and didn't expire yet.
+        :rtype: SharedEntry | None
+        """
+        entry = self._read()
+        if entry is None or entry.sequence == self._sequence or \
+                time.time() - entry.fetched_at >= self._ttl:
+            return None
+        return entry
+
+    def _read(self):
+        """
+        :rtype: SharedEntry | None
+        """
+        buf = self._get_mmap()
+        for _ in range(READ_RETRIES):
+            sequence = SEQUENCE.unpack_from(buf, SEQUENCE_OFFSET)[0]
+            if sequence % 2:
+                # A writer is busy
+                time.sleep(0)
+                continue
+
+            magic, _, fetched_at, length, crc = HEADER.unpack_from(buf, 0)
+            if magic != MAGIC or length > len(buf) - HEADER.size:
+                return None
+            data = buf[HEADER.size:HEADER.size + length]
+
+            if SEQUENCE.unpack_from(buf, SEQUENCE_OFFSET)[0] != sequence:
+                continue
+            if zlib.crc32(data) & 0xffffffff != crc:
+                return None
+            try:
+                jwks = json.loads(data.decode('utf-8'))
+            except ValueError:
+                return None
+            return SharedEntry(sequence, fetched_at, jwks)
+        return None
+
+    def _write(self, jwks):
+        """
+        Publish the set, the caller must hold the lock on the file.
+
+        :param dict jwks:
+        """
+        data = json.dumps(jwks).encode('utf-8')
+        buf = self._get_mmap()
+        if len(data) > len(buf) - HEADER.size:
+            logger.warning('JWKS of %d bytes exceeds the capacity of %s, '
+                           'it is not shared', len(data), self._shared_path)
+            return
+
+        sequence = SEQUENCE.unpack_from(buf, SEQUENCE_OFFSET)[0]
+        SEQUENCE.pack_into(buf, SEQUENCE_OFFSET, sequence + 1)
+        buf[HEADER.size:HEADER.size + len(data)] = data
+        HEADER.pack_into(buf, 0, MAGIC, sequence + 1, time.time(),
+                         len(data), zlib.crc32(data) & 0xffffffff)
+        SEQUENCE.pack_into(buf, SEQUENCE_OFFSET, sequence + 2)
+        self._sequence = sequence + 2
+
+    @contextmanager
+    def _locked(self):
+        self._get_mmap()
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _get_mmap(self):
+        if self._mmap is not None and self._pid != os.getpid():
+            # Opened before a fork: the open file description is shared with
+            # the parent, so locks on it wouldn't exclude the parent.
+            self.close()
+        if self._mmap is None:
+            size = HEADER.size + self._capacity
+            fd = os.open(self._shared_path, os.O_RDWR | os.O_CREAT, 0o600)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                # Other processes could have created the file with another
+                # capacity, never shrink it.
+                if os.fstat(fd).st_size < size:
+                    os.ftruncate(fd, size)
+                size = os.fstat(fd).st_size
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            self._fd = fd
+            self._mmap = mmap.mmap(fd, size)
+            self._pid = os.getpid()
+        return self._mmap
+
+    def close(self):
+        """
+        Unmap the shared file.
+        """
+        if self._mmap is not None:
+            self._mmap.close()
+            os.close(self._fd)
+            self._mmap = None
+            self._fd = None
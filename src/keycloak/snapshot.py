@@ -0,0 +1,175 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+VERSION = 1
+DEFAULT_MAX_AGE = 86400
+
+logger = logging.getLogger(__name__)
+
+
+class RealmSnapshot(object):
+    """
+    On-disk snapshot of the documents a realm needs before it can serve the
+    first request: the `.well-known` documents and the JWKS. They are stored
+    by URL, so services can start with the last known copy instead of
+    fetching all of them from the server at once.
+
+    Documents older than `max_age` seconds, or stored by another version of
+    the snapshot format, another server or another realm are ignored.
+    Documents taken from the snapshot get revalidated in the background, the
+    snapshot is saved again whenever a document got fetched.
+    """
+
+    _path = None
+    _server_url = None
+    _realm_name = None
+    _max_age = None
+    _documents = None
+    _revalidating = None
+    _lock = None
+
+    def __init__(self, path, server_url, realm_name,
+                 max_age=DEFAULT_MAX_AGE):
+        """
+        :param str path: File to store the snapshot in
+        :param str server_url: The base URL of the Keycloak server
+        :param str realm_name: REALM name
+        :param int max_age: (optional) Number of seconds a document in the
+            snapshot may be used after it was fetched.
+        """
+        self._path = path
+        self._server_url = server_url
+        self._realm_name = realm_name
+        self._max_age = max_age
+        self._revalidating = set()
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return self._path
+
+    def get(self, url):
+        """
+        Get the contents of a document from the snapshot.
+
+        :param str url:
+        :return: Contents or `None` when the document isn't in the snapshot
+            or too old.
+        :rtype: dict | None
+        """
+        with self._lock:
+            document = self._get_documents().get(url)
+        if document is None or \
+                time.time() - document['fetched_at'] > self._max_age:
+            return None
+        return document['contents']
+
+    def set(self, url, contents):
+        """
+        Store a freshly fetched document and save the snapshot.
+
+        :param str url:
+        :param dict contents:
+        """
+        with self._lock:
+            self._get_documents()[url] = {
+                'fetched_at': time.time(),
+                'contents': contents
+            }
+            self._save()
+
+    def claim_revalidation(self, url):
+        """
+        Documents need to be revalidated only once per process.
+
+        :param str url:
+        :return: `True` for the first caller per document.
+        :rtype: bool
+        """
+        with self._lock:
+            if url in self._revalidating:
+                return False
+            self._revalidating.add(url)
+            return True
+
+    def revalidate(self, url, refresh):
+        """
+        Revalidate a document which was taken from the snapshot in a
+        background thread.
+
+        :param str url:
+        :param callable refresh: Fetches the document again and passes it
+            to :meth:`set`.
+        """
+        if not self.claim_revalidation(url):
+            return
+
+        def run():
+            try:
+                refresh()
+            except Exception:
+                logger.warning('Revalidation of %s failed, keep using the '
+                               'snapshot', url, exc_info=True)
+
+        thread = threading.Thread(target=run)
+        thread.daemon = True
+        thread.start()
+
+    def _get_documents(self):
+        if self._documents is None:
+            self._documents = self._load()
+        return self._documents
+
+    def _load(self):
+        try:
+            with open(self._path) as fp:
+                snapshot = json.load(fp)
+        except (IOError, OSError, ValueError):
+            return {}
+
+        if not isinstance(snapshot, dict) or \
+                snapshot.get('version') != VERSION or \
+                snapshot.get('server_url') != self._server_url or \
+                snapshot.get('realm_name') != self._realm_name:
+            logger.info('Ignoring incompatible snapshot %s', self._path)
+            return {}
+
+        documents = snapshot.get('documents')
+        if not isinstance(documents, dict):
+            return {}
+
+        now = time.time()
+        return dict(
+            (url, document) for url, document in documents.items()
+            if isinstance(document, dict) and 'contents' in document and
+            now - document.get('fetched_at', 0) <= self._max_age
+        )
+
+    def _save(self):
+        """
+        Write the snapshot to a temporary file which then replaces the
+        snapshot, so other processes never read a partial snapshot.
+        """
+        snapshot = {
+            'version': VERSION,
+            'server_url': self._server_url,
+            'realm_name': self._realm_name,
+            'documents': self._documents
+        }
+        directory = os.path.dirname(os.path.abspath(self._path))
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory,
+                                            prefix='.keycloak-snapshot-')
+            with os.fdopen(fd, 'w') as fp:
+                json.dump(snapshot, fp)
+            getattr(os, 'replace', os.rename)(tmp_path, self._path)
+        except (IOError, OSError):
+            logger.warning('Could not save snapshot %s', self._path,
+                           exc_info=True)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
@@ -0,0 +1,499 @@
+import logging
+import threading
+import time
+
+from keycloak.cache import make_key
+from keycloak.exceptions import KeycloakClientError, KeycloakSessionExpired
+
+DEFAULT_REFRESH_FRACTION = 0.8
+DEFAULT_LEEWAY = 10
+DEFAULT_RETRY_INTERVAL = 5
+
+logger = logging.getLogger(__name__)
+
+
+class Token(object):
+    """
+    Token response of the token endpoint together with the moment it was
+    obtained.
+    """
+
+    _response = None
+    _obtained_at = None
+
+    def __init__(self, response, obtained_at=None):
+        """
+        :param dict response: Access token response
+        :param float obtained_at: (optional) Timestamp the response was
+            received, defaults to now.
+        """
+        self._response = response
+        self._obtained_at = time.time() if obtained_at is None \
+            else obtained_at
+
+    @property
+    def response(self):
+        return self._response
+
+    @property
+    def obtained_at(self):
+        return self._obtained_at
+
+    @property
+    def access_token(self):
+        return self._response['access_token']
+
+    @property
+    def expires_at(self):
+        return self._obtained_at + self._response.get('expires_in', 0)
+
+    @property
+    def refresh_token(self):
+        return self._response.get('refresh_token')
+
+    @property
+    def refresh_expires_at(self):
+        """
+        :return: Timestamp the refresh token expires, `None` when it doesn't
+            expire (offline tokens).
+        :rtype: float | None
+        """
+        refresh_expires_in = self._response.get('refresh_expires_in')
+        if not refresh_expires_in:
+            return None
+        return self._obtained_at + refresh_expires_in
+
+    def refresh_at(self, fraction):
+        """
+        :param float fraction: Fraction of the lifetime of the access token
+        :return: Timestamp after which the token should be refreshed.
+        :rtype: float
+        """
+        return self._obtained_at + \
+            fraction * self._response.get('expires_in', 0)
+
+    def expired(self, leeway=0):
+        """
+        :param int leeway: Number of seconds the token is considered expired
+            before it actually expires, at most half of its lifetime so a
+            short-lived token is still used.
+        :rtype: bool
+        """
+        leeway = min(leeway, self._response.get('expires_in', 0) / 2.0)
+        return time.time() >= self.expires_at - leeway
+
+    def refresh_expired(self, leeway=0):
+        """
+        :param int leeway: Number of seconds the refresh token is considered
+            expired before it actually expires.
+        :return: Whether the token can't be refreshed anymore.
+        :rtype: bool
+        """
+        if self.refresh_token is None:
+            return True
+        refresh_expires_at = self.refresh_expires_at
+        return refresh_expires_at is not None and \
+            time.time() >= refresh_expires_at - leeway
+
+
+class TokenManager(object):
+    """
+    Base class of the managers which keep a token and refresh it ahead of
+    expiry.
+
+    A token is only obtained when there is no valid token. Once a fraction
+    of its lifetime (`refresh_fraction`) passed, the token is refreshed in a
+    background thread while callers keep getting the current token. Only one
+    request to the token endpoint is in flight at a time, concurrent callers
+    share its result.
+    """
+
+    _openid_connect = None
+    _refresh_fraction = None
+    _leeway = None
+    _retry_interval = None
+    _token = None
+    _retry_at = 0
+    _lock = None
+    _refreshing = None
+
+    def __init__(self, openid_connect,
+                 refresh_fraction=DEFAULT_REFRESH_FRACTION,
+                 leeway=DEFAULT_LEEWAY,
+                 retry_interval=DEFAULT_RETRY_INTERVAL):
+        """
+        :param keycloak.openid_connect.KeycloakOpenidConnect openid_connect:
+        :param float refresh_fraction: (optional) Fraction of the lifetime of
+            the access token after which it's refreshed in the background.
+        :param int leeway: (optional) Number of seconds before its expiry a
+            token isn't handed out anymore.
+        :param int retry_interval: (optional) Number of seconds to wait
+            before a failed background refresh is tried again.
+        """
+        self._openid_connect = openid_connect
+        self._refresh_fraction = refresh_fraction
+        self._leeway = leeway
+        self._retry_interval = retry_interval
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+
+    @property
+    def token(self):
+        """
+        Current token, without requesting one.
+
+        :rtype: keycloak.token_manager.Token | None
+        """
+        return self._token
+
+    def get_token(self):
+        """
+        Get a valid access token.
+
+        :rtype: str
+        """
+        return self.get_token_response()['access_token']
+
+    def get_token_response(self):
+        """
+        Get a valid access token response.
+
+        :rtype: dict
+        """
+        token = self._token
+        if token is None or token.expired(self._leeway):
+            with self._lock:
+                token = self._token
+                if token is None or token.expired(self._leeway):
+                    token = self._obtain_token()
+                    self._set_token(token)
+        elif self._is_due(token):
+            self._refresh_in_background()
+        return token.response
+
+    def invalidate(self):
+        """
+        Drop the current token, for example when it got rejected.
+        """
+        with self._lock:
+            self._token = None
+
+    def _obtain_token(self):
+        """
+        :rtype: keycloak.token_manager.Token
+        """
+        raise NotImplementedError()
+
+    def _set_token(self, token):
+        self._token = token
+
+    def _refresh_in_background(self):
+        if time.time() < self._retry_at or \
+                not self._refreshing.acquire(False):
+            return
+
+        thread = threading.Thread(target=self._refresh)
+        thread.daemon = True
+        try:
+            thread.start()
+        except Exception:
+            self._refreshing.release()
+            raise
+
+    def _is_due(self, token):
+        """
+        :return: Whether the token has to be refreshed.
+        :rtype: bool
+        """
+        return token is None or token.expired(self._leeway) or \
+            time.time() >= token.refresh_at(self._refresh_fraction)
+
+    def _refresh(self):
+        try:
+            with self._lock:
+                # A caller could have replaced the token meanwhile.
+                if self._is_due(self._token):
+                    self._set_token(self._obtain_token())
+        except Exception:
+            logger.warning('Refreshing the access token failed, retrying in '
+                           '%s seconds', self._retry_interval, exc_info=True)
+            self._retry_at = time.time() + self._retry_interval
+        finally:
+            self._refreshing.release()
+
+
+class ClientCredentialsManager(TokenManager):
+    """
+    Keeps the access token of the `client_credentials` grant of a client and
+    refreshes it ahead of expiry, see
+    :class:`keycloak.token_manager.TokenManager`.
+    """
+
+    _kwargs = None
+    _store = None
+    _store_key = None
+
+    def __init__(self, openid_connect,
+                 refresh_fraction=DEFAULT_REFRESH_FRACTION,
+                 leeway=DEFAULT_LEEWAY,
+                 retry_interval=DEFAULT_RETRY_INTERVAL, store=None,
+                 **kwargs):
+        """
+        :param keycloak.openid_connect.KeycloakOpenidConnect openid_connect:
+        :param float refresh_fraction: (optional) Fraction of the lifetime of
+            the access token after which it's refreshed in the background.
+        :param int leeway: (optional) Number of seconds before its expiry a
+            token isn't handed out anymore.
+        :param int retry_interval: (optional) Number of seconds to wait
+            before a failed background refresh is tried again.
+        :param keycloak.token_store.TokenStore store: (optional) Store to
+            share the token with the other processes of the host which use
+            the same client and grant parameters.
+        :param kwargs: (optional) Extra parameters of the grant, for example
+            `scope`.
+        """
+        super(ClientCredentialsManager, self).__init__(
+            openid_connect=openid_connect,
+            refresh_fraction=refresh_fraction,
+            leeway=leeway,
+            retry_interval=retry_interval
+        )
+        self._kwargs = kwargs
+        self._store = store
+
+    def _obtain_token(self):
+        if self._store is None:
+            return self._request_token()
+
+        key = self._get_store_key()
+        token = self._get_stored_token(key)
+        if token is not None:
+            return token
+
+        with self._store.lock(key):
+            # Another process could have requested a token meanwhile.
+            token = self._get_stored_token(key)
+            if token is None:
+                token = self._request_token()
+                self._store.set(key, token)
+        return token
+
+    def _request_token(self):
+        return Token(self._openid_connect.client_credentials(**self._kwargs))
+
+    def _get_store_key(self):
+        if self._store_key is None:
+            self._store_key = make_key(
+                self._openid_connect.get_url('token_endpoint'),
+                self._openid_connect.client_id,
+                self._kwargs
+            )
+        return self._store_key
+
+    def _get_stored_token(self, key):
+        """
+        :return: The stored token when it doesn't need to be refreshed yet.
+        :rtype: keycloak.token_manager.Token | None
+        """
+        token = self._store.get(key)
+        if self._is_due(token):
+            return None
+        return token
+
+
+class TokenSession(TokenManager):
+    """
+    Session of a user around the access and refresh token obtained with for
+    example the `authorization_code` or `password` grant.
+
+    The access token is refreshed with the refresh token ahead of expiry,
+    concurrent refreshes of the same session are coalesced. When the
+    refresh token got rotated the new refresh token is used from then on,
+    `on_refresh` is called with the new token so it can be stored with the
+    session.
+    """
+
+    _on_refresh = None
+
+    def __init__(self, openid_connect, token_response, obtained_at=None,
+                 on_refresh=None, **kwargs):
+        """
+        :param keycloak.openid_connect.KeycloakOpenidConnect openid_connect:
+        :param dict token_response: Access token response
+        :param float obtained_at: (optional) Timestamp the response was
+            received, defaults to now.
+        :param callable on_refresh: (optional) Called with the new
+            :class:`keycloak.token_manager.Token` after each refresh.
+        :param kwargs: (optional) Options of
+            :class:`keycloak.token_manager.TokenManager`
+        """
+        super(TokenSession, self).__init__(openid_connect=openid_connect,
+                                           **kwargs)
+        self._token = Token(token_response, obtained_at=obtained_at)
+        self._on_refresh = on_refresh
+
+    @property
+    def expired(self):
+        """
+        :return: Whether the session can't be refreshed anymore.
+        :rtype: bool
+        """
+        token = self._token
+        return token is None or (
+            token.expired(self._leeway) and
+            token.refresh_expired(self._leeway)
+        )
+
+    def _obtain_token(self):
+        token = self._token
+        if token is None or token.refresh_expired(self._leeway):
+            raise KeycloakSessionExpired()
+        try:
+            return refresh(self._openid_connect, token)
+        except KeycloakClientError as err:
+            if is_invalid_grant(err):
+                # The refresh token got revoked or was already used.
+                raise KeycloakSessionExpired()
+            raise
+
+    def _set_token(self, token):
+        super(TokenSession, self)._set_token(token)
+        if self._on_refresh is not None:
+            self._on_refresh(token)
+
+
+class CachedTokenProvider(ClientCredentialsManager):
+    """
+    Token provider for :meth:`keycloak.admin.KeycloakAdmin.set_token` which
+    keeps the access and refresh token, so not every admin request needs a
+    request to the token endpoint.
+
+    The access token is refreshed with the refresh token ahead of expiry,
+    see :class:`keycloak.token_manager.TokenManager`. Only when the refresh
+    token expired too, or refreshing fails, the token is requested again
+    with the `password` grant when a username is given or else the
+    `client_credentials` grant.
+
+    .. code-block:: python
+
+        admin = realm.admin.set_token(CachedTokenProvider(
+            openid_connect=realm.open_id_connect('admin-cli', None),
+            username='admin', password='secret'
+        ))
+    """
+
+    _username = None
+    _password = None
+
+    def __init__(self, openid_connect, username=None, password=None,
+                 refresh_fraction=DEFAULT_REFRESH_FRACTION,
+                 leeway=DEFAULT_LEEWAY,
+                 retry_interval=DEFAULT_RETRY_INTERVAL, store=None,
+                 **kwargs):
+        """
+        :param keycloak.openid_connect.KeycloakOpenidConnect openid_connect:
+        :param str username: (optional) User to authenticate as, the client
+            authenticates itself when omitted.
+        :param str password: (optional)
+        :param float refresh_fraction: (optional) Fraction of the lifetime of
+            the access token after which it's refreshed in the background.
+        :param int leeway: (optional) Number of seconds before their expiry
+            tokens aren't used anymore.
+        :param int retry_interval: (optional) Number of seconds to wait
+            before a failed background refresh is tried again.
+        :param keycloak.token_store.TokenStore store: (optional) Store to
+            share the tokens with the other processes of the host which use
+            the same client, user and grant parameters.
+        :param kwargs: (optional) Extra parameters of the grant, for example
+            `scope`.
+        """
+        super(CachedTokenProvider, self).__init__(
+            openid_connect=openid_connect,
+            refresh_fraction=refresh_fraction,
+            leeway=leeway,
+            retry_interval=retry_interval,
+            store=store,
+            **kwargs
+        )
+        self._username = username
+        self._password = password
+
+    def __call__(self):
+        """
+        :return: A valid access token
+        :rtype: str
+        """
+        return self.get_token()
+
+    def _request_token(self):
+        token = self._token
+        if token is not None and not token.refresh_expired(self._leeway):
+            try:
+                return refresh(self._openid_connect, token, **self._kwargs)
+            except KeycloakClientError:
+                logger.warning('Refreshing the access token failed, '
+                               'requesting a new one', exc_info=True)
+
+        if self._username is None:
+            return super(CachedTokenProvider, self)._request_token()
+        return Token(self._openid_connect.password_credentials(
+            username=self._username, password=self._password, **self._kwargs
+        ))
+
+    def _get_store_key(self):
+        if self._store_key is None:
+            self._store_key = make_key(
+                self._openid_connect.get_url('token_endpoint'),
+                self._openid_connect.client_id,
+                self._username,
+                self._kwargs
+            )
+        return self._store_key
+
+
+def is_invalid_grant(err):
+    """
+    The token endpoint responds with status 400 when a grant is rejected,
+    for example an expired or revoked refresh token.
+
+    :param keycloak.exceptions.KeycloakClientError err: Error of the sync
+        or the asyncio client
+    :rtype: bool
+    """
+    response = getattr(err.original_exc, 'response', None)
+    if response is not None:
+        return getattr(response, 'status_code', None) == 400
+    # aiohttp.ClientResponseError has the status of the response itself.
+    return getattr(err.original_exc, 'status', None) == 400
+
+
+def refresh(openid_connect, token, **kwargs):
+    """
+    Refresh a token. When the token endpoint doesn't return a new refresh
+    token, the current refresh token stays valid.
+
+    :param keycloak.openid_connect.KeycloakOpenidConnect openid_connect:
+    :param keycloak.token_manager.Token token:
+    :param kwargs: (optional) Extra parameters of the grant
+    :rtype: keycloak.token_manager.Token
+    """
+    obtained_at = time.time()
+    response = openid_connect.refresh_token(
+        refresh_token=token.refresh_token, **kwargs
+    )
+    return get_refreshed_token(token, response, obtained_at)
+
+
+def get_refreshed_token(token, response, obtained_at):
+    """
+    :param keycloak.token_manager.Token token: The refreshed token
+    :param dict response: Response of the refresh
+    :param float obtained_at: Timestamp the refresh was requested
+    :rtype: keycloak.token_manager.Token
+    """
+    if 'refresh_token' not in response:
+        response = dict(response, refresh_token=token.refresh_token)
+        refresh_expires_at = token.refresh_expires_at
+        if refresh_expires_at is not None:
+            response['refresh_expires_in'] = refresh_expires_at - obtained_at
+    return Token(response, obtained_at=obtained_at)
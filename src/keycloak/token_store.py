@@ -0,0 +1,196 @@
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+from keycloak.token_manager import Token
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class TokenStore(object):
+    """
+    Base class of the stores which share tokens between the processes of a
+    host, for example the workers of a pre-fork server and cron jobs, see
+    the `store` option of
+    :class:`keycloak.token_manager.ClientCredentialsManager`.
+
+    Besides storing the tokens by key, the store provides a lock per key
+    (a lock on a file) so only one process requests a new token at a time.
+    """
+
+    def get(self, key):
+        """
+        :param str key:
+        :return: The stored token or `None`
+        :rtype: keycloak.token_manager.Token | None
+        """
+        raise NotImplementedError()
+
+    def set(self, key, token):
+        """
+        :param str key:
+        :param keycloak.token_manager.Token token:
+        """
+        raise NotImplementedError()
+
+    def _get_lock_path(self, key):
+        raise NotImplementedError()
+
+    @contextmanager
+    def lock(self, key):
+        """
+        Exclusive lock of a key across processes.
+
+        :param str key:
+        """
+        fd = os.open(self._get_lock_path(key), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            # Closing the file releases the lock.
+            os.close(fd)
+
+
+class FileTokenStore(TokenStore):
+    """
+    Stores every token in its own JSON file in a directory. Files are
+    replaced atomically, so other processes never read a partial token.
+    """
+
+    _directory = None
+
+    def __init__(self, directory):
+        """
+        :param str directory: Directory to store the tokens in, it's created
+            when it doesn't exist.
+        """
+        if fcntl is None:
+            raise RuntimeError('Sharing tokens requires fcntl')
+        self._directory = directory
+
+    def get(self, key):
+        try:
+            with open(self._get_path(key)) as fp:
+                entry = json.load(fp)
+            return Token(entry['response'], obtained_at=entry['obtained_at'])
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def set(self, key, token):
+        self._ensure_directory()
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self._directory,
+                                            prefix='.keycloak-token-')
+            with os.fdopen(fd, 'w') as fp:
+                json.dump({'response': token.response,
+                           'obtained_at': token.obtained_at}, fp)
+            getattr(os, 'replace', os.rename)(tmp_path, self._get_path(key))
+        except (IOError, OSError):
+            logger.warning('Could not store token in %s', self._directory,
+                           exc_info=True)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+
+    @contextmanager
+    def lock(self, key):
+        self._ensure_directory()
+        with super(FileTokenStore, self).lock(key):
+            yield
+
+    def _get_path(self, key):
+        return os.path.join(self._directory, '{}.json'.format(key))
+
+    def _get_lock_path(self, key):
+        return os.path.join(self._directory, '{}.lock'.format(key))
+
+    def _ensure_directory(self):
+        try:
+            os.makedirs(self._directory, 0o700)
+        except OSError:
+            if not os.path.isdir(self._directory):
+                raise
+
+
+class SQLiteTokenStore(TokenStore):
+    """
+    Stores the tokens in a SQLite database. The requests for new tokens are
+    still serialized with a lock file next to the database, SQLite doesn't
+    hold locks across the request to the token endpoint.
+    """
+
+    _path = None
+    _timeout = None
+    _initialized = False
+
+    def __init__(self, path, timeout=5):
+        """
+        :param str path: Database file, it's created when it doesn't exist.
+        :param float timeout: (optional) Number of seconds to wait for the
+            database when another process writes to it.
+        """
+        if fcntl is None:
+            raise RuntimeError('Sharing tokens requires fcntl')
+        self._path = path
+        self._timeout = timeout
+
+    def get(self, key):
+        try:
+            with self._connect() as connection:
+                row = connection.execute(
+                    'SELECT response, obtained_at FROM tokens WHERE key = ?',
+                    (key,)
+                ).fetchone()
+        except sqlite3.Error:
+            logger.warning('Could not read token from %s', self._path,
+                           exc_info=True)
+            return None
+        if row is None:
+            return None
+        try:
+            return Token(json.loads(row[0]), obtained_at=row[1])
+        except ValueError:
+            return None
+
+    def set(self, key, token):
+        try:
+            with self._connect() as connection:
+                connection.execute(
+                    'INSERT OR REPLACE INTO tokens (key, response, '
+                    'obtained_at) VALUES (?, ?, ?)',
+                    (key, json.dumps(token.response), token.obtained_at)
+                )
+        except sqlite3.Error:
+            logger.warning('Could not store token in %s', self._path,
+                           exc_info=True)
+
+    def _get_lock_path(self, key):
+        return '{}.lock'.format(self._path)
+
+    @contextmanager
+    def _connect(self):
+        if not self._initialized:
+            # Tokens are secrets, don't create the database world readable.
+            os.close(os.open(self._path, os.O_RDWR | os.O_CREAT, 0o600))
+        connection = sqlite3.connect(self._path, timeout=self._timeout)
+        try:
+            with connection:
+                if not self._initialized:
+                    connection.execute(
+                        'CREATE TABLE IF NOT EXISTS tokens (key TEXT PRIMARY '
+                        'KEY, response TEXT NOT NULL, obtained_at REAL NOT '
+                        'NULL)'
+                    )
+                    self._initialized = True
+                yield connection
+        finally:
+            connection.close()
@@ -24,13 +24,27 @@ class KeycloakWellKnown(Mapping):
     @property
     def contents(self):
         if self._contents is None:
-            self._contents = self._realm.client.get(self._path)
+            snapshot = self._realm.snapshot
+            if snapshot is not None:
+                self._contents = snapshot.get(self._path)
+                if self._contents is not None:
+                    snapshot.revalidate(self._path, self.refresh)
+            if self._contents is None:
+                self.refresh()
         return self._contents
 
     @contents.setter
     def contents(self, content):
         self._contents = content
 
+    def refresh(self):
+        """
+        Fetch the document from the server.
+        """
+        self._contents = self._realm.client.get(self._path)
+        if self._realm.snapshot is not None:
+            self._realm.snapshot.set(self._path, self._contents)
+
     def __getitem__(self, key):
         return self.contents[key]
 
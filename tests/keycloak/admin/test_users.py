@@ -3,6 +3,7 @@ from unittest import TestCase
 import mock
 
 from keycloak.admin import KeycloakAdmin
+from keycloak.deadline import Deadline
 from keycloak.realm import KeycloakRealm
 
 
@@ -117,6 +118,24 @@ class KeycloakAdminUsersTestCase(TestCase):
             }
         )
 
+    def test_update_deadline(self):
+        """
+        Case: A user is updated with a deadline
+        Expected: The deadline is passed to the requests fetching the user,
+                  updating it and fetching it again
+        """
+        self.realm.client.get.return_value = {'id': 'user-id'}
+        deadline = Deadline(10)
+
+        user = self.admin.realms.by_name('realm-name').users.by_id("user-id")
+        user.update(email='my-email', deadline=deadline)
+
+        self.assertEqual(self.realm.client.get.call_count, 2)
+        for call in self.realm.client.get.call_args_list:
+            self.assertIs(call[1]['deadline'], deadline)
+        self.assertIs(self.realm.client.put.call_args[1]['deadline'],
+                      deadline)
+
     @mock.patch('keycloak.admin.users.User.user', {"id": "user-id"})
     def test_delete(self):
         user = self.admin.realms.by_name('realm-name').users.by_id("user-id")
@@ -6,6 +6,11 @@ except ImportError:
     aiohttp = None
 else:
     from keycloak.aio.client import KeycloakClient
+    from keycloak.circuit_breaker import CircuitBreakers
+    from keycloak.deadline import Deadline
+    from keycloak.exceptions import KeycloakCircuitOpen
+    from keycloak.load_balancer import LoadBalancer
+    from keycloak.retry import RetryPolicy
 
 
 @asynctest.skipIf(aiohttp is None, 'aiohttp is not installed')
@@ -106,6 +111,8 @@ class KeycloakClientTestCase(asynctest.TestCase):
 
         self.Session_mock.return_value.post.assert_called_once_with(
             'https://example.com/test',
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=5,
+                                          sock_read=30),
             data={'some': 'data'},
             headers={'some': 'header'},
             params={'extra': 'param'}
@@ -130,6 +137,8 @@ class KeycloakClientTestCase(asynctest.TestCase):
 
         self.Session_mock.return_value.get.assert_called_once_with(
             'https://example.com/test',
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=5,
+                                          sock_read=30),
             headers={'some': 'header'},
             params={'extra': 'param'}
         )
@@ -154,6 +163,8 @@ class KeycloakClientTestCase(asynctest.TestCase):
 
         self.Session_mock.return_value.put.assert_called_once_with(
             'https://example.com/test',
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=5,
+                                          sock_read=30),
             data={'some': 'data'},
             headers={'some': 'header'},
             params={'extra': 'param'}
@@ -178,6 +189,8 @@ class KeycloakClientTestCase(asynctest.TestCase):
 
         self.Session_mock.return_value.delete.assert_called_once_with(
             'https://example.com/test',
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=5,
+                                          sock_read=30),
             headers={'some': 'header'},
             extra='param'
         )
@@ -207,3 +220,138 @@ class KeycloakClientTestCase(asynctest.TestCase):
         processed_response = await self.client._handle_response(req_ctx)
 
         self.assertEqual(processed_response, await response.read())
+
+    async def test_retry(self):
+        """
+        Case: A GET request fails with a temporary failure and a connection
+              error
+        Expected: It's retried until it succeeds
+        """
+        await self.client.close()
+        policy = RetryPolicy(backoff_factor=0.01)
+        self.client = await KeycloakClient(
+            server_url=self.server_url,
+            headers=self.headers,
+            session_factory=self.Session_mock,
+            loop=self.loop,
+            retry_policy=policy
+        )
+        responses = [
+            asynctest.MagicMock(status=503, headers={'Retry-After': '0'}),
+            aiohttp.ClientConnectionError(),
+            asynctest.MagicMock(status=200, headers={}),
+        ]
+        self.Session_mock.return_value.get = asynctest.CoroutineMock(
+            side_effect=responses
+        )
+        self.client._handle_response = asynctest.CoroutineMock()
+
+        response = await self.client.get('https://example.com/certs')
+
+        self.client._handle_response.assert_awaited_once_with(responses[2])
+        self.assertEqual(response, self.client._handle_response.return_value)
+        responses[0].release.assert_called_once_with()
+        self.assertEqual(policy.retries, 2)
+
+    async def test_circuit_breaker(self):
+        """
+        Case: The admin API responds with server errors
+        Expected: Its circuit opens and requests to it fail fast
+        """
+        await self.client.close()
+        self.client = await KeycloakClient(
+            server_url=self.server_url,
+            headers=self.headers,
+            session_factory=self.Session_mock,
+            loop=self.loop,
+            circuit_breakers=CircuitBreakers(failure_threshold=1)
+        )
+        response = asynctest.MagicMock(status=500)
+        self.Session_mock.return_value.get = asynctest.CoroutineMock(
+            return_value=response
+        )
+        self.client._handle_response = asynctest.CoroutineMock()
+        url = 'https://example.com/auth/admin/realms/my-realm/users'
+
+        await self.client.get(url)
+        self.client._handle_response.assert_awaited_once_with(response)
+
+        with self.assertRaises(KeycloakCircuitOpen):
+            await self.client.get(url)
+        self.assertEqual(
+            self.Session_mock.return_value.get.await_count, 1
+        )
+
+    async def test_load_balancer(self):
+        """
+        Case: A request is done with a load balancer of which one node
+              fails
+        Expected: The request is retried on the other node, the failing node
+                  is ejected
+        """
+        await self.client.close()
+        balancer = LoadBalancer(['http://node-1:8080/', 'http://node-2:8080'],
+                                failure_threshold=1, probe_interval=60)
+        self.addCleanup(balancer.stop)
+        self.client = await KeycloakClient(
+            server_url=self.server_url,
+            headers=self.headers,
+            session_factory=self.Session_mock,
+            loop=self.loop,
+            retry_policy=RetryPolicy(backoff_factor=0),
+            load_balancer=balancer
+        )
+        responses = [
+            aiohttp.ClientConnectionError(),
+            asynctest.MagicMock(status=200, headers={}),
+        ]
+        self.Session_mock.return_value.get = asynctest.CoroutineMock(
+            side_effect=responses
+        )
+        self.client._handle_response = asynctest.CoroutineMock()
+
+        await self.client.get('https://example.com/realms/test')
+
+        self.client._handle_response.assert_awaited_once_with(responses[1])
+        urls = [call[0][0] for call in
+                self.Session_mock.return_value.get.call_args_list]
+        self.assertEqual(sorted(urls), ['http://node-1:8080/realms/test',
+                                        'http://node-2:8080/realms/test'])
+        self.assertEqual([node.ejected for node in balancer.nodes
+                          if node.url + '/realms/test' == urls[0]], [True])
+
+    async def test_probe(self):
+        """
+        Case: The load balancer probes a node from its thread
+        Expected: The probe is done with the session of the client in its
+                  event loop
+        """
+        response = asynctest.MagicMock(status=200)
+        self.Session_mock.return_value.get.return_value.__aenter__ \
+            .return_value = response
+
+        status = await self.loop.run_in_executor(
+            None, self.client._probe,
+            'http://node-1:8080/auth/realms/master', 2
+        )
+
+        self.assertEqual(status, 200)
+        self.Session_mock.return_value.get.assert_called_once_with(
+            'http://node-1:8080/auth/realms/master',
+            timeout=aiohttp.ClientTimeout(total=2)
+        )
+
+    async def test_deadline(self):
+        """
+        Case: A request is done with a deadline
+        Expected: The deadline limits the request as a whole
+        """
+        self.client._handle_response = asynctest.CoroutineMock()
+
+        await self.client.get('https://example.com/test',
+                              deadline=Deadline(2))
+
+        timeout = self.Session_mock.return_value.get.call_args[1]['timeout']
+        self.assertLessEqual(timeout.total, 2)
+        self.assertLessEqual(timeout.sock_connect, 2)
+        self.assertLessEqual(timeout.sock_read, 2)
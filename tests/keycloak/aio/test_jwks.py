@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+
+import asynctest
+
+try:
+    import aiohttp  # noqa: F401
+except ImportError:
+    aiohttp = None
+else:
+    from jose.backends.base import Key
+
+    from keycloak.aio.client import KeycloakClient
+    from keycloak.aio.jwks import KeycloakJWKS
+    from keycloak.aio.realm import KeycloakRealm
+    from keycloak.snapshot import RealmSnapshot
+    from tests.keycloak.keys import generate_key
+
+    KEYS = dict(
+        (kid, generate_key(kid)[1]) for kid in ('key-1', 'key-2')
+    )
+
+
+@asynctest.skipIf(aiohttp is None, 'aiohttp is not installed')
+class KeycloakJWKSTestCase(asynctest.TestCase):
+    async def setUp(self):
+        self.realm = asynctest.MagicMock(spec_set=KeycloakRealm)
+        self.realm.snapshot = None
+        self.realm.client = asynctest.MagicMock(spec_set=KeycloakClient)
+        self.realm.client.get = asynctest.CoroutineMock(
+            return_value={'keys': [KEYS['key-1']]}
+        )
+        self.jwks = KeycloakJWKS(realm=self.realm, path='https://certs',
+                                 refetch_interval=0)
+
+    def test_uninitialized(self):
+        with self.assertRaises(RuntimeError):
+            self.jwks['key-1']
+
+    async def test_get_key(self):
+        """
+        Case: A key is requested by kid
+        Expected: The JWKS get fetched once and the key object is returned
+        """
+        key = await self.jwks.get_key('key-1')
+
+        self.assertIsInstance(key, Key)
+        self.assertIs(key, await self.jwks.get_key('key-1'))
+        self.assertEqual(await self.jwks.get_keys(), [key])
+        self.assertEqual(self.jwks['key-1'], KEYS['key-1'])
+        self.realm.client.get.assert_awaited_once_with('https://certs')
+
+    async def test_get_key_unknown_kid(self):
+        """
+        Case: A key is requested for an unknown kid
+        Expected: The JWKS get fetched again once, the kid is remembered as
+                  missing
+        """
+        await self.jwks
+
+        with self.assertRaises(KeyError):
+            await self.jwks.get_key('key-2')
+        with self.assertRaises(KeyError):
+            await self.jwks.get_key('key-2')
+        self.assertEqual(self.realm.client.get.await_count, 2)
+
+        self.realm.client.get.return_value = {'keys': [KEYS['key-2']]}
+        await self.jwks.refresh()
+        self.assertIsInstance(await self.jwks.get_key('key-2'),
+                              Key)
+
+    async def test_snapshot(self):
+        """
+        Case: The JWKS is loaded from the snapshot
+        Expected: The keys are usable right away, the JWKS is revalidated in
+                  a background task which updates the snapshot
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.realm.snapshot = RealmSnapshot(
+            path=os.path.join(directory, 'snapshot.json'),
+            server_url='https://example.com',
+            realm_name='some-realm'
+        )
+        self.realm.snapshot.set('https://certs', {'keys': [KEYS['key-2']]})
+
+        await self.jwks
+        self.assertEqual(sorted(self.jwks), ['key-2'])
+        self.realm.client.get.assert_not_awaited()
+
+        await self.jwks._revalidation
+        self.assertEqual(sorted(self.jwks), ['key-1'])
+        self.assertEqual(self.realm.snapshot.get('https://certs'),
+                         {'keys': [KEYS['key-1']]})
+        await self.jwks.close()
+
+    async def test_stale(self):
+        """
+        Case: The JWKS expired and fetching it again fails
+        Expected: The stale set is used within the stale window
+        """
+        self.jwks = KeycloakJWKS(realm=self.realm, path='https://certs',
+                                 ttl=0, stale_ttl=60)
+        await self.jwks
+        self.realm.client.get.side_effect = IOError('unreachable')
+
+        self.assertFalse(await self.jwks.revalidate())
+        self.assertIsInstance(await self.jwks.get_key('key-1'),
+                              Key)
+        self.assertEqual(self.realm.client.get.await_count, 2)
@@ -1,4 +1,7 @@
+import asyncio
+
 import asynctest
+from jose.exceptions import ExpiredSignatureError, JWTError
 
 try:
     import aiohttp  # noqa: F401
@@ -9,12 +12,16 @@ else:
     from keycloak.aio.openid_connect import KeycloakOpenidConnect
     from keycloak.aio.realm import KeycloakRealm
     from keycloak.aio.well_known import KeycloakWellKnown
+    from tests.keycloak.keys import generate_key, sign
+
+    PEM, PUBLIC_JWK = generate_key('key-1')
 
 
 @asynctest.skipIf(aiohttp is None, 'aiohttp is not installed')
 class KeycloakOpenidConnectTestCase(asynctest.TestCase):
     async def setUp(self):
         self.realm = asynctest.MagicMock(spec_set=KeycloakRealm)
+        self.realm.snapshot = None
         self.realm.client = asynctest.MagicMock(spec_set=KeycloakClient)
         self.realm.client.get = asynctest.CoroutineMock()
         self.realm.client.post = asynctest.CoroutineMock()
@@ -34,7 +41,8 @@ class KeycloakOpenidConnectTestCase(asynctest.TestCase):
             'jwks_uri': 'https://certs',
             'userinfo_endpoint': 'https://userinfo',
             'authorization_endpoint': 'https://authorization',
-            'token_endpoint': 'https://token'
+            'token_endpoint': 'https://token',
+            'introspection_endpoint': 'https://introspect'
         }
 
     async def tearDown(self):
@@ -54,6 +62,71 @@ class KeycloakOpenidConnectTestCase(asynctest.TestCase):
         self.assertIsInstance(well_known, KeycloakWellKnown)
         self.assertEqual(well_known, self.openid_client.well_known)
 
+    async def test_decode_token(self):
+        """
+        Case: A token get decoded without passing a key
+        Expected: The JWKS get fetched asynchronous and the signature get
+                  verified in the executor
+        """
+        self.realm.client.get.return_value = {'keys': [PUBLIC_JWK]}
+        token = sign({'sub': 'user', 'aud': self.client_id}, PEM, 'key-1')
+
+        with asynctest.patch.object(self.loop, 'run_in_executor',
+                                    wraps=self.loop.run_in_executor) as \
+                run_in_executor:
+            claims = await self.openid_client.decode_token(token)
+            await self.openid_client.decode_token(token)
+
+        self.assertEqual(claims, {'sub': 'user', 'aud': self.client_id})
+        self.assertEqual(run_in_executor.call_count, 2)
+        self.realm.client.get.assert_any_await('https://certs')
+        self.assertEqual(self.realm.client.get.await_count, 2)
+
+    async def test_decode_token_invalid(self):
+        """
+        Case: Tokens get decoded which are expired, signed with an unknown
+              key or have a kid which isn't a string
+        Expected: The same errors are raised as by the synchronous client
+        """
+        self.realm.client.get.return_value = {'keys': [PUBLIC_JWK]}
+        claims = {'sub': 'user', 'aud': self.client_id}
+
+        with self.assertRaises(ExpiredSignatureError):
+            await self.openid_client.decode_token(
+                sign(dict(claims, exp=1), PEM, 'key-1')
+            )
+        with self.assertRaises(JWTError):
+            await self.openid_client.decode_token(
+                sign(claims, PEM, 'key-2')
+            )
+        for kid in (['key-1'], {}):
+            with self.assertRaises(JWTError):
+                await self.openid_client.decode_token(
+                    sign(claims, PEM, kid)
+                )
+
+    async def test_decode_tokens(self):
+        """
+        Case: A batch of valid and invalid tokens get decoded
+        Expected: The decode results are awaited, invalid tokens have their
+                  error set
+        """
+        self.realm.client.get.return_value = {'keys': [PUBLIC_JWK]}
+        claims = {'sub': 'user', 'aud': self.client_id}
+        tokens = [sign(claims, PEM, 'key-1'),
+                  sign(dict(claims, exp=1), PEM, 'key-1'),
+                  sign(claims, PEM, ['key-1']),
+                  'invalid']
+
+        results = await self.openid_client.decode_tokens(tokens)
+
+        self.assertEqual([result.token for result in results], tokens)
+        self.assertEqual([result.ok for result in results],
+                         [True, False, False, False])
+        self.assertEqual(results[0].claims, claims)
+        self.assertIsInstance(results[1].error, ExpiredSignatureError)
+        self.assertIsNone(results[1].claims)
+
     async def test_logout(self):
         result = await self.openid_client.logout(refresh_token='refresh-token')
         self.realm.client.post.assert_awaited_once_with(
@@ -66,6 +139,35 @@ class KeycloakOpenidConnectTestCase(asynctest.TestCase):
         )
         self.assertEqual(result, self.realm.client.post.return_value)
 
+    async def test_introspect(self):
+        """
+        Case: A token is introspected twice with the introspection cache
+              enabled
+        Expected: The endpoint is only requested once
+        """
+        self.openid_client = await KeycloakOpenidConnect(
+            realm=self.realm,
+            client_id=self.client_id,
+            client_secret=self.client_secret,
+            introspection_cache_size=10
+        )
+        self.openid_client.well_known.contents = {
+            'introspection_endpoint': 'https://introspect'
+        }
+        self.realm.client.post.return_value = {'active': False}
+
+        result = await self.openid_client.introspect(token='token')
+        self.assertEqual(await self.openid_client.introspect(token='token'),
+                         result)
+        self.realm.client.post.assert_awaited_once_with(
+            'https://introspect',
+            data={
+                'token': 'token',
+                'client_id': self.client_id,
+                'client_secret': self.client_secret
+            }
+        )
+
     async def test_certs(self):
         result = await self.openid_client.certs()
         self.realm.client.get('https://certs')
@@ -82,6 +184,34 @@ class KeycloakOpenidConnectTestCase(asynctest.TestCase):
         )
         self.assertEqual(result, self.realm.client.get.return_value)
 
+    async def test_userinfo_cache(self):
+        """
+        Case: The userinfo is requested twice for the same token with the
+              userinfo cache enabled
+        Expected: The endpoint is only requested once
+        """
+        self.openid_client = await KeycloakOpenidConnect(
+            realm=self.realm,
+            client_id=self.client_id,
+            client_secret=self.client_secret,
+            userinfo_cache_size=10
+        )
+        self.openid_client.well_known.contents = {
+            'userinfo_endpoint': 'https://userinfo'
+        }
+        self.realm.client.get.reset_mock()
+        self.realm.client.get.return_value = {'sub': 'user'}
+
+        result = await self.openid_client.userinfo(token='token')
+        self.assertEqual(await self.openid_client.userinfo(token='token'),
+                         result)
+        self.realm.client.get.assert_awaited_once_with(
+            'https://userinfo',
+            headers={
+                'Authorization': 'Bearer token'
+            }
+        )
+
     def test_authorization_url(self):
         result = self.openid_client.authorization_url(
             redirect_uri='https://redirect-url',
@@ -162,3 +292,63 @@ class KeycloakOpenidConnectTestCase(asynctest.TestCase):
             }
         )
         self.assertEqual(response, self.realm.client.post.return_value)
+
+    async def test_token_exchange_cache(self):
+        """
+        Case: The same token exchange is done concurrently and afterwards
+              again with the token exchange cache enabled
+        Expected: It's only requested once
+        """
+        self.openid_client = await KeycloakOpenidConnect(
+            realm=self.realm,
+            client_id=self.client_id,
+            client_secret=self.client_secret,
+            token_exchange_cache_size=10
+        )
+        self.openid_client.well_known.contents = {
+            'token_endpoint': 'https://token'
+        }
+        self.realm.client.post.return_value = {
+            'access_token': 'exchanged', 'expires_in': 60
+        }
+
+        responses = await asyncio.gather(*[
+            self.openid_client.token_exchange(subject_token='some-token',
+                                              audience='some-audience')
+            for _ in range(5)
+        ])
+        await self.openid_client.token_exchange(subject_token='some-token',
+                                                audience='some-audience')
+
+        self.assertEqual(responses, [responses[0]] * 5)
+        self.assertEqual(self.realm.client.post.await_count, 1)
+
+    async def test_coalesce_grant_types(self):
+        """
+        Case: The client credentials grant is requested concurrently with
+              coalescing of the grant enabled
+        Expected: It's only requested once
+        """
+        self.openid_client = await KeycloakOpenidConnect(
+            realm=self.realm,
+            client_id=self.client_id,
+            client_secret=self.client_secret,
+            coalesce_grant_types=('client_credentials',)
+        )
+        self.openid_client.well_known.contents = {
+            'token_endpoint': 'https://token'
+        }
+
+        async def post(url, data):
+            await asyncio.sleep(0.01)
+            return {'access_token': 'token', 'expires_in': 60}
+
+        self.realm.client.post.side_effect = post
+
+        responses = await asyncio.gather(*[
+            self.openid_client.client_credentials(scope='profile')
+            for _ in range(5)
+        ])
+
+        self.assertEqual(responses, [responses[0]] * 5)
+        self.assertEqual(self.realm.client.post.await_count, 1)
@@ -69,6 +69,11 @@ class KeycloakRealmTestCase(asynctest.TestCase):
                 loop=self.loop
             )
 
+    def test_client_options(self):
+        with self.assertRaises(ValueError):
+            KeycloakRealm('https://example.com', 'some-realm',
+                          pool_maxsize=64, loop=self.loop)
+
     async def test_openid_connect(self):
         """
         Case: OpenID client get requested
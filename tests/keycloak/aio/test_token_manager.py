@@ -0,0 +1,156 @@
+import asyncio
+
+import asynctest
+import mock
+
+try:
+    import aiohttp  # noqa: F401
+except ImportError:
+    aiohttp = None
+else:
+    from keycloak.aio.openid_connect import KeycloakOpenidConnect
+    from keycloak.aio.realm import KeycloakRealm
+    from keycloak.aio.token_manager import (
+        ClientCredentialsManager,
+        TokenSession,
+    )
+    from keycloak.exceptions import KeycloakClientError, KeycloakSessionExpired
+
+
+def token_response(access_token, expires_in=100, **kwargs):
+    return dict(kwargs, access_token=access_token, expires_in=expires_in)
+
+
+@asynctest.skipIf(aiohttp is None, 'aiohttp is not installed')
+class ClientCredentialsManagerTestCase(asynctest.TestCase):
+
+    async def setUp(self):
+        self.openid_connect = asynctest.MagicMock(
+            spec_set=KeycloakOpenidConnect
+        )
+        self.tokens = iter(['token-1', 'token-2', 'token-3'])
+        self.openid_connect.client_credentials = asynctest.CoroutineMock(
+            side_effect=self.client_credentials
+        )
+        self.manager = ClientCredentialsManager(
+            openid_connect=self.openid_connect, scope='profile'
+        )
+
+    async def tearDown(self):
+        await self.manager.close()
+
+    async def client_credentials(self, **kwargs):
+        await asyncio.sleep(0.01)
+        return token_response(next(self.tokens), expires_in=1)
+
+    async def test_single_flight(self):
+        """
+        Case: Many coroutines request a token at once while there is none
+        Expected: Only one token request is done
+        """
+        tokens = await asyncio.gather(*[
+            self.manager.get_token() for _ in range(100)
+        ])
+
+        self.assertEqual(tokens, ['token-1'] * 100)
+        self.openid_connect.client_credentials.assert_awaited_once_with(
+            scope='profile'
+        )
+
+    async def test_refresh_ahead(self):
+        """
+        Case: The manager is awaited and the refresh fraction of the
+              lifetime of the token passes
+        Expected: The token is refreshed in the background
+        """
+        self.manager = await ClientCredentialsManager(
+            openid_connect=self.openid_connect, refresh_fraction=0.1,
+            leeway=0
+        )
+        self.assertEqual(await self.manager.get_token(), 'token-1')
+
+        await asyncio.sleep(0.15)
+
+        self.assertEqual(self.manager.token.access_token, 'token-2')
+        self.assertEqual(await self.manager.get_token(), 'token-2')
+
+    async def test_close(self):
+        """
+        Case: The realm of an awaited manager is closed
+        Expected: The refresh task is cancelled
+        """
+        realm = KeycloakRealm('https://example.com', 'some-realm')
+        self.manager = await ClientCredentialsManager(
+            openid_connect=self.openid_connect
+        )
+        refresher = self.manager._refresher
+        realm.token_managers.add(self.manager)
+
+        await realm.close()
+
+        self.assertTrue(refresher.cancelled())
+        self.assertIsNone(self.manager._refresher)
+
+    def test_store(self):
+        with self.assertRaises(ValueError):
+            ClientCredentialsManager(openid_connect=self.openid_connect,
+                                     store=mock.Mock())
+
+
+@asynctest.skipIf(aiohttp is None, 'aiohttp is not installed')
+class TokenSessionTestCase(asynctest.TestCase):
+
+    async def setUp(self):
+        self.openid_connect = asynctest.MagicMock(
+            spec_set=KeycloakOpenidConnect
+        )
+        self.openid_connect.refresh_token = asynctest.CoroutineMock(
+            return_value=token_response('token-2')
+        )
+
+    async def test_refresh(self):
+        """
+        Case: The access token of a session without a rotated refresh token
+              is requested after it expired
+        Expected: It's refreshed once, the refresh token is kept
+        """
+        session = TokenSession(
+            openid_connect=self.openid_connect,
+            token_response=token_response('token-1', expires_in=0,
+                                          refresh_token='refresh-1')
+        )
+
+        tokens = await asyncio.gather(*[
+            session.get_token() for _ in range(10)
+        ])
+
+        self.assertEqual(tokens, ['token-2'] * 10)
+        self.openid_connect.refresh_token.assert_awaited_once_with(
+            refresh_token='refresh-1'
+        )
+        self.assertEqual(session.token.refresh_token, 'refresh-1')
+
+    async def test_session_expired(self):
+        """
+        Case: The refresh token got revoked while the session is refreshed
+              in the background
+        Expected: The refresh task stops, KeycloakSessionExpired is raised
+        """
+        self.openid_connect.refresh_token.side_effect = KeycloakClientError(
+            aiohttp.ClientResponseError(request_info=mock.Mock(), history=(),
+                                        status=400)
+        )
+        session = await TokenSession(
+            openid_connect=self.openid_connect,
+            token_response=token_response('token-1', expires_in=0.2,
+                                          refresh_token='refresh-1'),
+            refresh_fraction=0, leeway=0
+        )
+
+        await asyncio.wait_for(session._refresher, 1)
+        self.assertEqual(self.openid_connect.refresh_token.await_count, 1)
+
+        await asyncio.sleep(0.2)
+        with self.assertRaises(KeycloakSessionExpired):
+            await session.get_token()
+        await session.close()
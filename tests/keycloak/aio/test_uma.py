@@ -13,6 +13,7 @@ else:
 class KeycloakOpenidConnectTestCase(asynctest.TestCase):
     async def setUp(self):
         self.realm = asynctest.MagicMock(spec_set=KeycloakRealm)
+        self.realm.snapshot = None
         self.realm.client.get = asynctest.CoroutineMock()
         self.realm.client.post = asynctest.CoroutineMock()
         self.realm.client.put = asynctest.CoroutineMock()
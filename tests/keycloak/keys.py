@@ -0,0 +1,38 @@
+"""
+Key material for tests which need real signatures.
+"""
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jose import jwk, jwt
+
+
+def _pem(private_key):
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+
+
+def generate_key(kid, algorithm='RS256'):
+    """
+    :return: Private key in PEM and the public JWK
+    :rtype: (bytes, dict)
+    """
+    if algorithm.startswith('ES'):
+        private_key = ec.generate_private_key(ec.SECP256R1(),
+                                              default_backend())
+    else:
+        private_key = rsa.generate_private_key(public_exponent=65537,
+                                               key_size=2048,
+                                               backend=default_backend())
+    pem = _pem(private_key)
+    public_jwk = jwk.construct(pem, algorithm).public_key().to_dict()
+    public_jwk.update(kid=kid, use='sig', alg=algorithm)
+    return pem, public_jwk
+
+
+def sign(claims, pem, kid, algorithm='RS256'):
+    return jwt.encode(claims, pem, algorithm=algorithm,
+                      headers={'kid': kid})
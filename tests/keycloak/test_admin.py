@@ -4,7 +4,9 @@ import mock
 
 from keycloak.admin import KeycloakAdmin
 from keycloak.admin.realm import Realms
+from keycloak.openid_connect import KeycloakOpenidConnect
 from keycloak.realm import KeycloakRealm
+from keycloak.token_manager import CachedTokenProvider
 
 
 class KeycloakAdminTestCase(TestCase):
@@ -16,3 +18,26 @@ class KeycloakAdminTestCase(TestCase):
     def test_realm(self):
         realm = self.admin.realms
         self.assertIsInstance(realm, Realms)
+
+    def test_cached_token_provider(self):
+        """
+        Case: Multiple admin requests are done with a cached token provider
+        Expected: The token is only requested once
+        """
+        openid_connect = mock.MagicMock(spec_set=KeycloakOpenidConnect)
+        openid_connect.client_credentials.return_value = {
+            'access_token': 'token', 'expires_in': 300
+        }
+        self.admin.set_token(CachedTokenProvider(openid_connect))
+
+        self.admin.get('https://admin')
+        self.admin.get('https://admin')
+
+        self.realm.client.get.assert_called_with(
+            url='https://admin',
+            headers={
+                'Authorization': 'Bearer token',
+                'Content-Type': 'application/json'
+            }
+        )
+        openid_connect.client_credentials.assert_called_once_with()
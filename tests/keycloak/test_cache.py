@@ -0,0 +1,78 @@
+from unittest import TestCase
+
+import mock
+
+from keycloak.cache import LRUCache, make_key
+
+
+class MakeKeyTestCase(TestCase):
+
+    def test_make_key(self):
+        """
+        Case: Keys are made from equal and different parts
+        Expected: Equal parts give an equal digest, different parts don't
+        """
+        self.assertEqual(make_key('token', {'a': 1, 'b': 2}),
+                         make_key('token', {'b': 2, 'a': 1}))
+        self.assertNotEqual(make_key('token', {'a': 1}),
+                            make_key('token', {'a': 2}))
+        self.assertNotIn('token', make_key('token'))
+
+
+class LRUCacheTestCase(TestCase):
+
+    def setUp(self):
+        self.cache = LRUCache(maxsize=2)
+
+    def test_get_set(self):
+        """
+        Case: Values are stored and retrieved
+        Expected: Hits and misses get counted
+        """
+        self.assertIsNone(self.cache.get('a'))
+        self.cache.set('a', 1, ttl=60)
+        self.assertEqual(self.cache.get('a'), 1)
+
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+
+    def test_eviction(self):
+        """
+        Case: More values are stored than the maximum size
+        Expected: The least recently used value get evicted
+        """
+        self.cache.set('a', 1, ttl=60)
+        self.cache.set('b', 2, ttl=60)
+        self.cache.get('a')
+        self.cache.set('c', 3, ttl=60)
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(self.cache.get('c'), 3)
+
+    @mock.patch('keycloak.cache.monotonic')
+    def test_expiry(self, monotonic_mock):
+        """
+        Case: A value is requested after it expired
+        Expected: The default get returned
+        """
+        monotonic_mock.return_value = 100
+        self.cache.set('a', 1, ttl=10)
+        self.cache.set('b', 1, ttl=0)
+
+        monotonic_mock.return_value = 109
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertEqual(self.cache.get('b', 'default'), 'default')
+
+        monotonic_mock.return_value = 110
+        self.assertIsNone(self.cache.get('a'))
+
+    def test_delete_clear(self):
+        self.cache.set('a', 1, ttl=60)
+        self.cache.set('b', 2, ttl=60)
+        self.cache.delete('a')
+        self.assertIsNone(self.cache.get('a'))
+
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
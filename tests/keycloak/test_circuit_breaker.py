@@ -0,0 +1,152 @@
+from unittest import TestCase
+
+import mock
+
+from keycloak.circuit_breaker import (
+    ENDPOINT_ADMIN,
+    ENDPOINT_DISCOVERY,
+    ENDPOINT_OTHER,
+    ENDPOINT_TOKEN,
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitBreakers,
+    get_endpoint_class,
+)
+from keycloak.exceptions import KeycloakCircuitOpen
+
+
+@mock.patch('keycloak.circuit_breaker.monotonic')
+class CircuitBreakerTestCase(TestCase):
+
+    def setUp(self):
+        self.breaker = CircuitBreaker(name=ENDPOINT_TOKEN,
+                                      failure_threshold=3, reset_timeout=10)
+
+    def open(self):
+        for _ in range(3):
+            self.breaker.before_request()
+            self.breaker.record_failure()
+
+    def test_open(self, patched_monotonic):
+        """
+        Case: Consecutive failures reach the threshold
+        Expected: The circuit opens and requests are rejected until the
+                  reset timeout passed
+        """
+        patched_monotonic.return_value = 100
+        self.breaker.record_failure()
+        self.breaker.record_response(404)
+        self.assertEqual(self.breaker.failures, 0)
+
+        self.open()
+        self.assertEqual(self.breaker.state, STATE_OPEN)
+
+        patched_monotonic.return_value = 109
+        with self.assertRaises(KeycloakCircuitOpen) as context:
+            self.breaker.before_request()
+        self.assertEqual(context.exception.endpoint_class, ENDPOINT_TOKEN)
+        self.assertEqual(self.breaker.rejected, 1)
+
+    def test_half_open(self, patched_monotonic):
+        """
+        Case: The reset timeout of an open circuit passed
+        Expected: A single probe is let through, the circuit closes when it
+                  succeeds
+        """
+        patched_monotonic.return_value = 100
+        self.open()
+
+        patched_monotonic.return_value = 110
+        self.breaker.before_request()
+        self.assertEqual(self.breaker.state, STATE_HALF_OPEN)
+        with self.assertRaises(KeycloakCircuitOpen):
+            self.breaker.before_request()
+
+        self.breaker.record_response(200)
+        self.assertEqual(self.breaker.state, STATE_CLOSED)
+        self.breaker.before_request()
+
+    def test_half_open_failure(self, patched_monotonic):
+        """
+        Case: The probe of a half-open circuit fails
+        Expected: The circuit opens again for the reset timeout
+        """
+        patched_monotonic.return_value = 100
+        self.open()
+
+        patched_monotonic.return_value = 110
+        self.breaker.before_request()
+        self.breaker.record_response(503)
+        self.assertEqual(self.breaker.state, STATE_OPEN)
+
+        patched_monotonic.return_value = 119
+        with self.assertRaises(KeycloakCircuitOpen):
+            self.breaker.before_request()
+
+    def test_lost_probe(self, patched_monotonic):
+        """
+        Case: The probe of a half-open circuit never reports back
+        Expected: Another probe is let through after the reset timeout
+        """
+        patched_monotonic.return_value = 100
+        self.open()
+
+        patched_monotonic.return_value = 110
+        self.breaker.before_request()
+
+        patched_monotonic.return_value = 120
+        self.breaker.before_request()
+        self.assertEqual(self.breaker.state, STATE_HALF_OPEN)
+
+
+class CircuitBreakersTestCase(TestCase):
+
+    def test_endpoint_classes(self):
+        """
+        Case: Breakers are requested for URLs of different endpoints
+        Expected: Each endpoint class has its own breaker
+        """
+        breakers = CircuitBreakers(failure_threshold=1)
+        realm_url = 'https://example.com/auth/realms/my-realm'
+
+        token = breakers.get(realm_url + '/protocol/openid-connect/token')
+        token.record_failure()
+
+        self.assertIs(
+            breakers.get(realm_url +
+                         '/protocol/openid-connect/token/introspect'),
+            token
+        )
+        self.assertEqual(token.state, STATE_OPEN)
+        self.assertEqual(breakers[ENDPOINT_DISCOVERY].state, STATE_CLOSED)
+
+    def test_get_endpoint_class(self):
+        realm_url = 'https://example.com/auth/realms/my-realm'
+        self.assertEqual(
+            get_endpoint_class(realm_url + '/protocol/openid-connect/token'),
+            ENDPOINT_TOKEN
+        )
+        self.assertEqual(
+            get_endpoint_class(realm_url + '/protocol/openid-connect/certs'),
+            ENDPOINT_DISCOVERY
+        )
+        self.assertEqual(
+            get_endpoint_class(
+                realm_url + '/.well-known/openid-configuration'
+            ),
+            ENDPOINT_DISCOVERY
+        )
+        self.assertEqual(
+            get_endpoint_class(
+                'https://example.com/auth/admin/realms/my-realm/users'
+            ),
+            ENDPOINT_ADMIN
+        )
+        self.assertEqual(
+            get_endpoint_class(
+                realm_url + '/protocol/openid-connect/userinfo'
+            ),
+            ENDPOINT_OTHER
+        )
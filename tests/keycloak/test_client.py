@@ -1,9 +1,21 @@
+import socket
 from unittest import TestCase
 
 import mock
 from requests import Session
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, HTTPError
 
-from keycloak.client import KeycloakClient
+from keycloak.circuit_breaker import STATE_OPEN, CircuitBreakers
+from keycloak.client import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_READ_TIMEOUT,
+    KeepAliveHTTPAdapter,
+    KeycloakClient,
+)
+from keycloak.deadline import Deadline
+from keycloak.exceptions import KeycloakCircuitOpen, KeycloakClientError
+from keycloak.retry import RetryPolicy
 
 
 class KeycloakClientTestCase(TestCase):
@@ -45,6 +57,37 @@ class KeycloakClientTestCase(TestCase):
         self.client.close()
         self.assertIsNone(self.client._session)
 
+    def test_pool_options(self):
+        """
+        Case: The client is created with connection pool options
+        Expected: The adapters of the session use them
+        """
+        self.client = KeycloakClient(server_url=self.server_url,
+                                     pool_connections=2, pool_maxsize=64,
+                                     pool_block=True)
+
+        for prefix in ('https://', 'http://'):
+            adapter = self.client.session.get_adapter(prefix + 'example.com')
+            self.assertIsInstance(adapter, HTTPAdapter)
+            self.assertNotIsInstance(adapter, KeepAliveHTTPAdapter)
+            self.assertEqual(adapter.poolmanager.connection_pool_kw['maxsize'],
+                             64)
+            self.assertTrue(adapter.poolmanager.connection_pool_kw['block'])
+
+    def test_keep_alive(self):
+        """
+        Case: The client is created with TCP keep-alive enabled
+        Expected: The connections of the pool enable it on their sockets
+        """
+        self.client = KeycloakClient(server_url=self.server_url,
+                                     keep_alive=30)
+
+        adapter = self.client.session.get_adapter('https://example.com')
+        socket_options = \
+            adapter.poolmanager.connection_pool_kw['socket_options']
+        self.assertIn((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+                      socket_options)
+
     def test_get_full_url(self):
         """
         Case: retrieve a valid url
@@ -74,6 +117,7 @@ class KeycloakClientTestCase(TestCase):
 
         request_mock.Session.return_value.post.assert_called_once_with(
             'https://example.com/test',
+            timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
             data={'some': 'data'},
             headers={'some': 'header'},
             params={'extra': 'param'}
@@ -98,6 +142,7 @@ class KeycloakClientTestCase(TestCase):
 
         request_mock.Session.return_value.get.assert_called_once_with(
             'https://example.com/test',
+            timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
             headers={'some': 'header'},
             params={'extra': 'param'}
         )
@@ -123,6 +168,7 @@ class KeycloakClientTestCase(TestCase):
 
         request_mock.Session.return_value.put.assert_called_once_with(
             'https://example.com/test',
+            timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
             data={'some': 'data'},
             headers={'some': 'header'},
             params={'extra': 'param'}
@@ -149,6 +195,7 @@ class KeycloakClientTestCase(TestCase):
 
         request_mock.Session.return_value.delete.assert_called_once_with(
             'https://example.com/test',
+            timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
             headers={'some': 'header'},
             extra='param'
         )
@@ -173,3 +220,117 @@ class KeycloakClientTestCase(TestCase):
         processed_response = self.client._handle_response(response=response)
 
         self.assertEqual(processed_response, response.content)
+
+    @mock.patch('keycloak.client.time')
+    @mock.patch('keycloak.client.requests', autospec=True)
+    def test_retry(self, request_mock, patched_time):
+        """
+        Case: A GET request fails with a temporary failure, once with a
+              Retry-After header
+        Expected: It's retried after the delay the server asked for until it
+                  succeeds
+        """
+        request_mock.Session.return_value.headers = mock.MagicMock()
+        responses = [
+            mock.MagicMock(status_code=503, headers={'Retry-After': '2'}),
+            mock.MagicMock(status_code=502, headers={}),
+            mock.MagicMock(status_code=200, headers={}),
+        ]
+        request_mock.Session.return_value.get.side_effect = responses
+        policy = RetryPolicy(backoff_factor=0.1)
+        self.client = KeycloakClient(server_url=self.server_url,
+                                     retry_policy=policy)
+
+        response = self.client.get('https://example.com/certs')
+
+        self.assertEqual(response, responses[2].json.return_value)
+        self.assertEqual(request_mock.Session.return_value.get.call_count, 3)
+        self.assertEqual(patched_time.sleep.call_args_list[0],
+                         mock.call(2))
+        self.assertLessEqual(patched_time.sleep.call_args_list[1][0][0], 0.2)
+        responses[0].close.assert_called_once_with()
+        self.assertEqual(policy.retries, 2)
+
+    @mock.patch('keycloak.client.time')
+    @mock.patch('keycloak.client.requests', autospec=True)
+    def test_retry_exhausted(self, request_mock, patched_time):
+        """
+        Case: Requests keep failing or aren't idempotent
+        Expected: The failure is raised after the retries are exhausted, a
+                  POST request isn't retried at all
+        """
+        request_mock.Session.return_value.headers = mock.MagicMock()
+        session = request_mock.Session.return_value
+        session.get.side_effect = ConnectionError('refused')
+        session.post.return_value = mock.MagicMock(status_code=503)
+        session.post.return_value.raise_for_status.side_effect = \
+            HTTPError('503')
+        policy = RetryPolicy(max_retries=2)
+        self.client = KeycloakClient(server_url=self.server_url,
+                                     retry_policy=policy)
+
+        with self.assertRaises(ConnectionError):
+            self.client.get('https://example.com/certs')
+        self.assertEqual(session.get.call_count, 3)
+        self.assertEqual(policy.exhausted, 1)
+
+        with self.assertRaises(KeycloakClientError):
+            self.client.post('https://example.com/token', data={})
+        self.assertEqual(session.post.call_count, 1)
+
+    @mock.patch('keycloak.client.requests', autospec=True)
+    def test_circuit_breaker(self, request_mock):
+        """
+        Case: The token endpoint keeps failing
+        Expected: Its circuit opens and requests to it fail fast, requests to
+                  other endpoints are still sent
+        """
+        request_mock.Session.return_value.headers = mock.MagicMock()
+        session = request_mock.Session.return_value
+        session.post.side_effect = ConnectionError('refused')
+        session.get.return_value = mock.MagicMock(status_code=200)
+        breakers = CircuitBreakers(failure_threshold=2)
+        self.client = KeycloakClient(server_url=self.server_url,
+                                     circuit_breakers=breakers)
+        self.client._handle_response = mock.MagicMock()
+        token_url = 'https://example.com/auth/realms/my-realm/' \
+                    'protocol/openid-connect/token'
+
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                self.client.post(token_url, data={})
+        with self.assertRaises(KeycloakCircuitOpen):
+            self.client.post(token_url, data={})
+
+        self.assertEqual(session.post.call_count, 2)
+        self.assertEqual(breakers.get(token_url).state, STATE_OPEN)
+
+        self.client.get('https://example.com/auth/realms/my-realm/'
+                        'protocol/openid-connect/certs')
+        self.assertEqual(session.get.call_count, 1)
+
+    @mock.patch('keycloak.client.requests', autospec=True)
+    def test_timeout(self, request_mock):
+        """
+        Case: Requests are done with a timeout of the call and a deadline
+        Expected: The timeout replaces the default timeout of the client,
+                  the deadline limits the timeouts
+        """
+        request_mock.Session.return_value.headers = mock.MagicMock()
+        session = request_mock.Session.return_value
+        self.client = KeycloakClient(server_url=self.server_url,
+                                     timeout=(1, 2))
+        self.client._handle_response = mock.MagicMock()
+
+        self.client.get('https://example.com/test')
+        self.assertEqual(session.get.call_args[1]['timeout'], (1, 2))
+
+        self.client.get('https://example.com/test', timeout=60)
+        self.assertEqual(session.get.call_args[1]['timeout'], 60)
+
+        deadline = mock.MagicMock(spec_set=Deadline)
+        self.client.get('https://example.com/test', timeout=60,
+                        deadline=deadline)
+        deadline.get_timeout.assert_called_once_with(60)
+        self.assertEqual(session.get.call_args[1]['timeout'],
+                         deadline.get_timeout.return_value)
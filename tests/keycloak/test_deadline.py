@@ -0,0 +1,41 @@
+from unittest import TestCase
+
+import mock
+
+from keycloak.deadline import Deadline
+from keycloak.exceptions import KeycloakDeadlineExceeded
+
+
+class DeadlineTestCase(TestCase):
+
+    @mock.patch('keycloak.deadline.monotonic')
+    def test_get_timeout(self, monotonic):
+        """
+        Case: Timeouts are requested for the requests of an operation
+        Expected: They're limited to the budget which is left
+        """
+        monotonic.return_value = 100
+        deadline = Deadline(10)
+
+        self.assertEqual(deadline.get_timeout((5, 30)), (5, 10))
+        self.assertEqual(deadline.get_timeout(), (10, 10))
+
+        monotonic.return_value = 107
+        self.assertEqual(deadline.remaining, 3)
+        self.assertFalse(deadline.expired)
+        self.assertEqual(deadline.get_timeout(5), (3, 3))
+
+    @mock.patch('keycloak.deadline.monotonic')
+    def test_expired(self, monotonic):
+        """
+        Case: A timeout is requested after the deadline passed
+        Expected: KeycloakDeadlineExceeded is raised
+        """
+        monotonic.return_value = 100
+        deadline = Deadline(10)
+
+        monotonic.return_value = 110
+        self.assertTrue(deadline.expired)
+        self.assertEqual(deadline.remaining, 0)
+        with self.assertRaises(KeycloakDeadlineExceeded):
+            deadline.get_timeout((5, 30))
@@ -0,0 +1,227 @@
+import threading
+from unittest import TestCase
+
+import mock
+from jose.backends.base import Key
+
+from keycloak.jwks import KeycloakJWKS
+from keycloak.realm import KeycloakRealm
+from tests.keycloak.keys import generate_key
+
+KEYS = dict(
+    (kid, generate_key(kid)[1]) for kid in ('key-1', 'key-2', 'key-3')
+)
+
+
+class KeycloakJWKSTestCase(TestCase):
+
+    def setUp(self):
+        self.realm = mock.MagicMock(spec_set=KeycloakRealm)
+        self.realm.snapshot = None
+        self.realm.client.get.return_value = {
+            'keys': [KEYS['key-1'], KEYS['key-2']]
+        }
+        self.jwks = KeycloakJWKS(realm=self.realm, path='https://certs',
+                                 ttl=60)
+
+    def test_keys_indexed_by_kid(self):
+        """
+        Case: A key is requested by kid
+        Expected: The JWKS get fetched once and the key is returned
+        """
+        self.assertEqual(self.jwks['key-1'], KEYS['key-1'])
+        self.assertEqual(sorted(self.jwks), ['key-1', 'key-2'])
+        self.assertEqual(len(self.jwks), 2)
+
+        self.realm.client.get.assert_called_once_with('https://certs')
+
+    @mock.patch('keycloak.jwks.monotonic')
+    def test_ttl(self, monotonic_mock):
+        """
+        Case: Keys are requested before and after the TTL expired
+        Expected: The JWKS only get fetched again after the TTL
+        """
+        monotonic_mock.return_value = 100
+        self.jwks['key-1']
+        monotonic_mock.return_value = 159
+        self.jwks['key-1']
+        self.assertEqual(self.realm.client.get.call_count, 1)
+
+        monotonic_mock.return_value = 160
+        self.jwks['key-1']
+        self.assertEqual(self.realm.client.get.call_count, 2)
+
+    def test_prepared_keys(self):
+        """
+        Case: The key set contains signing, encryption and broken keys
+        Expected: Key objects are only built for usable signing keys, once
+                  per fetch
+        """
+        enc_key = dict(KEYS['key-2'], use='enc', alg='RSA-OAEP')
+        broken_key = {'kid': 'broken', 'kty': 'RSA', 'alg': 'RS256'}
+        self.realm.client.get.return_value = {
+            'keys': [KEYS['key-1'], enc_key, broken_key]
+        }
+
+        key = self.jwks.get_key('key-1')
+        self.assertIsInstance(key, Key)
+        self.assertIs(key, self.jwks.get_key('key-1'))
+        self.assertEqual(self.jwks.get_keys(), [key])
+        self.assertEqual(sorted(self.jwks), ['broken', 'key-1', 'key-2'])
+
+        with self.assertRaises(KeyError):
+            self.jwks.get_key('key-2')
+
+    def test_refresh(self):
+        """
+        Case: A refresh is forced
+        Expected: The JWKS get fetched regardless of the TTL
+        """
+        self.jwks['key-1']
+        self.realm.client.get.return_value = {'keys': [KEYS['key-3']]}
+        self.jwks.refresh()
+
+        self.assertEqual(list(self.jwks), ['key-3'])
+        self.assertEqual(self.realm.client.get.call_count, 2)
+
+    @mock.patch('keycloak.jwks.monotonic')
+    def test_get_key_unknown_kid(self, monotonic_mock):
+        """
+        Case: A key is requested for a kid which is added after a rotation
+        Expected: The JWKS get fetched again, but not within the refetch
+                  interval
+        """
+        monotonic_mock.return_value = 100
+        self.jwks = KeycloakJWKS(realm=self.realm, path='https://certs',
+                                 ttl=60, refetch_interval=10,
+                                 negative_ttl=5)
+        self.assertIsInstance(self.jwks.get_key('key-1'), Key)
+
+        self.realm.client.get.return_value = {'keys': [KEYS['key-3']]}
+        with self.assertRaises(KeyError):
+            self.jwks.get_key('key-3')
+        self.assertEqual(self.realm.client.get.call_count, 1)
+
+        monotonic_mock.return_value = 110
+        self.assertIsInstance(self.jwks.get_key('key-3'), Key)
+        self.assertEqual(self.realm.client.get.call_count, 2)
+
+    @mock.patch('keycloak.jwks.monotonic')
+    def test_get_key_negative_cache(self, monotonic_mock):
+        """
+        Case: A key is requested for a kid which doesn't exist
+        Expected: The kid is remembered as missing for the negative TTL
+        """
+        monotonic_mock.return_value = 100
+        self.jwks = KeycloakJWKS(realm=self.realm, path='https://certs',
+                                 ttl=600, refetch_interval=10,
+                                 negative_ttl=30)
+        self.jwks.get_key('key-1')
+
+        monotonic_mock.return_value = 110
+        with self.assertRaises(KeyError):
+            self.jwks.get_key('forged')
+        self.assertEqual(self.realm.client.get.call_count, 2)
+
+        monotonic_mock.return_value = 139
+        with self.assertRaises(KeyError):
+            self.jwks.get_key('forged')
+        self.assertEqual(self.realm.client.get.call_count, 2)
+
+        monotonic_mock.return_value = 140
+        with self.assertRaises(KeyError):
+            self.jwks.get_key('forged')
+        self.assertEqual(self.realm.client.get.call_count, 3)
+
+    def test_get_key_coalesce(self):
+        """
+        Case: Multiple threads request the same unknown kid at once
+        Expected: The JWKS get fetched only once for all of them
+        """
+        self.jwks = KeycloakJWKS(realm=self.realm, path='https://certs',
+                                 refetch_interval=0)
+        self.jwks.get_key('key-1')
+
+        started = threading.Event()
+
+        def fetch(path):
+            started.wait(1)
+            return {'keys': [KEYS['key-3']]}
+
+        self.realm.client.get.side_effect = fetch
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(self.jwks.get_key('key-3'))
+            ) for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        started.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(self.realm.client.get.call_count, 2)
+
+    @mock.patch('keycloak.jwks.monotonic')
+    def test_stale(self, monotonic_mock):
+        """
+        Case: The JWKS expired and fetching it again fails
+        Expected: The stale set is used within the stale window and fetched
+                  again after the refetch interval, afterwards the error is
+                  raised
+        """
+        monotonic_mock.return_value = 100
+        self.jwks = KeycloakJWKS(realm=self.realm, path='https://certs',
+                                 ttl=60, refetch_interval=10, stale_ttl=30)
+        self.jwks['key-1']
+        self.realm.client.get.side_effect = IOError('unreachable')
+
+        monotonic_mock.return_value = 160
+        self.assertTrue(self.jwks.stale)
+        self.assertIsInstance(self.jwks.get_key('key-1'), Key)
+        monotonic_mock.return_value = 169
+        self.jwks.get_key('key-1')
+        self.assertEqual(self.realm.client.get.call_count, 2)
+
+        monotonic_mock.return_value = 170
+        self.assertFalse(self.jwks.revalidate())
+        self.assertEqual(self.realm.client.get.call_count, 3)
+
+        monotonic_mock.return_value = 190
+        self.assertFalse(self.jwks.stale)
+        with self.assertRaises(IOError):
+            self.jwks.get_key('key-1')
+
+    def test_stale_disabled(self):
+        """
+        Case: The JWKS expired and fetching it fails without a stale window
+        Expected: The error is raised
+        """
+        self.jwks = KeycloakJWKS(realm=self.realm, path='https://certs',
+                                 ttl=0)
+        self.jwks['key-1']
+        self.realm.client.get.side_effect = IOError('unreachable')
+
+        with self.assertRaises(IOError):
+            self.jwks.get_key('key-1')
+
+    @mock.patch('keycloak.jwks.monotonic')
+    def test_stale_while_fetching(self, monotonic_mock):
+        """
+        Case: A key is requested while another thread fetches the expired
+              JWKS
+        Expected: The stale set is used without waiting for the fetch
+        """
+        monotonic_mock.return_value = 100
+        self.jwks = KeycloakJWKS(realm=self.realm, path='https://certs',
+                                 ttl=60, stale_ttl=30)
+        self.jwks['key-1']
+
+        monotonic_mock.return_value = 160
+        with self.jwks._lock:
+            self.assertIsInstance(self.jwks.get_key('key-1'),
+                                  Key)
+        self.assertEqual(self.realm.client.get.call_count, 1)
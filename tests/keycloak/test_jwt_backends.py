@@ -0,0 +1,309 @@
+import hashlib
+import hmac
+import json
+from unittest import TestCase
+
+import mock
+from jose import jwk, jwt
+from jose.exceptions import ExpiredSignatureError, JWKError, JWTError
+from jose.utils import base64url_encode
+
+from keycloak.jwt_backends import (
+    CryptographyBackend,
+    CryptographyKey,
+    JoseBackend,
+    get_backend,
+    prevalidate,
+    validate_claims,
+)
+from tests.keycloak.keys import generate_key, sign
+
+
+class CryptographyBackendTestCase(TestCase):
+
+    def setUp(self):
+        self.backend = CryptographyBackend()
+        self.claims = {'sub': 'user', 'aud': 'client'}
+
+    def _sign_ps256(self, pem):
+        # python-jose can't sign PS256, create the signature directly.
+        from cryptography.hazmat.backends import default_backend
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import padding
+        from jose.utils import base64url_encode
+
+        private_key = serialization.load_pem_private_key(
+            pem, None, default_backend()
+        )
+        signing_input = b'.'.join([
+            base64url_encode(b'{"alg":"PS256","kid":"key-1"}'),
+            base64url_encode(b'{"sub":"user","aud":"client"}'),
+        ])
+        signature = private_key.sign(
+            signing_input,
+            padding.PSS(mgf=padding.MGF1(hashes.SHA256()),
+                        salt_length=hashes.SHA256.digest_size),
+            hashes.SHA256()
+        )
+        return (signing_input + b'.' + base64url_encode(signature)).decode()
+
+    def test_decode(self):
+        """
+        Case: Tokens signed with the supported algorithms get decoded
+        Expected: The claims are returned
+        """
+        for algorithm in ('RS256', 'ES256'):
+            pem, public_jwk = generate_key('key-1', algorithm)
+            token = sign(self.claims, pem, 'key-1', algorithm)
+            key = self.backend.construct_key(public_jwk, algorithm)
+
+            self.assertIsInstance(key, CryptographyKey)
+            self.assertEqual(
+                self.backend.decode(token, key, algorithms=[algorithm],
+                                    audience='client'),
+                self.claims
+            )
+            # Raw JWKs and JWK Sets are accepted as well
+            self.assertEqual(
+                self.backend.decode(token, {'keys': [public_jwk]},
+                                    algorithms=[algorithm],
+                                    audience='client'),
+                self.claims
+            )
+
+        pem, public_jwk = generate_key('key-1', 'RS256')
+        public_jwk['alg'] = 'PS256'
+        self.assertEqual(
+            self.backend.decode(self._sign_ps256(pem), public_jwk,
+                                algorithms=['PS256'], audience='client'),
+            self.claims
+        )
+
+    def test_decode_hmac_and_pem(self):
+        """
+        Case: Tokens get decoded with a HMAC secret and a PEM public key
+        Expected: The claims are returned
+        """
+        token = jwt.encode(self.claims, 'secret', algorithm='HS256')
+        self.assertEqual(
+            self.backend.decode(token, 'secret', algorithms=['HS256'],
+                                audience='client'),
+            self.claims
+        )
+
+        pem = generate_key('key-1')[0]
+        public_pem = jwk.construct(pem, 'RS256').public_key().to_pem()
+        token = sign(self.claims, pem, 'key-1')
+        self.assertEqual(
+            self.backend.decode(token, public_pem, algorithms=['RS256'],
+                                audience='client'),
+            self.claims
+        )
+
+    def test_validate_claims(self):
+        """
+        Case: Tokens with invalid claims get decoded
+        Expected: The same errors are raised as by python-jose
+        """
+        pem, public_jwk = generate_key('key-1')
+        cases = [
+            (dict(self.claims, aud='other'), {}),
+            (dict(self.claims, iss='other'),
+             {'issuer': 'https://issuer'}),
+            (dict(self.claims, nbf=4102444800), {}),
+            (dict(self.claims, sub=1), {}),
+            (dict(self.claims, at_hash='wrong'),
+             {'access_token': 'token'}),
+            (self.claims, {'options': {'require_exp': True}}),
+        ]
+        for claims, kwargs in cases:
+            token = sign(claims, pem, 'key-1')
+            with self.assertRaises(JWTError) as jose_error:
+                JoseBackend().decode(token, public_jwk, algorithms=['RS256'],
+                                     audience='client', **kwargs)
+            with self.assertRaises(JWTError) as error:
+                self.backend.decode(token, public_jwk, algorithms=['RS256'],
+                                    audience='client', **kwargs)
+            self.assertEqual(type(error.exception),
+                             type(jose_error.exception))
+            self.assertEqual(str(error.exception), str(jose_error.exception))
+
+    def test_decode_invalid(self):
+        """
+        Case: Invalid tokens get decoded
+        Expected: The same errors are raised as by python-jose
+        """
+        pem, public_jwk = generate_key('key-1')
+        other_pem = generate_key('key-2')[0]
+
+        with self.assertRaises(JWTError):
+            self.backend.decode(sign(self.claims, other_pem, 'key-1'),
+                                public_jwk, algorithms=['RS256'],
+                                audience='client')
+
+        with self.assertRaises(JWTError):
+            self.backend.decode(sign(self.claims, pem, 'key-1'),
+                                public_jwk, algorithms=['ES256'],
+                                audience='client')
+
+        with self.assertRaises(JWTError):
+            self.backend.decode('not-a-token', public_jwk,
+                                algorithms=['RS256'])
+
+        with self.assertRaises(ExpiredSignatureError):
+            self.backend.decode(sign(dict(self.claims, exp=1), pem, 'key-1'),
+                                public_jwk, algorithms=['RS256'],
+                                audience='client')
+
+    def test_construct_key_invalid(self):
+        with self.assertRaises(JWKError):
+            self.backend.construct_key({'kty': 'RSA'}, 'RS256')
+        with self.assertRaises(JWKError):
+            self.backend.construct_key({'kty': 'OKP'}, 'EdDSA')
+        with self.assertRaises(JWKError):
+            self.backend.construct_key(object(), 'RS256')
+
+    def test_algorithm_confusion(self):
+        """
+        Case: A token is signed with HS256 using the public key of the realm
+              as secret
+        Expected: Public keys, certificates and JWKs of another type are
+                  refused as HMAC secret, the token is rejected
+        """
+        pem, public_jwk = generate_key('key-1')
+        public_pem = jwk.construct(public_jwk, 'RS256').to_pem()
+        signing_input = b'.'.join([
+            base64url_encode(b'{"alg":"HS256","typ":"JWT"}'),
+            base64url_encode(b'{"sub":"attacker"}'),
+        ])
+        signature = hmac.new(public_pem, signing_input,
+                             hashlib.sha256).digest()
+        token = (signing_input + b'.' + base64url_encode(signature)).decode()
+
+        for key in (public_pem, public_pem.decode('ascii'), public_jwk,
+                    json.dumps(public_jwk)):
+            with self.assertRaises(JWKError):
+                self.backend.construct_key(key, 'HS256')
+            with self.assertRaises(JWTError):
+                self.backend.decode(token, key,
+                                    algorithms=['RS256', 'HS256'])
+
+        with self.assertRaises(JWKError):
+            self.backend.construct_key({'kty': 'oct', 'k': 'c2VjcmV0'},
+                                       'RS256')
+        with self.assertRaises(JWKError):
+            self.backend.construct_key(
+                self.backend.construct_key(public_jwk, 'RS256'), 'HS256'
+            )
+
+    def test_jose_key(self):
+        """
+        Case: A key object of python-jose is given
+        Expected: It's converted and used for the verification
+        """
+        pem, public_jwk = generate_key('key-1')
+        token = sign(self.claims, pem, 'key-1')
+
+        self.assertEqual(
+            self.backend.decode(token, jwk.construct(public_jwk, 'RS256'),
+                                algorithms=['RS256'], audience='client'),
+            self.claims
+        )
+
+
+class JoseBackendTestCase(TestCase):
+
+    @mock.patch('keycloak.jwt_backends.JOSE_KEY_OBJECTS', False)
+    def test_decode_without_key_objects(self):
+        """
+        Case: Tokens get decoded with key objects by a python-jose version
+              which only verifies with JWKs
+        Expected: The key objects are passed as JWKs
+        """
+        pem, public_jwk = generate_key('key-1')
+        key = jwk.construct(public_jwk, 'RS256')
+        token = sign({'sub': 'user'}, pem, 'key-1')
+
+        with mock.patch('keycloak.jwt_backends.jwt.decode',
+                        wraps=jwt.decode) as decode:
+            for keys in (key, [key]):
+                self.assertEqual(
+                    JoseBackend().decode(token, keys, algorithms=['RS256']),
+                    {'sub': 'user'}
+                )
+
+        self.assertEqual(decode.call_args_list[0][0][1], key.to_dict())
+        self.assertEqual(decode.call_args_list[1][0][1], [key.to_dict()])
+
+
+class GetBackendTestCase(TestCase):
+
+    def test_get_backend(self):
+        self.assertIsInstance(get_backend(), JoseBackend)
+        self.assertIsInstance(get_backend('cryptography'),
+                              CryptographyBackend)
+
+        backend = JoseBackend()
+        self.assertIs(get_backend(backend), backend)
+
+        with self.assertRaises(ValueError):
+            get_backend('unknown')
+
+
+class PrevalidateTestCase(TestCase):
+
+    def setUp(self):
+        self.pem = generate_key('key-1')[0]
+        self.claims = {'sub': 'user', 'aud': 'client'}
+
+    def test_prevalidate(self):
+        """
+        Case: A token get pre-validated
+        Expected: The unverified header is returned, at_hash isn't checked
+        """
+        token = sign(dict(self.claims, at_hash='hash'), self.pem, 'key-1')
+
+        self.assertEqual(
+            prevalidate(token, algorithms=['RS256'], audience='client'),
+            {'alg': 'RS256', 'kid': 'key-1', 'typ': 'JWT'}
+        )
+
+    def test_prevalidate_invalid(self):
+        with self.assertRaises(ExpiredSignatureError):
+            prevalidate(sign(dict(self.claims, exp=1), self.pem, 'key-1'),
+                        algorithms=['RS256'], audience='client')
+        with self.assertRaises(JWTError):
+            prevalidate(sign(self.claims, self.pem, 'key-1'),
+                        algorithms='ES256', audience='client')
+        with self.assertRaises(JWTError):
+            prevalidate('e30.W10.', algorithms=['RS256'])
+        with self.assertRaises(JWTError):
+            prevalidate(sign(self.claims, self.pem, ['key-1']),
+                        algorithms=['RS256'], audience='client')
+
+    def test_prevalidate_unverified(self):
+        """
+        Case: A token with another algorithm is pre-validated without
+              verifying the signature
+        Expected: The algorithm isn't checked, like in python-jose
+        """
+        token = sign(self.claims, self.pem, 'key-1')
+
+        self.assertEqual(
+            prevalidate(token, algorithms=['ES256'], audience='client',
+                        options={'verify_signature': False})['alg'],
+            'RS256'
+        )
+
+    def test_validate_claims_text(self):
+        """
+        Case: Claims and options are text, which json.loads returns on
+              Python 2
+        Expected: They are accepted as strings
+        """
+        validate_claims({u'sub': u'user', u'aud': [u'client'],
+                         u'iss': u'https://issuer', u'jti': u'id'},
+                        audience=u'client', issuer=u'https://issuer',
+                        subject=u'user')
+        prevalidate(sign(self.claims, self.pem, u'key-1'),
+                    algorithms=u'RS256', audience=u'client')
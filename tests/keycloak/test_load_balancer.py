@@ -0,0 +1,314 @@
+import socket
+import threading
+import time
+from unittest import TestCase
+
+from requests.exceptions import ConnectionError
+
+from keycloak.client import KeycloakClient
+from keycloak.load_balancer import (
+    STRATEGY_EWMA,
+    LoadBalancer,
+)
+from keycloak.retry import RetryPolicy
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Send the headers and body in one segment, delayed ACKs would make the
+    # latencies unpredictable otherwise.
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.paths.append(self.path)
+            server.clients.append(self.headers.get('X-Client'))
+        time.sleep(server.delay)
+        body = b'{}'
+        self.send_response(server.status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, status=200, delay=0):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), StubHandler)
+        self.lock = threading.Lock()
+        self.paths = []
+        self.clients = []
+        self.status = status
+        self.delay = delay
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server_address[1])
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def get_unused_url():
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return 'http://127.0.0.1:{}'.format(port)
+
+
+class LoadBalancerTestCase(TestCase):
+
+    def test_least_outstanding(self):
+        """
+        Case: Nodes are selected while earlier requests are outstanding
+        Expected: The node with the least outstanding requests is selected
+        """
+        balancer = LoadBalancer(['http://node-1/', 'http://node-2'])
+
+        first = balancer.select()
+        second = balancer.select()
+        self.assertNotEqual(first, second)
+        self.assertEqual(second.url, ({'http://node-1', 'http://node-2'} -
+                                      {first.url}).pop())
+
+        balancer.release(first, 0.1)
+        self.assertIs(balancer.select(), first)
+
+    def test_ewma(self):
+        """
+        Case: A node responded slower than the other
+        Expected: The faster node is selected until its outstanding requests
+                  outweigh the latency
+        """
+        balancer = LoadBalancer(['http://node-1', 'http://node-2'],
+                                strategy=STRATEGY_EWMA, decay=0.5)
+        fast, slow = balancer.nodes
+        for node, latency in ((fast, 0.1), (slow, 0.35)):
+            balancer.select()
+            balancer.release(node, latency)
+
+        self.assertEqual([balancer.select() for _ in range(3)],
+                         [fast, fast, fast])
+        self.assertIs(balancer.select(), slow)
+
+        balancer.release(fast, 0.5)
+        self.assertAlmostEqual(fast.latency, 0.3)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            LoadBalancer([])
+        with self.assertRaises(ValueError):
+            LoadBalancer(['http://node-1'], strategy='round_robin')
+
+
+class LoadBalancedClientTestCase(TestCase):
+
+    def setUp(self):
+        self.servers = []
+        self.balancer = None
+
+    def tearDown(self):
+        if self.balancer is not None:
+            self.balancer.stop(timeout=1)
+        for server in self.servers:
+            server.stop()
+
+    def start_server(self, **kwargs):
+        server = StubServer(**kwargs)
+        self.servers.append(server)
+        return server
+
+    def get_client(self, urls, **kwargs):
+        self.balancer = LoadBalancer(urls, **kwargs)
+        client = KeycloakClient(server_url='https://example.com',
+                                headers={'X-Client': 'test'},
+                                load_balancer=self.balancer,
+                                retry_policy=RetryPolicy(backoff_factor=0))
+        self.addCleanup(client.close)
+        return client
+
+    def test_spread(self):
+        """
+        Case: Concurrent requests are done against two nodes
+        Expected: The requests are spread across the nodes, the path is kept
+        """
+        servers = [self.start_server(delay=0.02) for _ in range(2)]
+        client = self.get_client([server.url for server in servers])
+
+        workers = [
+            threading.Thread(target=client.get,
+                             args=('https://example.com/auth/realms/test',))
+            for _ in range(10)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        for server in servers:
+            self.assertGreaterEqual(len(server.paths), 3)
+            self.assertEqual(set(server.paths), {'/auth/realms/test'})
+        self.assertEqual(
+            [node.outstanding for node in self.balancer.nodes], [0, 0]
+        )
+
+    def test_ewma_prefers_fast_node(self):
+        """
+        Case: One of the nodes responds slowly
+        Expected: With the EWMA strategy most requests go to the fast node
+        """
+        fast = self.start_server()
+        slow = self.start_server(delay=0.05)
+        client = self.get_client([fast.url, slow.url],
+                                 strategy=STRATEGY_EWMA)
+
+        for _ in range(20):
+            client.get('https://example.com/auth/realms/test')
+
+        self.assertLessEqual(len(slow.paths), 2)
+        self.assertGreaterEqual(len(fast.paths), 18)
+
+    def test_eject_and_probe(self):
+        """
+        Case: A node responds with server errors and recovers later on
+        Expected: It's ejected after the failure threshold, requests are
+                  retried on the other node, and it's put back after a
+                  background probe through the session of the client
+                  succeeded
+        """
+        healthy = self.start_server()
+        failing = self.start_server(status=503)
+        client = self.get_client([healthy.url, failing.url],
+                                 failure_threshold=2, probe_interval=0.05)
+
+        for _ in range(10):
+            client.get('https://example.com/auth/realms/test')
+
+        node = self.balancer.nodes[1]
+        self.assertTrue(node.ejected)
+        self.assertEqual(failing.paths.count('/auth/realms/test'), 2)
+
+        failing.status = 200
+        for _ in range(50):
+            if not node.ejected:
+                break
+            time.sleep(0.02)
+        self.assertFalse(node.ejected)
+        self.assertIn('/auth/realms/master', failing.paths)
+        self.assertEqual(set(failing.clients), {'test'})
+
+    def test_probe(self):
+        """
+        Case: Nodes are probed which serve the realm, respond with a server
+              error or don't serve the realm
+        Expected: Only the probe of the first succeeds
+        """
+        servers = [self.start_server(status=status)
+                   for status in (200, 503, 404)]
+        self.balancer = LoadBalancer([server.url for server in servers])
+
+        self.assertEqual(
+            [self.balancer.probe(node) is not None
+             for node in self.balancer.nodes],
+            [True, False, False]
+        )
+        for server in servers:
+            self.assertEqual(server.paths, ['/auth/realms/master'])
+
+    def test_close(self):
+        """
+        Case: The client is closed while a node is ejected
+        Expected: The probing thread is stopped
+        """
+        client = self.get_client([get_unused_url()], failure_threshold=1,
+                                 probe_interval=60)
+        with self.assertRaises(ConnectionError):
+            client.get('https://example.com/auth/realms/test')
+        self.assertIsNotNone(self.balancer._thread)
+
+        client.close()
+
+        self.assertIsNone(self.balancer._thread)
+
+    def test_node_down(self):
+        """
+        Case: A node doesn't accept connections
+        Expected: The requests fail over to the other node, the node is
+                  ejected
+        """
+        healthy = self.start_server()
+        client = self.get_client([get_unused_url(), healthy.url],
+                                 failure_threshold=1, probe_interval=60)
+
+        # Ties are broken randomly, the node which is down is selected
+        # before long.
+        for _ in range(20):
+            client.get('https://example.com/auth/realms/test')
+
+        self.assertEqual(len(healthy.paths), 20)
+        self.assertTrue(self.balancer.nodes[0].ejected)
+
+    def test_all_nodes_down(self):
+        """
+        Case: All nodes are ejected
+        Expected: Requests are still sent to them
+        """
+        client = self.get_client([get_unused_url()], failure_threshold=1,
+                                 probe_interval=60)
+
+        with self.assertRaises(ConnectionError):
+            client.get('https://example.com/auth/realms/test')
+        self.assertTrue(self.balancer.nodes[0].ejected)
+
+        with self.assertRaises(ConnectionError):
+            client.get('https://example.com/auth/realms/test')
+
+    def test_other_server(self):
+        """
+        Case: A request is done to another server than the server URL
+        Expected: It isn't load balanced
+        """
+        server = self.start_server()
+        client = self.get_client(['http://127.0.0.1:1'])
+
+        client.get(server.url + '/auth/realms/test')
+
+        self.assertEqual(server.paths, ['/auth/realms/test'])
+        self.assertEqual(self.balancer.nodes[0].outstanding, 0)
+
+    def test_server_url_prefix(self):
+        """
+        Case: Requests are done to hosts and paths which only start with the
+              server URL
+        Expected: They aren't load balanced
+        """
+        self.balancer = LoadBalancer(['http://node-1'])
+        client = KeycloakClient(server_url='https://kc',
+                                load_balancer=self.balancer)
+
+        for url in ('https://kc2/realms/test',
+                    'https://kc.evil.example/realms/test'):
+            self.assertEqual(client._select_node(url), (None, url))
+
+        node, url = client._select_node('https://kc/realms/test')
+        self.assertEqual(url, 'http://node-1/realms/test')
+        self.balancer.release(node, 0)
@@ -1,31 +1,51 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from unittest import TestCase
 
 import mock
+from jose import jwk
+from jose.exceptions import ExpiredSignatureError, JWTClaimsError, JWTError
 
+from keycloak.jwks import KeycloakJWKS
+from keycloak.jwt_backends import CryptographyBackend, JWTBackend, JoseBackend
 from keycloak.openid_connect import KeycloakOpenidConnect
 from keycloak.realm import KeycloakRealm
 from keycloak.well_known import KeycloakWellKnown
+from tests.keycloak.keys import generate_key, sign
+
+PEM, PUBLIC_JWK = generate_key('key-1')
 
 
 class KeycloakOpenidConnectTestCase(TestCase):
 
     def setUp(self):
         self.realm = mock.MagicMock(spec_set=KeycloakRealm)
+        self.realm.snapshot = None
         self.client_id = 'client-id'
         self.client_secret = 'client-secret'
+        self.backend = mock.MagicMock(spec=JWTBackend)
+        self.token = sign({'sub': 'user', 'aud': self.client_id}, PEM,
+                          'key-1')
+
+        self.openid_client = self._get_client()
 
-        self.openid_client = KeycloakOpenidConnect(
+    def _get_client(self, **kwargs):
+        openid_client = KeycloakOpenidConnect(
             realm=self.realm,
             client_id=self.client_id,
-            client_secret=self.client_secret
+            client_secret=self.client_secret,
+            **kwargs
         )
-        self.openid_client.well_known.contents = {
+        openid_client.well_known.contents = {
             'end_session_endpoint': 'https://logout',
             'jwks_uri': 'https://certs',
             'userinfo_endpoint': 'https://userinfo',
             'authorization_endpoint': 'https://authorization',
-            'token_endpoint': 'https://token'
+            'token_endpoint': 'https://token',
+            'introspection_endpoint': 'https://introspect'
         }
+        return openid_client
 
     def test_well_known(self):
         """
@@ -37,12 +57,336 @@ class KeycloakOpenidConnectTestCase(TestCase):
         self.assertIsInstance(well_known, KeycloakWellKnown)
         self.assertEqual(well_known, self.openid_client.well_known)
 
-    @mock.patch('keycloak.openid_connect.jwt')
-    def test_decode_token(self, patched_jwt):
-        self.openid_client.decode_token(token='test-token', key='test-key')
-        patched_jwt.decode.assert_called_once_with('test-token', 'test-key',
-                                                   algorithms=['RS256'],
-                                                   audience=self.client_id)
+    def test_decode_token(self):
+        self.openid_client = self._get_client(backend=self.backend)
+        self.openid_client.decode_token(token=self.token, key='test-key')
+        self.backend.decode.assert_called_once_with(self.token, 'test-key',
+                                                    algorithms=['RS256'],
+                                                    audience=self.client_id)
+
+    def test_decode_token_prevalidate(self):
+        """
+        Case: Tokens get decoded which are expired, for another audience or
+              issuer, signed with a not allowed algorithm or malformed
+        Expected: They are rejected before the signature get verified
+        """
+        self.openid_client = self._get_client(backend=self.backend)
+        claims = {'sub': 'user', 'aud': self.client_id}
+        cases = [
+            (sign(dict(claims, exp=1), PEM, 'key-1'), {},
+             ExpiredSignatureError),
+            (sign(dict(claims, aud='other'), PEM, 'key-1'), {},
+             JWTClaimsError),
+            (sign(dict(claims, iss='other'), PEM, 'key-1'),
+             {'issuer': 'https://issuer'}, JWTClaimsError),
+            (sign(claims, PEM, 'key-1'), {'algorithms': ['ES256']},
+             JWTError),
+            ('not-a-token', {}, JWTError),
+        ]
+        for token, kwargs, error in cases:
+            with self.assertRaises(error):
+                self.openid_client.decode_token(token, **kwargs)
+
+        self.assertFalse(self.backend.decode.called)
+        self.assertFalse(self.realm.client.get.called)
+
+    def test_backend(self):
+        """
+        Case: A client is created with or without a backend
+        Expected: jose is the default, cryptography can be selected by name
+        """
+        self.assertIsInstance(self.openid_client._backend, JoseBackend)
+        self.assertIsInstance(
+            self._get_client(backend='cryptography')._backend,
+            CryptographyBackend
+        )
+        with self.assertRaises(ValueError):
+            self._get_client(backend='unknown')
+
+    def test_decode_token_jwks(self):
+        """
+        Case: A token get decoded without passing a key
+        Expected: The key matching the kid get taken from the cached JWKS
+        """
+        self.openid_client = self._get_client(backend=self.backend)
+        self.realm.client.get.return_value = {
+            'keys': [generate_key('key-1')[1], generate_key('key-2')[1]]
+        }
+        token = sign({'sub': 'user'}, PEM, 'key-2')
+
+        self.openid_client.decode_token(token=token)
+        self.openid_client.decode_token(token=token)
+
+        self.realm.client.get.assert_called_once_with('https://certs')
+        self.backend.decode.assert_called_with(
+            token, self.openid_client.jwks.get_key('key-2'),
+            algorithms=['RS256'], audience=self.client_id
+        )
+
+    def test_decode_token_signed(self):
+        """
+        Case: A signed token get decoded with the keys of the realm
+        Expected: The claims get returned by every backend
+        """
+        for backend, algorithm in [('cryptography', 'RS256'),
+                                   ('cryptography', 'ES256'),
+                                   ('jose', 'RS256'),
+                                   ('jose', 'ES256')]:
+            openid_client = self._get_client(backend=backend)
+            pem, public_jwk = generate_key('key-1', algorithm)
+            self.realm.client.get.return_value = {'keys': [public_jwk]}
+            token = sign({'sub': 'user', 'aud': self.client_id}, pem,
+                         'key-1', algorithm)
+
+            self.assertEqual(
+                openid_client.decode_token(token, algorithms=[algorithm]),
+                {'sub': 'user', 'aud': self.client_id}
+            )
+
+    def test_decode_token_unknown_kid(self):
+        """
+        Case: A token get decoded which is signed with an unknown key
+        Expected: JWTError get raised
+        """
+        self.realm.client.get.return_value = {
+            'keys': [generate_key('key-1')[1]]
+        }
+        self.openid_client = self._get_client(backend=self.backend)
+        with self.assertRaises(JWTError):
+            self.openid_client.decode_token(
+                token=sign({'sub': 'user'}, PEM, 'key-2')
+            )
+        self.assertFalse(self.backend.decode.called)
+
+    def test_decode_token_invalid_kid(self):
+        """
+        Case: A token get decoded of which the kid in the header isn't a
+              string
+        Expected: JWTError get raised before the key is looked up
+        """
+        self.openid_client = self._get_client(backend=self.backend)
+        for kid in (['key-1'], {}, 1):
+            with self.assertRaises(JWTError):
+                self.openid_client.decode_token(
+                    token=sign({'sub': 'user'}, PEM, kid)
+                )
+        self.assertFalse(self.realm.client.get.called)
+        self.assertFalse(self.backend.decode.called)
+
+    @mock.patch('keycloak.openid_connect.time')
+    def test_decode_token_cache(self, patched_time):
+        """
+        Case: The same token get decoded twice with the token cache enabled
+        Expected: The signature only get verified once until the token
+                  expires
+        """
+        self.openid_client = self._get_client(backend=self.backend,
+                                              token_cache_size=10)
+        patched_time.time.return_value = 1000
+        self.backend.decode.return_value = {'sub': 'user', 'exp': 1060}
+
+        claims = self.openid_client.decode_token(token=self.token,
+                                                 key='test-key')
+        self.assertEqual(claims, {'sub': 'user', 'exp': 1060})
+        self.assertEqual(
+            self.openid_client.decode_token(token=self.token,
+                                            key='test-key'),
+            claims
+        )
+        self.backend.decode.assert_called_once_with(self.token, 'test-key',
+                                                    algorithms=['RS256'],
+                                                    audience=self.client_id)
+
+        # Different verification options are cached separately
+        self.openid_client.decode_token(token=self.token, key='test-key',
+                                        subject='user')
+        self.assertEqual(self.backend.decode.call_count, 2)
+
+    @mock.patch('keycloak.openid_connect.time')
+    def test_decode_token_cache_expired(self, patched_time):
+        """
+        Case: A token is decoded which is about to expire
+        Expected: The result isn't cached beyond the expiry of the token
+        """
+        self.openid_client = self._get_client(backend=self.backend,
+                                              token_cache_size=10)
+        patched_time.time.return_value = 1000
+        self.backend.decode.return_value = {'sub': 'user', 'exp': 1000}
+
+        self.openid_client.decode_token(token=self.token, key='test-key')
+        self.openid_client.decode_token(token=self.token, key='test-key')
+
+        self.assertEqual(self.backend.decode.call_count, 2)
+        self.assertEqual(len(self.openid_client.token_cache), 0)
+
+    def test_decode_token_cache_key_object(self):
+        """
+        Case: A token is decoded with a key object, afterwards with another
+              key object which has the same representation, like an object
+              at a reused memory address
+        Expected: The key objects are told apart, the signature of the
+                  second decode is verified and fails
+        """
+        self.openid_client = self._get_client(token_cache_size=10)
+        key = jwk.construct(PUBLIC_JWK, 'RS256')
+        other_key = jwk.construct(generate_key('key-1')[1], 'RS256')
+        token = sign({'sub': 'user', 'aud': self.client_id,
+                      'exp': int(time.time()) + 60}, PEM, 'key-1')
+
+        with mock.patch.object(type(key), '__repr__',
+                               return_value='<key>'):
+            self.openid_client.decode_token(token, key=key)
+            with self.assertRaises(JWTError):
+                self.openid_client.decode_token(token, key=other_key)
+
+        self.assertEqual(len(self.openid_client.token_cache), 1)
+
+    def test_decode_token_cache_unserializable_key(self):
+        """
+        Case: A token is decoded with a key object which has no stable
+              representation
+        Expected: The result isn't cached
+        """
+        self.openid_client = self._get_client(backend=self.backend,
+                                              token_cache_size=10)
+        self.backend.decode.return_value = {
+            'sub': 'user', 'exp': int(time.time()) + 60
+        }
+
+        self.openid_client.decode_token(token=self.token, key=object())
+        self.openid_client.decode_token(token=self.token, key=object())
+
+        self.assertEqual(self.backend.decode.call_count, 2)
+        self.assertEqual(len(self.openid_client.token_cache), 0)
+
+    @mock.patch('keycloak.openid_connect.time')
+    def test_decode_token_cache_exp_string(self, patched_time):
+        """
+        Case: A token is decoded of which the exp claim is a numeric string
+        Expected: It's cached until it expires
+        """
+        self.openid_client = self._get_client(backend=self.backend,
+                                              token_cache_size=10)
+        patched_time.time.return_value = 1000
+        self.backend.decode.return_value = {'sub': 'user', 'exp': '1060'}
+
+        self.openid_client.decode_token(token=self.token, key='test-key')
+        self.openid_client.decode_token(token=self.token, key='test-key')
+
+        self.assertEqual(self.backend.decode.call_count, 1)
+
+        self.backend.decode.return_value = {'sub': 'user', 'exp': 'never'}
+        self.openid_client.decode_token(token=self.token, key='other-key')
+        self.assertEqual(len(self.openid_client.token_cache), 1)
+
+    def _signed_tokens(self):
+        pem, public_jwk = generate_key('key-1')
+        other_pem = generate_key('key-2')[0]
+        self.realm.client.get.return_value = {'keys': [public_jwk]}
+        claims = {'sub': 'user', 'aud': self.client_id}
+
+        return [
+            sign(claims, pem, 'key-1'),
+            sign(dict(claims, exp=int(time.time()) - 60), pem, 'key-1'),
+            sign(claims, other_pem, 'key-2'),
+            'not-a-token',
+            sign(claims, pem, {'kid': 'key-1'}),
+            sign(dict(claims, sub='other'), pem, 'key-1'),
+        ]
+
+    def _assert_decode_results(self, tokens, results):
+        self.assertEqual([result.token for result in results], tokens)
+        self.assertEqual([result.ok for result in results],
+                         [True, False, False, False, False, True])
+        self.assertEqual(results[0].claims['sub'], 'user')
+        self.assertEqual(results[5].claims['sub'], 'other')
+        self.assertIsInstance(results[1].error, ExpiredSignatureError)
+        self.assertIsInstance(results[2].error, JWTError)
+        self.assertIsInstance(results[3].error, JWTError)
+        self.assertIsInstance(results[4].error, JWTError)
+
+    def test_decode_tokens(self):
+        """
+        Case: A batch of valid and invalid tokens get decoded, one of them
+              has a forged kid
+        Expected: A result per token is returned in order
+        """
+        tokens = self._signed_tokens()
+        results = list(self.openid_client.decode_tokens(tokens))
+
+        self._assert_decode_results(tokens, results)
+
+    def test_decode_tokens_thread_pool(self):
+        """
+        Case: A batch of tokens get decoded in a thread pool
+        Expected: A result per token is returned in order
+        """
+        tokens = self._signed_tokens()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(self.openid_client.decode_tokens(
+                iter(tokens), executor=executor, chunksize=2, max_pending=1
+            ))
+
+        self._assert_decode_results(tokens, results)
+        self.realm.client.get.assert_called_once_with('https://certs')
+
+    def test_decode_tokens_process_pool(self):
+        """
+        Case: A batch of tokens get decoded in a process pool
+        Expected: A result per token is returned in order and the JWKS is
+                  only fetched once
+        """
+        tokens = self._signed_tokens()
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            results = list(self.openid_client.decode_tokens(
+                iter(tokens), executor=executor, chunksize=2
+            ))
+
+        self._assert_decode_results(tokens, results)
+        self.realm.client.get.assert_called_once_with('https://certs')
+
+    def test_jwks(self):
+        jwks = self.openid_client.jwks
+
+        self.assertIsInstance(jwks, KeycloakJWKS)
+        self.assertIs(jwks, self.openid_client.jwks)
+
+    @mock.patch('keycloak.openid_connect.SharedKeycloakJWKS', autospec=True)
+    def test_jwks_shared(self, shared_jwks):
+        """
+        Case: The client is configured to share the JWKS between processes
+        Expected: The JWKS is backed by the shared file, which is closed
+                  with the client
+        """
+        self.openid_client = self._get_client(jwks_shared_path='/tmp/jwks')
+
+        self.assertIs(self.openid_client.jwks, shared_jwks.return_value)
+        shared_jwks.assert_called_once_with(
+            realm=self.realm, path='https://certs', ttl=300,
+            refetch_interval=10, negative_ttl=60,
+            backend=self.openid_client._backend, stale_ttl=0,
+            shared_path='/tmp/jwks'
+        )
+
+        self.openid_client.close()
+        shared_jwks.return_value.close.assert_called_once_with()
+
+    @mock.patch('keycloak.openid_connect.BackgroundRefresher', autospec=True)
+    def test_background_refresh(self, refresher):
+        """
+        Case: The client is configured to refresh the JWKS in the background
+        Expected: The refresher is started with the JWKS and stopped on close
+        """
+        self.openid_client = self._get_client(background_refresh=True)
+
+        jwks = self.openid_client.jwks
+        refresher.assert_called_once_with(
+            jwks=jwks, well_known=self.openid_client.well_known
+        )
+        refresher.return_value.start.assert_called_once_with()
+
+        self.openid_client.close()
+        refresher.return_value.stop.assert_called_once_with()
 
     def test_logout(self):
         result = self.openid_client.logout(refresh_token='refresh-token')
@@ -56,6 +400,64 @@ class KeycloakOpenidConnectTestCase(TestCase):
         )
         self.assertEqual(result, self.realm.client.post.return_value)
 
+    def test_introspect(self):
+        result = self.openid_client.introspect(token='token',
+                                               token_type_hint='access_token')
+        self.realm.client.post.assert_called_once_with(
+            'https://introspect',
+            data={
+                'token': 'token',
+                'token_type_hint': 'access_token',
+                'client_id': self.client_id,
+                'client_secret': self.client_secret
+            }
+        )
+        self.assertEqual(result, self.realm.client.post.return_value)
+
+    @mock.patch('keycloak.openid_connect.time')
+    def test_introspect_cache(self, patched_time):
+        """
+        Case: An active token is introspected twice with the introspection
+              cache enabled
+        Expected: The endpoint is only requested once and the result is
+                  cached no longer than the token is valid
+        """
+        self.openid_client = self._get_client(introspection_cache_size=10,
+                                              introspection_cache_ttl=60)
+        patched_time.time.return_value = 1000
+        self.realm.client.post.return_value = {'active': True, 'exp': 1030}
+
+        with mock.patch('keycloak.cache.monotonic') as monotonic:
+            monotonic.return_value = 0
+            result = self.openid_client.introspect(token='token')
+            self.assertEqual(self.openid_client.introspect(token='token'),
+                             result)
+            self.assertEqual(self.realm.client.post.call_count, 1)
+
+            monotonic.return_value = 30
+            self.openid_client.introspect(token='token')
+            self.assertEqual(self.realm.client.post.call_count, 2)
+
+    def test_introspect_cache_inactive(self):
+        """
+        Case: An inactive token is introspected twice with the introspection
+              cache enabled
+        Expected: The result is cached for the negative TTL
+        """
+        self.openid_client = self._get_client(introspection_cache_size=10,
+                                              introspection_negative_ttl=5)
+        self.realm.client.post.return_value = {'active': False}
+
+        with mock.patch('keycloak.cache.monotonic') as monotonic:
+            monotonic.return_value = 0
+            self.openid_client.introspect(token='token')
+            self.openid_client.introspect(token='token')
+            self.assertEqual(self.realm.client.post.call_count, 1)
+
+            monotonic.return_value = 5
+            self.openid_client.introspect(token='token')
+            self.assertEqual(self.realm.client.post.call_count, 2)
+
     def test_certs(self):
         result = self.openid_client.certs()
         self.realm.client.get('https://certs')
@@ -72,6 +474,49 @@ class KeycloakOpenidConnectTestCase(TestCase):
         )
         self.assertEqual(result, self.realm.client.get.return_value)
 
+    @mock.patch('keycloak.openid_connect.time')
+    def test_userinfo_cache(self, patched_time):
+        """
+        Case: The userinfo is requested twice for the same token with the
+              userinfo cache enabled
+        Expected: The endpoint is only requested once, the response is
+                  cached no longer than the token is valid and hits and
+                  misses are counted
+        """
+        self.openid_client = self._get_client(userinfo_cache_size=10,
+                                              userinfo_cache_ttl=60)
+        patched_time.time.return_value = 1000
+        token = sign({'sub': 'user', 'exp': 1030}, PEM, 'key-1')
+        self.realm.client.get.return_value = {'sub': 'user'}
+
+        with mock.patch('keycloak.cache.monotonic') as monotonic:
+            monotonic.return_value = 0
+            result = self.openid_client.userinfo(token=token)
+            self.assertEqual(self.openid_client.userinfo(token=token),
+                             result)
+            self.assertEqual(self.realm.client.get.call_count, 1)
+
+            monotonic.return_value = 30
+            self.openid_client.userinfo(token=token)
+            self.assertEqual(self.realm.client.get.call_count, 2)
+
+        self.assertEqual(self.openid_client.userinfo_cache.hits, 1)
+        self.assertEqual(self.openid_client.userinfo_cache.misses, 2)
+
+    def test_userinfo_cache_opaque_token(self):
+        """
+        Case: The userinfo is requested for tokens which aren't JWTs
+        Expected: The responses are cached per token for the cache TTL
+        """
+        self.openid_client = self._get_client(userinfo_cache_size=10)
+        self.realm.client.get.return_value = {'sub': 'user'}
+
+        self.openid_client.userinfo(token='token')
+        self.openid_client.userinfo(token='token')
+        self.openid_client.userinfo(token='other-token')
+
+        self.assertEqual(self.realm.client.get.call_count, 2)
+
     def test_authorization_url(self):
         result = self.openid_client.authorization_url(
             redirect_uri='https://redirect-url',
@@ -117,6 +562,42 @@ class KeycloakOpenidConnectTestCase(TestCase):
         )
         self.assertEqual(response, self.realm.client.post.return_value)
 
+    def test_client_credentials_manager(self):
+        """
+        Case: A client credentials token is requested twice through the
+              manager
+        Expected: The token endpoint is requested once
+        """
+        self.realm.client.post.return_value = {
+            'access_token': 'token', 'expires_in': 300
+        }
+        manager = self.openid_client.client_credentials_manager(scope='scope')
+
+        self.assertEqual(manager.get_token(), 'token')
+        self.assertEqual(manager.get_token(), 'token')
+        self.realm.client.post.assert_called_once_with(
+            'https://token',
+            data={
+                'grant_type': 'client_credentials',
+                'client_id': self.client_id,
+                'client_secret': self.client_secret,
+                'scope': 'scope'
+            }
+        )
+
+    def test_token_session(self):
+        """
+        Case: A session is created for a token response
+        Expected: The access token is used until it expires
+        """
+        session = self.openid_client.token_session(
+            {'access_token': 'token', 'expires_in': 300,
+             'refresh_token': 'refresh-token'}
+        )
+
+        self.assertEqual(session.get_token(), 'token')
+        self.realm.client.post.assert_not_called()
+
     def test_refresh_token(self):
         response = self.openid_client.refresh_token(
             refresh_token='refresh-token',
@@ -151,3 +632,117 @@ class KeycloakOpenidConnectTestCase(TestCase):
             }
         )
         self.assertEqual(response, self.realm.client.post.return_value)
+
+    def test_token_exchange_cache(self):
+        """
+        Case: The same token exchange is done twice, and once for another
+              audience, with the token exchange cache enabled
+        Expected: Identical exchanges are only requested once until the
+                  exchanged token is about to expire
+        """
+        self.openid_client = self._get_client(token_exchange_cache_size=10,
+                                              token_exchange_margin=30)
+        self.realm.client.post.return_value = {
+            'access_token': 'exchanged', 'expires_in': 60
+        }
+
+        with mock.patch('keycloak.cache.monotonic') as monotonic:
+            monotonic.return_value = 0
+            response = self.openid_client.token_exchange(
+                subject_token='some-token', audience='some-audience'
+            )
+            self.assertEqual(
+                self.openid_client.token_exchange(
+                    subject_token='some-token', audience='some-audience'
+                ),
+                response
+            )
+            self.assertEqual(self.realm.client.post.call_count, 1)
+
+            self.openid_client.token_exchange(subject_token='some-token',
+                                              audience='other-audience')
+            self.assertEqual(self.realm.client.post.call_count, 2)
+
+            monotonic.return_value = 30
+            self.openid_client.token_exchange(subject_token='some-token',
+                                              audience='some-audience')
+            self.assertEqual(self.realm.client.post.call_count, 3)
+
+    def test_token_exchange_coalesce(self):
+        """
+        Case: The same token exchange is done by multiple threads at once
+        Expected: It's requested once
+        """
+        self.openid_client = self._get_client(token_exchange_cache_size=10)
+        entered = threading.Event()
+        release = threading.Event()
+
+        def post(url, data):
+            entered.set()
+            release.wait(5)
+            return {'access_token': 'exchanged', 'expires_in': 60}
+
+        self.realm.client.post.side_effect = post
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(
+                self.openid_client.token_exchange(subject_token='some-token',
+                                                  audience='some-audience')
+            )) for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        self.assertTrue(entered.wait(5))
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 5)
+        self.assertEqual(self.realm.client.post.call_count, 1)
+
+    def test_coalesce_grant_types(self):
+        """
+        Case: Threads request the client credentials grant with the same
+              scopes in another order and the password grant at once, with
+              coalescing of the client credentials grant enabled
+        Expected: The client credentials grant is requested once and every
+                  thread gets its own copy of the response, the password
+                  grant is requested by every thread
+        """
+        self.openid_client = self._get_client(
+            coalesce_grant_types=('client_credentials',)
+        )
+        entered = threading.Event()
+        release = threading.Event()
+
+        def post(url, data):
+            entered.set()
+            release.wait(5)
+            return {'access_token': 'token', 'expires_in': 60}
+
+        self.realm.client.post.side_effect = post
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda scope=scope: results.append(
+                self.openid_client.client_credentials(scope=scope)
+            )) for scope in ['profile email', 'email profile'] * 3
+        ]
+        for thread in threads:
+            thread.start()
+        self.assertTrue(entered.wait(5))
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.realm.client.post.call_count, 1)
+        self.assertEqual(len(results), 6)
+        self.assertEqual(len(set(id(result) for result in results)), 6)
+
+        self.openid_client.password_credentials(username='user',
+                                                password='secret')
+        self.openid_client.password_credentials(username='user',
+                                                password='secret')
+        self.assertEqual(self.realm.client.post.call_count, 3)
@@ -7,6 +7,7 @@ from keycloak.authz import KeycloakAuthz
 from keycloak.client import KeycloakClient
 from keycloak.openid_connect import KeycloakOpenidConnect
 from keycloak.realm import KeycloakRealm
+from keycloak.snapshot import RealmSnapshot
 from keycloak.uma import KeycloakUMA
 
 
@@ -39,6 +40,20 @@ class KeycloakRealmTestCase(TestCase):
         mocked_client.assert_called_once_with(server_url='https://example.com',
                                               headers={'some': 'header'})
 
+    @mock.patch('keycloak.realm.KeycloakClient', autospec=True)
+    def test_client_options(self, mocked_client):
+        """
+        Case: The realm is created with connection pool options
+        Expected: They're passed to the client
+        """
+        realm = KeycloakRealm('https://example.com', 'some-realm',
+                              pool_maxsize=64, keep_alive=30)
+        realm.client
+
+        mocked_client.assert_called_once_with(server_url='https://example.com',
+                                              headers=None, pool_maxsize=64,
+                                              keep_alive=30)
+
     @mock.patch('keycloak.realm.KeycloakOpenidConnect', autospec=True)
     def test_openid_connect(self, mocked_openid_client):
         """
@@ -90,3 +105,15 @@ class KeycloakRealmTestCase(TestCase):
 
         self.assertIsInstance(uma_client, KeycloakUMA)
         mocked_uma_client.assert_called_once_with(realm=self.realm)
+
+    def test_snapshot(self):
+        """
+        Case: Realm is instantiated with and without a snapshot path
+        Expected: The snapshot is only available when a path is given
+        """
+        self.assertIsNone(self.realm.snapshot)
+
+        realm = KeycloakRealm('https://example.com', 'some-realm',
+                              snapshot_path='/tmp/snapshot.json')
+        self.assertIsInstance(realm.snapshot, RealmSnapshot)
+        self.assertEqual(realm.snapshot.path, '/tmp/snapshot.json')
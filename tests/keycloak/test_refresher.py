@@ -0,0 +1,61 @@
+import threading
+from unittest import TestCase
+
+import mock
+
+from keycloak.jwks import KeycloakJWKS
+from keycloak.refresher import BackgroundRefresher
+from keycloak.well_known import KeycloakWellKnown
+
+
+class BackgroundRefresherTestCase(TestCase):
+
+    def setUp(self):
+        self.jwks = mock.MagicMock(spec_set=KeycloakJWKS)
+        self.jwks.ttl = 100
+        self.jwks.refetch_interval = 10
+        self.jwks.age = 0
+        self.jwks.revalidate.return_value = True
+        self.well_known = mock.MagicMock(spec_set=KeycloakWellKnown)
+        self.refresher = BackgroundRefresher(jwks=self.jwks,
+                                             well_known=self.well_known)
+
+    def test_refresh(self):
+        """
+        Case: The documents are refreshed
+        Expected: The next refresh is scheduled at 80% of the TTL
+        """
+        self.assertEqual(self.refresher.refresh(), 80)
+        self.well_known.refresh.assert_called_once_with()
+        self.jwks.revalidate.assert_called_once_with()
+
+    def test_refresh_failed(self):
+        """
+        Case: Refreshing the documents fails
+        Expected: The refresh is retried after the refetch interval of the
+                  JWKS
+        """
+        self.well_known.refresh.side_effect = IOError('unreachable')
+        self.jwks.revalidate.return_value = False
+        self.assertEqual(self.refresher.refresh(), 10)
+
+        self.jwks.revalidate.side_effect = IOError('unreachable')
+        self.assertEqual(self.refresher.refresh(), 10)
+
+    def test_thread(self):
+        """
+        Case: The refresher is started and stopped
+        Expected: The documents get refreshed in a daemon thread until it's
+                  stopped
+        """
+        refreshed = threading.Event()
+        self.jwks.age = 80
+        self.jwks.revalidate.side_effect = lambda: refreshed.set() or True
+
+        self.refresher.start()
+        self.assertTrue(self.refresher.running)
+        self.assertTrue(refreshed.wait(5))
+        self.jwks.get_keys.assert_called_once_with()
+
+        self.refresher.stop(timeout=5)
+        self.assertFalse(self.refresher.running)
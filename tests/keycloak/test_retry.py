@@ -0,0 +1,74 @@
+import time
+from email.utils import formatdate
+from unittest import TestCase
+
+import mock
+
+from keycloak.retry import RetryPolicy, parse_retry_after
+
+
+class RetryPolicyTestCase(TestCase):
+
+    def test_applies_to(self):
+        """
+        Case: The policy is asked whether methods are retried
+        Expected: Only idempotent methods are
+        """
+        policy = RetryPolicy()
+
+        self.assertTrue(policy.applies_to('GET'))
+        self.assertTrue(policy.applies_to('put'))
+        self.assertTrue(policy.applies_to('delete'))
+        self.assertFalse(policy.applies_to('post'))
+
+    @mock.patch('keycloak.retry.random')
+    def test_backoff(self, patched_random):
+        """
+        Case: A request is retried until the retries are exhausted
+        Expected: The delays are jittered up to an exponentially growing
+                  maximum and the retries are counted
+        """
+        patched_random.uniform.side_effect = lambda low, high: high
+        policy = RetryPolicy(max_retries=4, backoff_factor=1, max_backoff=5,
+                             max_total=100)
+        retry = policy.start()
+
+        self.assertEqual(
+            [retry.get_delay() for _ in range(5)], [1, 2, 4, 5, None]
+        )
+        self.assertEqual(policy.retries, 4)
+        self.assertEqual(policy.exhausted, 1)
+
+    def test_max_total(self):
+        """
+        Case: A retry would start after the total time budget
+        Expected: The request isn't retried
+        """
+        policy = RetryPolicy(max_total=10)
+
+        self.assertEqual(policy.start().get_delay(retry_after='3'), 3)
+        self.assertIsNone(policy.start().get_delay(retry_after='11'))
+        self.assertEqual(policy.exhausted, 1)
+
+    def test_retry_after_ignored(self):
+        """
+        Case: The policy doesn't respect Retry-After
+        Expected: The backoff is used
+        """
+        policy = RetryPolicy(backoff_factor=0.1, respect_retry_after=False)
+
+        self.assertLessEqual(policy.start().get_delay(retry_after='60'), 0.1)
+
+    def test_parse_retry_after(self):
+        """
+        Case: Retry-After headers are parsed
+        Expected: Both seconds and dates are supported, invalid values are
+                  ignored
+        """
+        self.assertEqual(parse_retry_after('120'), 120)
+        self.assertEqual(parse_retry_after('-1'), 0)
+        self.assertAlmostEqual(
+            parse_retry_after(formatdate(time.time() + 60, usegmt=True)),
+            60, delta=2
+        )
+        self.assertIsNone(parse_retry_after('soon'))
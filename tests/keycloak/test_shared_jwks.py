@@ -0,0 +1,176 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+from unittest import TestCase, skipIf
+
+import mock
+from jose.backends.base import Key
+
+from keycloak.realm import KeycloakRealm
+from keycloak.shared_jwks import HEADER, SharedKeycloakJWKS
+from tests.keycloak.keys import generate_key
+
+KEYS = dict(
+    (kid, generate_key(kid)[1]) for kid in ('key-1', 'key-2')
+)
+
+
+def _get_fork_context():
+    try:
+        return multiprocessing.get_context('fork')
+    except AttributeError:
+        # Python 2 always forks.
+        return multiprocessing
+
+
+def _read_in_child(shared_path, queue):
+    realm = mock.MagicMock(spec_set=KeycloakRealm)
+    realm.snapshot = None
+    realm.client.get.side_effect = AssertionError('JWKS was fetched')
+    jwks = SharedKeycloakJWKS(realm=realm, path='https://certs',
+                              shared_path=shared_path)
+    try:
+        queue.put(sorted(jwks))
+    except AssertionError as err:
+        queue.put(str(err))
+
+
+def _lock_after_fork(jwks, queue):
+    with jwks._locked():
+        queue.put((jwks._pid == os.getpid(), sorted(jwks)))
+
+
+class SharedKeycloakJWKSTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.shared_path = os.path.join(self.directory, 'jwks')
+        self.realm = mock.MagicMock(spec_set=KeycloakRealm)
+        self.realm.snapshot = None
+        self.realm.client.get.return_value = {'keys': [KEYS['key-1']]}
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _get_jwks(self, **kwargs):
+        jwks = SharedKeycloakJWKS(realm=self.realm, path='https://certs',
+                                  shared_path=self.shared_path, **kwargs)
+        self.addCleanup(jwks.close)
+        return jwks
+
+    def test_shared(self):
+        """
+        Case: Keys are requested by two instances sharing a file
+        Expected: The JWKS is only fetched by the first one, both construct
+                  their own key objects
+        """
+        first, second = self._get_jwks(), self._get_jwks()
+
+        key = first.get_key('key-1')
+        self.assertIsInstance(key, Key)
+        self.assertIsInstance(second.get_key('key-1'), Key)
+        self.assertIsNot(second.get_key('key-1'), key)
+        self.realm.client.get.assert_called_once_with('https://certs')
+
+    @mock.patch('keycloak.shared_jwks.time')
+    @mock.patch('keycloak.jwks.monotonic')
+    def test_ttl(self, monotonic, patched_time):
+        """
+        Case: The shared JWKS expires
+        Expected: It's fetched once again and picked up by the other
+                  instance, which expires at the same moment
+        """
+        monotonic.return_value = patched_time.time.return_value = 100
+        first = self._get_jwks(ttl=60)
+        first['key-1']
+
+        monotonic.return_value = patched_time.time.return_value = 130
+        second = self._get_jwks(ttl=60)
+        second['key-1']
+        self.assertEqual(self.realm.client.get.call_count, 1)
+
+        monotonic.return_value = patched_time.time.return_value = 160
+        self.realm.client.get.return_value = {'keys': [KEYS['key-2']]}
+        self.assertEqual(list(second), ['key-2'])
+        self.assertEqual(list(first), ['key-2'])
+        self.assertEqual(self.realm.client.get.call_count, 2)
+
+    def test_unknown_kid(self):
+        """
+        Case: An unknown kid is requested after another instance fetched
+              the rotated JWKS
+        Expected: The rotated JWKS is taken from the shared file
+        """
+        first = self._get_jwks(refetch_interval=0)
+        second = self._get_jwks(refetch_interval=0)
+        first['key-1']
+        second['key-1']
+
+        self.realm.client.get.return_value = {
+            'keys': [KEYS['key-1'], KEYS['key-2']]
+        }
+        first.get_key('key-2')
+        second.get_key('key-2')
+
+        self.assertEqual(self.realm.client.get.call_count, 2)
+
+    def test_corrupt(self):
+        """
+        Case: The shared JWKS doesn't match its checksum or doesn't fit in
+              the file
+        Expected: It's ignored and the JWKS is fetched
+        """
+        self._get_jwks()['key-1']
+        with open(self.shared_path, 'r+b') as fp:
+            fp.seek(HEADER.size)
+            fp.write(b'X')
+
+        self.assertEqual(list(self._get_jwks()), ['key-1'])
+        self.assertEqual(self.realm.client.get.call_count, 2)
+
+        os.remove(self.shared_path)
+        self.assertEqual(list(self._get_jwks(capacity=10)), ['key-1'])
+        self.assertEqual(list(self._get_jwks(capacity=10)), ['key-1'])
+        self.assertEqual(self.realm.client.get.call_count, 4)
+
+    @skipIf(not hasattr(os, 'fork'), 'fork is not available')
+    def test_other_process(self):
+        """
+        Case: The JWKS is requested in a forked worker process after the
+              parent fetched it
+        Expected: The worker reads it from the shared file
+        """
+        self._get_jwks()['key-1']
+
+        context = _get_fork_context()
+        queue = context.Queue()
+        process = context.Process(target=_read_in_child,
+                                  args=(self.shared_path, queue))
+        process.start()
+        result = queue.get(timeout=10)
+        process.join()
+
+        self.assertEqual(result, ['key-1'])
+
+    @skipIf(not hasattr(os, 'fork'), 'fork is not available')
+    def test_opened_before_fork(self):
+        """
+        Case: The shared file was opened before the process forked and the
+              JWKS is used in the child
+        Expected: The child opens the file again, so locks on it exclude
+                  the other processes
+        """
+        jwks = self._get_jwks()
+        jwks['key-1']
+
+        context = _get_fork_context()
+        queue = context.Queue()
+        process = context.Process(target=_lock_after_fork,
+                                  args=(jwks, queue))
+        process.start()
+        result = queue.get(timeout=10)
+        process.join()
+
+        self.assertEqual(result, (True, ['key-1']))
+        self.assertEqual(jwks._pid, os.getpid())
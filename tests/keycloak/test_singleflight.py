@@ -0,0 +1,84 @@
+import threading
+import time
+from unittest import TestCase
+
+import mock
+
+from keycloak.singleflight import SingleFlight
+
+
+class SingleFlightTestCase(TestCase):
+
+    def setUp(self):
+        self.flight = SingleFlight()
+
+    def _run_concurrently(self, key, func, count=5):
+        results = []
+        errors = []
+
+        def run():
+            try:
+                results.append(self.flight.do(key, func))
+            except Exception as err:
+                errors.append(err)
+
+        threads = [threading.Thread(target=run) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, results, errors
+
+    def test_coalesce(self):
+        """
+        Case: The same call is done by multiple threads at once
+        Expected: It's executed once and all threads get its result
+        """
+        entered = threading.Event()
+        release = threading.Event()
+
+        def call():
+            entered.set()
+            release.wait(5)
+            return 'result'
+
+        func = mock.Mock(side_effect=call)
+
+        threads, results, errors = self._run_concurrently('key', func)
+        self.assertTrue(entered.wait(5))
+        # Give the other threads the time to join the call in flight
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['result'] * len(threads))
+        self.assertEqual(len(self.flight), 0)
+        func.assert_called_once_with()
+
+    def test_error(self):
+        """
+        Case: The shared call fails
+        Expected: The error is raised for all callers and the next call is
+                  executed again
+        """
+        release = threading.Event()
+
+        def func():
+            release.wait(5)
+            raise ValueError('failed')
+
+        threads, results, errors = self._run_concurrently('key', func)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(errors), len(threads))
+        self.assertTrue(all(isinstance(err, ValueError) for err in errors))
+        self.assertEqual(self.flight.do('key', lambda: 'result'), 'result')
+
+    def test_keys(self):
+        """
+        Case: Calls are done with different keys
+        Expected: They're executed separately
+        """
+        self.assertEqual(self.flight.do('a', lambda: 1), 1)
+        self.assertEqual(self.flight.do('b', lambda: 2), 2)
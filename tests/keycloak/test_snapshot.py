@@ -0,0 +1,155 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+
+import mock
+
+from keycloak.jwks import KeycloakJWKS
+from keycloak.realm import KeycloakRealm
+from keycloak.snapshot import RealmSnapshot
+from keycloak.well_known import KeycloakWellKnown
+from tests.keycloak.keys import generate_key
+
+
+class RealmSnapshotTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'snapshot.json')
+        self.snapshot = self._get_snapshot()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _get_snapshot(self, **kwargs):
+        options = dict(server_url='https://example.com',
+                       realm_name='some-realm', max_age=60)
+        options.update(kwargs)
+        return RealmSnapshot(path=self.path, **options)
+
+    def test_persisted(self):
+        """
+        Case: A document is stored in the snapshot
+        Expected: It's saved to disk and available to a new snapshot
+        """
+        self.assertIsNone(self.snapshot.get('https://well-known'))
+
+        self.snapshot.set('https://well-known', {'issuer': 'https://iss'})
+
+        self.assertEqual(
+            self._get_snapshot().get('https://well-known'),
+            {'issuer': 'https://iss'}
+        )
+        self.assertEqual(os.listdir(self.directory), ['snapshot.json'])
+
+    @mock.patch('keycloak.snapshot.time')
+    def test_max_age(self, patched_time):
+        """
+        Case: A document in the snapshot is older than the max age
+        Expected: It's not used anymore
+        """
+        patched_time.time.return_value = 1000
+        self.snapshot.set('https://well-known', {'issuer': 'https://iss'})
+
+        patched_time.time.return_value = 1060
+        self.assertIsNotNone(self._get_snapshot().get('https://well-known'))
+        self.assertIsNotNone(self.snapshot.get('https://well-known'))
+
+        patched_time.time.return_value = 1061
+        self.assertIsNone(self._get_snapshot().get('https://well-known'))
+        self.assertIsNone(self.snapshot.get('https://well-known'))
+
+    def test_incompatible(self):
+        """
+        Case: The snapshot is malformed, of another version or realm
+        Expected: It's ignored
+        """
+        self.snapshot.set('https://well-known', {'issuer': 'https://iss'})
+        snapshot = self._get_snapshot(realm_name='other-realm')
+        self.assertIsNone(snapshot.get('https://well-known'))
+
+        with open(self.path) as fp:
+            contents = json.load(fp)
+        with open(self.path, 'w') as fp:
+            json.dump(dict(contents, version=0), fp)
+        self.assertIsNone(self._get_snapshot().get('https://well-known'))
+
+        with open(self.path, 'w') as fp:
+            fp.write('{"version": ')
+        self.assertIsNone(self._get_snapshot().get('https://well-known'))
+
+    def test_revalidate(self):
+        """
+        Case: A document is revalidated by multiple callers, which fails
+        Expected: The refresh only runs once, in a background thread
+        """
+        called = threading.Event()
+        refresh = mock.Mock(side_effect=lambda: called.set() or 1 / 0)
+
+        self.snapshot.revalidate('https://well-known', refresh)
+        self.snapshot.revalidate('https://well-known', refresh)
+
+        self.assertTrue(called.wait(5))
+        refresh.assert_called_once_with()
+
+
+class SnapshotUsageTestCase(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.realm = mock.MagicMock(spec_set=KeycloakRealm)
+        self.realm.snapshot = RealmSnapshot(
+            path=os.path.join(self.directory, 'snapshot.json'),
+            server_url='https://example.com',
+            realm_name='some-realm'
+        )
+        self.realm.snapshot.revalidate = mock.Mock()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_well_known(self):
+        """
+        Case: The .well-known is requested with and without a snapshot
+        Expected: It's fetched and stored when it's not in the snapshot,
+                  otherwise the snapshot is used and revalidated
+        """
+        self.realm.client.get.return_value = {'issuer': 'https://iss'}
+        well_known = KeycloakWellKnown(realm=self.realm,
+                                       path='https://well-known')
+        self.assertEqual(well_known['issuer'], 'https://iss')
+        self.realm.snapshot.revalidate.assert_not_called()
+
+        well_known = KeycloakWellKnown(realm=self.realm,
+                                       path='https://well-known')
+        self.assertEqual(well_known['issuer'], 'https://iss')
+        self.realm.client.get.assert_called_once_with('https://well-known')
+        self.realm.snapshot.revalidate.assert_called_once_with(
+            'https://well-known', well_known.refresh
+        )
+
+    def test_jwks(self):
+        """
+        Case: The JWKS is loaded from the snapshot
+        Expected: The keys are usable without fetching them, the JWKS is
+                  revalidated
+        """
+        public_jwk = generate_key('key-1')[1]
+        self.realm.snapshot.set('https://certs', {'keys': [public_jwk]})
+
+        jwks = KeycloakJWKS(realm=self.realm, path='https://certs')
+
+        self.assertIsNotNone(jwks.get_key('key-1'))
+        self.realm.client.get.assert_not_called()
+        self.realm.snapshot.revalidate.assert_called_once_with(
+            'https://certs', jwks.refresh
+        )
+
+        self.realm.client.get.return_value = {'keys': []}
+        jwks.refresh()
+        self.assertEqual(len(jwks), 0)
+        self.assertEqual(self.realm.snapshot.get('https://certs'),
+                         {'keys': []})
@@ -0,0 +1,483 @@
+import shutil
+import tempfile
+import threading
+from unittest import TestCase
+
+import mock
+from requests.exceptions import HTTPError
+
+from keycloak.exceptions import KeycloakClientError, KeycloakSessionExpired
+from keycloak.openid_connect import KeycloakOpenidConnect
+from keycloak.token_manager import (
+    CachedTokenProvider,
+    ClientCredentialsManager,
+    Token,
+    TokenSession,
+)
+from keycloak.token_store import FileTokenStore
+
+
+def token_response(access_token, expires_in=100, **kwargs):
+    return dict(kwargs, access_token=access_token, expires_in=expires_in)
+
+
+class TokenTestCase(TestCase):
+
+    @mock.patch('keycloak.token_manager.time')
+    def test_expiry(self, patched_time):
+        """
+        Case: A token is checked for expiry and the moment to refresh it
+        Expected: They're based on expires_in of the response
+        """
+        patched_time.time.return_value = 1000
+        token = Token(token_response('token'))
+
+        self.assertEqual(token.access_token, 'token')
+        self.assertEqual(token.expires_at, 1100)
+        self.assertEqual(token.refresh_at(0.8), 1080)
+        self.assertFalse(token.expired(leeway=10))
+
+        patched_time.time.return_value = 1090
+        self.assertTrue(token.expired(leeway=10))
+
+    @mock.patch('keycloak.token_manager.time')
+    def test_expiry_short_lived(self, patched_time):
+        """
+        Case: A token lives shorter than the leeway
+        Expected: The leeway is limited to half of its lifetime
+        """
+        patched_time.time.return_value = 1000
+        token = Token(token_response('token', expires_in=10))
+
+        self.assertFalse(token.expired(leeway=10))
+        patched_time.time.return_value = 1005
+        self.assertTrue(token.expired(leeway=10))
+
+
+class ClientCredentialsManagerTestCase(TestCase):
+
+    def setUp(self):
+        self.openid_connect = mock.MagicMock(spec_set=KeycloakOpenidConnect)
+        self.openid_connect.client_credentials.return_value = \
+            token_response('token-1')
+        self.manager = ClientCredentialsManager(
+            openid_connect=self.openid_connect, scope='profile'
+        )
+
+    @mock.patch('keycloak.token_manager.time')
+    def test_get_token(self, patched_time):
+        """
+        Case: A token is requested multiple times within its lifetime
+        Expected: It's only requested once from the token endpoint
+        """
+        patched_time.time.return_value = 1000
+        self.assertEqual(self.manager.get_token(), 'token-1')
+        patched_time.time.return_value = 1079
+        self.assertEqual(self.manager.get_token(), 'token-1')
+
+        self.openid_connect.client_credentials.assert_called_once_with(
+            scope='profile'
+        )
+
+    @mock.patch('keycloak.token_manager.time')
+    def test_get_token_short_lived(self, patched_time):
+        """
+        Case: Tokens live shorter than the leeway
+        Expected: A token is still reused
+        """
+        patched_time.time.return_value = 1000
+        self.openid_connect.client_credentials.return_value = \
+            token_response('token-1', expires_in=10)
+
+        for _ in range(5):
+            self.assertEqual(self.manager.get_token(), 'token-1')
+        self.assertEqual(self.openid_connect.client_credentials.call_count,
+                         1)
+
+    @mock.patch('keycloak.token_manager.time')
+    def test_expired(self, patched_time):
+        """
+        Case: A token is requested when the current token (almost) expired
+        Expected: A new token is requested before it's returned
+        """
+        patched_time.time.return_value = 1000
+        self.manager.get_token()
+
+        patched_time.time.return_value = 1090
+        self.openid_connect.client_credentials.return_value = \
+            token_response('token-2')
+        self.assertEqual(self.manager.get_token(), 'token-2')
+
+    @mock.patch('keycloak.token_manager.time')
+    def test_refresh_replaced(self, patched_time):
+        """
+        Case: The background refresh gets the lock after a caller already
+              replaced the token
+        Expected: No token is requested and the newer token is kept
+        """
+        patched_time.time.return_value = 1000
+        self.manager.get_token()
+
+        patched_time.time.return_value = 1090
+        self.openid_connect.client_credentials.return_value = \
+            token_response('token-2')
+        self.assertEqual(self.manager.get_token(), 'token-2')
+
+        self.manager._refreshing.acquire()
+        self.manager._refresh()
+
+        self.assertEqual(self.openid_connect.client_credentials.call_count,
+                         2)
+        self.assertEqual(self.manager.token.access_token, 'token-2')
+
+    def test_refresh_ahead(self):
+        """
+        Case: A token is requested after the refresh fraction of its
+              lifetime passed
+        Expected: The current token is returned and the token is refreshed
+                  in the background once
+        """
+        self.manager = ClientCredentialsManager(
+            openid_connect=self.openid_connect, refresh_fraction=0
+        )
+        self.manager.get_token()
+
+        release = threading.Event()
+        refreshed = threading.Event()
+
+        def client_credentials():
+            release.wait(5)
+            refreshed.set()
+            return token_response('token-2')
+
+        self.openid_connect.client_credentials.side_effect = \
+            client_credentials
+
+        self.assertEqual(self.manager.get_token(), 'token-1')
+        self.assertEqual(self.manager.get_token(), 'token-1')
+        release.set()
+        self.assertTrue(refreshed.wait(5))
+        self.manager._refreshing.acquire()
+        self.manager._refreshing.release()
+
+        self.assertEqual(self.openid_connect.client_credentials.call_count, 2)
+        self.assertEqual(self.manager.token.access_token, 'token-2')
+
+    def test_refresh_ahead_failed(self):
+        """
+        Case: Refreshing the token in the background fails
+        Expected: The current token is still used, the refresh is only
+                  retried after the retry interval
+        """
+        self.manager = ClientCredentialsManager(
+            openid_connect=self.openid_connect, refresh_fraction=0,
+            retry_interval=60
+        )
+        self.manager.get_token()
+        self.openid_connect.client_credentials.side_effect = \
+            IOError('unreachable')
+
+        self.manager.get_token()
+        self.manager._refreshing.acquire()
+        self.manager._refreshing.release()
+        self.assertEqual(self.manager.get_token(), 'token-1')
+
+        self.assertEqual(self.openid_connect.client_credentials.call_count, 2)
+
+    def test_single_flight(self):
+        """
+        Case: Many threads request a token at once while there is none
+        Expected: Only one token request is done
+        """
+        started = threading.Event()
+
+        def client_credentials(**kwargs):
+            started.wait(1)
+            return token_response('token-1')
+
+        self.openid_connect.client_credentials.side_effect = \
+            client_credentials
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(self.manager.get_token())
+            ) for _ in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        started.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ['token-1'] * 10)
+        self.assertEqual(self.openid_connect.client_credentials.call_count, 1)
+
+    def test_invalidate(self):
+        """
+        Case: The token is invalidated
+        Expected: A new token is requested
+        """
+        self.manager.get_token()
+        self.manager.invalidate()
+        self.manager.get_token()
+
+        self.assertEqual(self.openid_connect.client_credentials.call_count, 2)
+
+
+class CachedTokenProviderTestCase(TestCase):
+
+    def setUp(self):
+        self.openid_connect = mock.MagicMock(spec_set=KeycloakOpenidConnect)
+        self.openid_connect.password_credentials.return_value = \
+            token_response('token-1', refresh_token='refresh-1',
+                           refresh_expires_in=1000)
+        self.openid_connect.refresh_token.return_value = \
+            token_response('token-2', refresh_token='refresh-2',
+                           refresh_expires_in=1000)
+        self.provider = CachedTokenProvider(
+            openid_connect=self.openid_connect,
+            username='admin', password='secret', refresh_fraction=1
+        )
+
+    @mock.patch('keycloak.token_manager.time')
+    def test_provider(self, patched_time):
+        """
+        Case: The provider is called within the lifetime of the access token
+        Expected: A token is only requested once
+        """
+        patched_time.time.return_value = 1000
+        self.assertEqual(self.provider(), 'token-1')
+        patched_time.time.return_value = 1089
+        self.assertEqual(self.provider(), 'token-1')
+
+        self.openid_connect.password_credentials.assert_called_once_with(
+            username='admin', password='secret'
+        )
+
+    @mock.patch('keycloak.token_manager.time')
+    def test_refresh(self, patched_time):
+        """
+        Case: The provider is called after the access token expired
+        Expected: The token is refreshed with the refresh token, the rotated
+                  refresh token is used for the next refresh
+        """
+        patched_time.time.return_value = 1000
+        self.provider()
+
+        patched_time.time.return_value = 1090
+        self.assertEqual(self.provider(), 'token-2')
+        self.openid_connect.refresh_token.assert_called_once_with(
+            refresh_token='refresh-1'
+        )
+
+        patched_time.time.return_value = 1180
+        self.provider()
+        self.openid_connect.refresh_token.assert_called_with(
+            refresh_token='refresh-2'
+        )
+        self.assertEqual(
+            self.openid_connect.password_credentials.call_count, 1
+        )
+
+    @mock.patch('keycloak.token_manager.time')
+    def test_refresh_without_rotation(self, patched_time):
+        """
+        Case: The refresh response doesn't contain a new refresh token
+        Expected: The current refresh token is used until it expires
+        """
+        patched_time.time.return_value = 1000
+        self.provider()
+        self.openid_connect.refresh_token.return_value = \
+            token_response('token-2')
+
+        patched_time.time.return_value = 1090
+        self.provider()
+        self.assertEqual(self.provider.token.refresh_token, 'refresh-1')
+        self.assertEqual(self.provider.token.refresh_expires_at, 2000)
+
+    @mock.patch('keycloak.token_manager.time')
+    def test_refresh_expired(self, patched_time):
+        """
+        Case: The provider is called after the refresh token expired, or
+              refreshing fails
+        Expected: A new token is requested with the password grant
+        """
+        patched_time.time.return_value = 1000
+        self.provider()
+
+        patched_time.time.return_value = 1990
+        self.provider()
+        self.openid_connect.refresh_token.assert_not_called()
+        self.assertEqual(
+            self.openid_connect.password_credentials.call_count, 2
+        )
+
+        patched_time.time.return_value = 2080
+        self.openid_connect.refresh_token.side_effect = KeycloakClientError(
+            IOError('invalid_grant')
+        )
+        self.assertEqual(self.provider(), 'token-1')
+        self.assertEqual(
+            self.openid_connect.password_credentials.call_count, 3
+        )
+
+    def test_refresh_ahead(self):
+        """
+        Case: The provider is called after the refresh fraction of the
+              lifetime of the access token passed
+        Expected: The current token is returned and it's refreshed with the
+                  refresh token in the background
+        """
+        provider = CachedTokenProvider(openid_connect=self.openid_connect,
+                                       username='admin', password='secret',
+                                       refresh_fraction=0)
+        self.assertEqual(provider(), 'token-1')
+
+        self.assertEqual(provider(), 'token-1')
+        provider._refreshing.acquire()
+        provider._refreshing.release()
+
+        self.assertEqual(provider.token.access_token, 'token-2')
+        self.openid_connect.refresh_token.assert_called_once_with(
+            refresh_token='refresh-1'
+        )
+
+    def test_store(self):
+        """
+        Case: Providers of different processes share a token store
+        Expected: The token is only requested once, per user
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.openid_connect.get_url.return_value = 'https://token'
+        self.openid_connect.client_id = 'admin-cli'
+
+        providers = [
+            CachedTokenProvider(openid_connect=self.openid_connect,
+                                username=username, password='secret',
+                                store=FileTokenStore(directory))
+            for username in ('admin', 'admin', 'other')
+        ]
+
+        self.assertEqual([provider() for provider in providers],
+                         ['token-1'] * 3)
+        self.assertEqual(
+            self.openid_connect.password_credentials.call_count, 2
+        )
+
+    def test_client_credentials(self):
+        """
+        Case: The provider is used without username
+        Expected: The token is requested with the client credentials grant
+        """
+        self.openid_connect.client_credentials.return_value = \
+            token_response('token-1')
+        provider = CachedTokenProvider(openid_connect=self.openid_connect)
+
+        self.assertEqual(provider(), 'token-1')
+        self.openid_connect.client_credentials.assert_called_once_with()
+
+
+class TokenSessionTestCase(TestCase):
+
+    def setUp(self):
+        self.openid_connect = mock.MagicMock(spec_set=KeycloakOpenidConnect)
+        self.openid_connect.refresh_token.return_value = \
+            token_response('token-2', refresh_token='refresh-2',
+                           refresh_expires_in=1000)
+        self.on_refresh = mock.Mock()
+        self.session = TokenSession(
+            openid_connect=self.openid_connect,
+            token_response=token_response('token-1',
+                                          refresh_token='refresh-1',
+                                          refresh_expires_in=1000),
+            obtained_at=1000,
+            on_refresh=self.on_refresh
+        )
+
+    @mock.patch('keycloak.token_manager.time')
+    def test_get_token(self, patched_time):
+        """
+        Case: The access token is requested within its lifetime
+        Expected: It's returned without refreshing it
+        """
+        patched_time.time.return_value = 1079
+        self.assertEqual(self.session.get_token(), 'token-1')
+        self.openid_connect.refresh_token.assert_not_called()
+
+    @mock.patch('keycloak.token_manager.time')
+    def test_expired(self, patched_time):
+        """
+        Case: The access token is requested after it expired
+        Expected: It's refreshed and the rotated refresh token is reported
+        """
+        patched_time.time.return_value = 1090
+        self.assertEqual(self.session.get_token(), 'token-2')
+
+        self.openid_connect.refresh_token.assert_called_once_with(
+            refresh_token='refresh-1'
+        )
+        token = self.on_refresh.call_args[0][0]
+        self.assertEqual(token.refresh_token, 'refresh-2')
+        self.assertEqual(token.obtained_at, 1090)
+
+    def test_refresh_ahead_coalesced(self):
+        """
+        Case: The access token is requested by multiple threads after the
+              refresh fraction of its lifetime passed
+        Expected: The current token is returned and refreshed only once
+        """
+        self.session = TokenSession(
+            openid_connect=self.openid_connect,
+            token_response=token_response('token-1',
+                                          refresh_token='refresh-1'),
+            refresh_fraction=0
+        )
+        release = threading.Event()
+
+        def refresh_token(**kwargs):
+            release.wait(5)
+            return token_response('token-2', refresh_token='refresh-2')
+
+        self.openid_connect.refresh_token.side_effect = refresh_token
+
+        threads = [
+            threading.Thread(target=self.session.get_token)
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        release.set()
+        self.session._refreshing.acquire()
+        self.session._refreshing.release()
+
+        self.assertEqual(self.openid_connect.refresh_token.call_count, 1)
+        self.assertEqual(self.session.get_token(), 'token-2')
+
+    @mock.patch('keycloak.token_manager.time')
+    def test_session_expired(self, patched_time):
+        """
+        Case: The access token is requested after the refresh token expired
+              or when it got revoked
+        Expected: KeycloakSessionExpired is raised
+        """
+        patched_time.time.return_value = 1090
+        error = HTTPError(response=mock.Mock(status_code=400))
+        self.openid_connect.refresh_token.side_effect = \
+            KeycloakClientError(error)
+        with self.assertRaises(KeycloakSessionExpired):
+            self.session.get_token()
+
+        self.openid_connect.refresh_token.side_effect = \
+            KeycloakClientError(HTTPError(response=mock.Mock(status_code=502)))
+        with self.assertRaises(KeycloakClientError):
+            self.session.get_token()
+
+        patched_time.time.return_value = 1990
+        self.assertTrue(self.session.expired)
+        with self.assertRaises(KeycloakSessionExpired):
+            self.session.get_token()
+        self.assertEqual(self.openid_connect.refresh_token.call_count, 2)
@@ -0,0 +1,140 @@
+import os
+import shutil
+import stat
+import tempfile
+import threading
+from unittest import TestCase
+
+import mock
+
+from keycloak.openid_connect import KeycloakOpenidConnect
+from keycloak.token_manager import ClientCredentialsManager, Token
+from keycloak.token_store import FileTokenStore, SQLiteTokenStore
+
+
+def token_response(access_token, expires_in=100):
+    return {'access_token': access_token, 'expires_in': expires_in}
+
+
+class TokenStoreTestMixin(object):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.store = self.get_store()
+        self.openid_connect = mock.MagicMock(spec_set=KeycloakOpenidConnect)
+        self.openid_connect.get_url.return_value = 'https://token'
+        self.openid_connect.client_id = 'client-id'
+        self.openid_connect.client_credentials.return_value = \
+            token_response('token-1')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get_store(self):
+        raise NotImplementedError()
+
+    def get_manager(self, **kwargs):
+        return ClientCredentialsManager(openid_connect=self.openid_connect,
+                                        store=self.get_store(), **kwargs)
+
+    def test_get_set(self):
+        """
+        Case: A token is stored
+        Expected: It's returned by other instances of the store, together
+                  with the moment it was obtained
+        """
+        self.assertIsNone(self.store.get('key'))
+
+        self.store.set('key', Token(token_response('token-1'),
+                                    obtained_at=1000))
+
+        token = self.get_store().get('key')
+        self.assertEqual(token.response, token_response('token-1'))
+        self.assertEqual(token.obtained_at, 1000)
+        self.assertIsNone(self.get_store().get('other-key'))
+
+    def test_shared(self):
+        """
+        Case: Managers of different processes with the same client and grant
+              parameters request a token
+        Expected: Only the first requests it from the token endpoint
+        """
+        self.assertEqual(self.get_manager(scope='profile').get_token(),
+                         'token-1')
+        self.assertEqual(self.get_manager(scope='profile').get_token(),
+                         'token-1')
+        self.assertEqual(self.openid_connect.client_credentials.call_count, 1)
+
+        self.get_manager(scope='email').get_token()
+        self.assertEqual(self.openid_connect.client_credentials.call_count, 2)
+
+    @mock.patch('keycloak.token_manager.time')
+    def test_refresh_due(self, patched_time):
+        """
+        Case: The stored token needs to be refreshed
+        Expected: It's not used, a new token is requested and stored
+        """
+        patched_time.time.return_value = 1000
+        self.get_manager().get_token()
+
+        patched_time.time.return_value = 1080
+        self.openid_connect.client_credentials.return_value = \
+            token_response('token-2')
+        self.assertEqual(self.get_manager().get_token(), 'token-2')
+        self.assertEqual(self.get_manager().get_token(), 'token-2')
+        self.assertEqual(self.openid_connect.client_credentials.call_count, 2)
+
+    def test_lock(self):
+        """
+        Case: The lock of a key is acquired while it's held through another
+              instance of the store
+        Expected: It's acquired once the other instance released it
+        """
+        acquired = threading.Event()
+
+        def lock():
+            with self.get_store().lock('key'):
+                acquired.set()
+
+        with self.store.lock('key'):
+            thread = threading.Thread(target=lock)
+            thread.start()
+            self.assertFalse(acquired.wait(0.1))
+        thread.join(5)
+        self.assertTrue(acquired.is_set())
+
+
+class FileTokenStoreTestCase(TokenStoreTestMixin, TestCase):
+
+    def get_store(self):
+        return FileTokenStore(os.path.join(self.directory, 'tokens'))
+
+    def test_private(self):
+        """
+        Case: A token is stored
+        Expected: The directory and file are only accessible by the owner
+        """
+        self.store.set('key', Token(token_response('token-1')))
+
+        path = os.path.join(self.directory, 'tokens')
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o700)
+        self.assertEqual(
+            stat.S_IMODE(os.stat(os.path.join(path, 'key.json')).st_mode),
+            0o600
+        )
+
+
+class SQLiteTokenStoreTestCase(TokenStoreTestMixin, TestCase):
+
+    def get_store(self):
+        return SQLiteTokenStore(os.path.join(self.directory, 'tokens.db'))
+
+    def test_private(self):
+        """
+        Case: A token is stored
+        Expected: The database is only accessible by the owner
+        """
+        self.store.set('key', Token(token_response('token-1')))
+
+        path = os.path.join(self.directory, 'tokens.db')
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)